@@ -0,0 +1,63 @@
+"""Compare load/save time and file size of the storage formats.
+
+Prints a Markdown table for every available format (optional ones such as
+``json-zst`` and ``msgpack`` are skipped when their package is missing).
+
+Usage::
+
+    python benchmarks/bench_formats.py [--sizes 1000 10000 100000] [--repeat 3]
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from bench_memory import make_library  # noqa: E402
+
+
+def best_of(repeat: int, fn) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    from promptlauncher import storage
+    from promptlauncher.model import PromptModel
+
+    formats = [name for name, codec in storage.CODECS.items() if codec.available] + ["pack"]
+    print("| prompts | format | size (KB) | load (ms) | save (ms) |")
+    print("|--------:|--------|----------:|----------:|----------:|")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.sizes:
+            src = os.path.join(tmp, f"src-{n}.json")
+            make_library(src, n, max(1, n // 1000))
+            for fmt in formats:
+                path = os.path.join(tmp, f"{n}.{fmt}")
+                shutil.copyfile(src, path)
+                model = PromptModel(path, fmt=fmt)
+                save = best_of(args.repeat, model.save)
+                model.close()
+
+                def load():
+                    PromptModel(path).close()
+                load_t = best_of(args.repeat, load)
+                print(f"| {n} | {fmt} | {os.path.getsize(path) / 1024:.0f} "
+                      f"| {load_t * 1000:.1f} | {save * 1000:.1f} |")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""Per-request IPC latency with many concurrent clients.
+
+Starts ``python -m promptlauncher --daemon`` on a synthetic library (in a
+private ``TMPDIR`` so a running app is not disturbed) and lets N client
+threads send a read-mostly mix: ``search`` and ``get`` requests with about
+10% ``increment``.  Prints the median and p99 latency per client count.
+
+Without PyQt6 the daemon cannot start.  Pass ``--inproc`` to use a
+threaded stand-in server instead; it runs the same PromptService,
+reader/writer lock and deferred saves, but not the Qt event loop.
+
+Usage::
+
+    python benchmarks/bench_ipc.py [--prompts 10000] [--clients 1 8 32] [--inproc]
+"""
+import os
+import sys
+import time
+import random
+import socket
+import argparse
+import tempfile
+import threading
+import statistics
+import subprocess
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from bench_memory import make_library  # noqa: E402
+
+
+def start_inproc(data: str):
+    from promptlauncher import ipc
+    from promptlauncher.controller import PromptController
+    from promptlauncher.locks import RWLock
+    from promptlauncher.model import PromptModel
+    from promptlauncher.service import PromptService
+
+    model = PromptModel(data)
+    model.autosave = False
+    lock = RWLock()
+    service = PromptService(PromptController(model), lock=lock)
+    srv = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    srv.bind(ipc.server_address())
+    srv.listen(64)
+
+    def serve(conn):
+        dec = ipc.FrameDecoder()
+        with conn:
+            while data := conn.recv(65536):
+                for msg in dec.feed(data):
+                    conn.sendall(ipc.encode_frame(service.handle(msg)))
+
+    def accept():
+        while True:
+            try:
+                conn, _ = srv.accept()
+            except OSError:
+                return
+            threading.Thread(target=serve, args=(conn,), daemon=True).start()
+
+    def flusher():
+        while True:
+            time.sleep(1)
+            with lock.write_locked():
+                model.flush()
+
+    threading.Thread(target=accept, daemon=True).start()
+    threading.Thread(target=flusher, daemon=True).start()
+    return srv.close
+
+
+def start_daemon(data: str, env: dict):
+    from promptlauncher.ipc import IpcClient
+
+    proc = subprocess.Popen([sys.executable, "-m", "promptlauncher", "--daemon", "--data", data],
+                            env=env, cwd=ROOT, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 20
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            sys.exit("daemon failed to start (is PyQt6 installed?); try --inproc")
+        try:
+            IpcClient.connect().close()
+            return proc.terminate
+        except OSError:
+            time.sleep(0.1)
+    proc.kill()
+    sys.exit("daemon did not start listening")
+
+
+def client(aliases: list, n: int, seed: int, out: list):
+    from promptlauncher.ipc import IpcClient
+
+    rnd = random.Random(seed)
+    with IpcClient.connect(timeout=10) as cli:
+        for _ in range(n):
+            grp, alias = rnd.choice(aliases)
+            roll = rnd.random()
+            start = time.perf_counter()
+            if roll < 0.1:
+                cli.request("increment", group=grp, alias=alias)
+            elif roll < 0.5:
+                cli.request("get", group=grp, alias=alias)
+            else:
+                cli.request("search", query=alias.split("-")[0], group=grp, limit=10)
+            out.append(time.perf_counter() - start)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--prompts", type=int, default=10_000)
+    ap.add_argument("--clients", type=int, nargs="+", default=[1, 8, 32])
+    ap.add_argument("--requests", type=int, default=200, help="requests per client")
+    ap.add_argument("--inproc", action="store_true")
+    args = ap.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    os.environ["TMPDIR"] = tmp
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+    data = os.path.join(tmp, "prompt.json")
+    make_library(data, args.prompts, groups=20)
+
+    from promptlauncher.model import PromptModel
+    aliases = [(g, a) for g, a, _, _ in PromptModel(data).iter_prompts()]
+    stop = start_inproc(data) if args.inproc else start_daemon(data, env)
+    try:
+        print(f"{'in-process stand-in' if args.inproc else 'daemon'}, {args.prompts} prompts\n")
+        print("| clients | requests | median (ms) | p99 (ms) |")
+        print("|--------:|---------:|------------:|---------:|")
+        for n in args.clients:
+            lat: list = []
+            threads = [threading.Thread(target=client, args=(aliases, args.requests, i, lat))
+                       for i in range(n)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            lat.sort()
+            p99 = lat[int(len(lat) * 0.99) - 1]
+            print(f"| {n} | {len(lat)} | {statistics.median(lat) * 1000:.2f} | {p99 * 1000:.2f} |")
+    finally:
+        stop()
+
+
+if __name__ == "__main__":
+    main()
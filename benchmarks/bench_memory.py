@@ -0,0 +1,160 @@
+"""Measure the memory cost of holding a large prompt library.
+
+Compares the original nested-dict representation (``prompt_dict`` +
+``usage_counts``, one widget per prompt in the UI) with the record based
+``PromptModel`` and the model/view prompt list.  Python allocations are
+measured with ``tracemalloc``; when PyQt6 is installed the UI part runs
+under the offscreen platform and the RSS growth is reported as well, since
+most of a widget's memory lives on the C++ side.
+
+Usage::
+
+    python benchmarks/bench_memory.py [--prompts 100000] [--groups 100]
+"""
+import os
+import sys
+import gc
+import json
+import random
+import shutil
+import argparse
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+
+def make_library(path: str, n: int, groups: int, seed: int = 1):
+    rnd = random.Random(seed)
+    words = ["review", "translate", "explain", "refactor", "summarize", "code", "test", "email"]
+    data: dict = {f"group-{g}": {} for g in range(groups)}
+    for i in range(n):
+        alias = f"{rnd.choice(words)}-{rnd.choice(words)}-{i}"
+        text = " ".join(rnd.choice(words) for _ in range(rnd.randint(10, 60)))
+        data[f"group-{i % groups}"][alias] = {"text": text, "count": rnd.randint(0, 500)}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+
+
+def legacy_load(path: str):
+    """The loader PromptModel used before records were introduced."""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f) or {}
+    prompt_dict, usage_counts = {}, {}
+    for grp, amap in data.items():
+        prompt_dict[grp] = {}
+        usage_counts[grp] = {}
+        for alias, val in amap.items():
+            prompt_dict[grp][alias] = val.get("text", "")
+            usage_counts[grp][alias] = val.get("count", 0)
+    return prompt_dict, usage_counts
+
+
+def traced(fn):
+    """Return (result, retained bytes, peak bytes) of ``fn()``."""
+    gc.collect()
+    tracemalloc.start()
+    result = fn()
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current, peak
+
+
+def rss() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return 0
+
+
+def bench_ui(legacy, model):
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt6.QtWidgets import QApplication, QListWidget, QListWidgetItem, QListView, QWidget, QHBoxLayout, QLabel
+    from promptlauncher.widgets import PromptListModel, PromptItemDelegate
+
+    app = QApplication.instance() or QApplication([])
+
+    def old_widgets():
+        prompt_dict, usage_counts = legacy
+        lists = []
+        for grp, amap in prompt_dict.items():
+            lst = QListWidget()
+            for alias in amap:
+                # 原 PromptItemWidget 的结构：一个 QWidget + 两个 QLabel
+                item = QListWidgetItem()
+                w = QWidget()
+                lay = QHBoxLayout(w)
+                lay.addWidget(QLabel(alias))
+                lay.addStretch()
+                lay.addWidget(QLabel(str(usage_counts[grp][alias])))
+                item.setSizeHint(w.sizeHint())
+                lst.addItem(item)
+                lst.setItemWidget(item, w)
+            lists.append(lst)
+        return lists
+
+    def new_views():
+        delegate = PromptItemDelegate()
+        views = []
+        for grp in model.records:
+            view = QListView()
+            view.setModel(PromptListModel(model.records[grp], view))
+            view.setItemDelegate(delegate)
+            views.append(view)
+        return views, delegate
+
+    rows = []
+    for name, fn in [("legacy widgets", old_widgets), ("model/view", new_views)]:
+        before = rss()
+        keep, cur, peak = traced(fn)
+        rows.append((name, cur, peak, rss() - before))
+        del keep
+        app.processEvents()
+    return rows
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--prompts", type=int, default=100_000)
+    ap.add_argument("--groups", type=int, default=100)
+    args = ap.parse_args()
+
+    from promptlauncher.model import PromptModel
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "prompt.json")
+        make_library(path, args.prompts, args.groups)
+        print(f"library: {args.prompts} prompts in {args.groups} groups, "
+              f"{os.path.getsize(path) / 1e6:.1f} MB json\n")
+
+        legacy, legacy_cur, legacy_peak = traced(lambda: legacy_load(path))
+        model, model_cur, model_peak = traced(lambda: PromptModel(path))
+        pack_path = os.path.join(tmp, "prompt.pack")
+        shutil.copyfile(path, pack_path)
+        PromptModel(pack_path, fmt="pack").close()
+        packed, pack_cur, pack_peak = traced(lambda: PromptModel(pack_path))
+
+        print(f"{'model':<22}{'retained MB':>12}{'peak MB':>10}")
+        for name, cur, peak in [
+            ("legacy nested dicts", legacy_cur, legacy_peak),
+            ("records (json)", model_cur, model_peak),
+            ("records (pack)", pack_cur, pack_peak),
+        ]:
+            print(f"{name:<22}{cur / 1e6:>12.1f}{peak / 1e6:>10.1f}")
+
+        try:
+            ui_rows = bench_ui(legacy, model)
+        except ImportError:
+            print("\nPyQt6 not installed: UI comparison skipped")
+            return
+        print(f"\n{'ui':<22}{'python MB':>12}{'peak MB':>10}{'rss MB':>10}")
+        for name, cur, peak, rss_delta in ui_rows:
+            print(f"{name:<22}{cur / 1e6:>12.1f}{peak / 1e6:>10.1f}{rss_delta / 1e6:>10.1f}")
+        packed.close()
+
+
+if __name__ == "__main__":
+    main()
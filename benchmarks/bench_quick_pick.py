@@ -0,0 +1,71 @@
+"""Time from the hotkey callback to the first painted frame of the quick pick popup.
+
+Builds and pre-warms :class:`QuickPickPopup` on a synthetic library, then
+repeatedly emits the hotkey signal the way ``HotkeyManager`` does and waits
+until the result list has painted.  Needs PyQt6; runs on the ``offscreen``
+platform unless ``QT_QPA_PLATFORM`` is set, in which case a real display
+gives numbers closer to what users see (compositor latency is not included
+either way).
+
+Usage::
+
+    python benchmarks/bench_quick_pick.py [--prompts 10000] [--repeat 50]
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from bench_memory import make_library  # noqa: E402
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--prompts", type=int, default=10_000)
+    ap.add_argument("--repeat", type=int, default=50)
+    args = ap.parse_args()
+
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt6.QtCore import QObject, pyqtSignal
+    from PyQt6.QtWidgets import QApplication
+    from promptlauncher.model import PromptModel
+    from promptlauncher.widgets.quick_pick import QuickPickPopup, FRAME_BUDGET_MS
+
+    app = QApplication(sys.argv)
+    data = os.path.join(tempfile.mkdtemp(), "prompt.json")
+    make_library(data, args.prompts, groups=20)
+    model = PromptModel(data)
+
+    start = time.perf_counter()
+    popup = QuickPickPopup(model, lambda group, alias: None)
+    popup.prewarm()
+    build_ms = (time.perf_counter() - start) * 1000
+
+    class Hotkey(QObject):
+        triggered = pyqtSignal(object)
+
+    hotkey = Hotkey()
+    hotkey.triggered.connect(popup.toggle)
+    for _ in range(args.repeat):
+        seen = len(popup.latencies)
+        hotkey.triggered.emit(time.perf_counter_ns())
+        deadline = time.monotonic() + 2
+        while len(popup.latencies) == seen and time.monotonic() < deadline:
+            app.processEvents()
+        popup.hide()
+        app.processEvents()
+
+    lat = sorted(popup.latencies)
+    print(f"{args.prompts} prompts, popup built and pre-warmed in {build_ms:.1f} ms")
+    print(f"hotkey -> first paint over {len(lat)} runs: median {statistics.median(lat):.2f} ms, "
+          f"p95 {lat[int(len(lat) * 0.95) - 1]:.2f} ms, max {lat[-1]:.2f} ms "
+          f"(budget {FRAME_BUDGET_MS:.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()
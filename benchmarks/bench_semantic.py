@@ -0,0 +1,80 @@
+"""Measure the TF-IDF semantic search index on a large library.
+
+Reports the first build, the save and the load of ``<data>.semantic``
+(with the CRC check of every prompt), and the query latency with and
+without NumPy.
+
+Usage::
+
+    python benchmarks/bench_semantic.py [--prompts 100000]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import statistics
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from bench_similarity import make_library  # noqa: E402
+
+
+def query_ms(model, queries) -> tuple[float, float]:
+    lat = []
+    for q in queries:
+        t0 = time.perf_counter()
+        model.semantic_search(q)
+        lat.append((time.perf_counter() - t0) * 1000)
+    lat.sort()
+    return statistics.median(lat), lat[int(len(lat) * 0.95)]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--prompts", type=int, default=100_000)
+    ap.add_argument("--queries", type=int, default=50)
+    args = ap.parse_args()
+
+    from promptlauncher import semantic
+    from promptlauncher.model import PromptModel
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "prompt.json")
+        make_library(path, args.prompts, 0)
+        model = PromptModel(path)
+
+        t0 = time.perf_counter()
+        model.semantic_index()
+        build = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        model.save_semantic_index()
+        save = time.perf_counter() - t0
+
+        model = PromptModel(path)
+        t0 = time.perf_counter()
+        model.semantic_index()
+        load = time.perf_counter() - t0
+
+        rnd = random.Random(3)
+        keys = [(g, a) for g, recs in model.records.items() for a in recs]
+        queries = [" ".join(model.get_text(*k).split()[:6]) for k in rnd.sample(keys, args.queries)]
+        model.semantic_search(queries[0])  # 预先计算 idf 权重
+        rows = [("numpy" if semantic.np is not None else "numpy (not installed)", query_ms(model, queries))]
+        np, semantic.np = semantic.np, None
+        model._semantic._weights = None
+        model.semantic_search(queries[0])
+        rows.append(("pure python", query_ms(model, queries[:10])))
+        semantic.np = np
+
+        print(f"{args.prompts} prompts, {len(model._semantic.indices)} non-zeros, "
+              f"{os.path.getsize(model.semantic_path) / 1e6:.1f} MB on disk")
+        print(f"build {build:.2f} s, save {save:.2f} s, load + CRC sync {load:.2f} s")
+        for name, (p50, p95) in rows:
+            print(f"query ({name}) p50 {p50:.1f} ms, p95 {p95:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Measure the near-duplicate index on a large library.
+
+Generates prompts from a 5000-word vocabulary and plants near-duplicates:
+copies of existing prompts with a few words changed, in a different group.
+It reports the index build time and retained memory, the per-query latency
+the new/edit dialogs pay, the time of the full duplicate report, and the
+fraction of planted pairs (at or above the threshold) that were found.
+
+Usage::
+
+    python benchmarks/bench_similarity.py [--prompts 100000] [--dups 1000]
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import statistics
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from bench_memory import traced  # noqa: E402
+
+
+def make_library(path: str, n: int, dups: int, groups: int = 50, seed: int = 1):
+    rnd = random.Random(seed)
+    vocab = [f"w{i}" for i in range(5000)]
+    data: dict = {f"group-{g}": {} for g in range(groups)}
+    texts = []
+    for i in range(n - dups):
+        words = rnd.choices(vocab, k=rnd.randint(10, 60))
+        texts.append(words)
+        data[f"group-{i % groups}"][f"p{i}"] = {"text": " ".join(words), "count": 0}
+    planted = []
+    for j in range(dups):
+        src = rnd.randrange(len(texts))
+        words = list(texts[src])
+        # 改动约 3% 的词，保持 Jaccard 在 0.8 以上
+        for _ in range(max(1, len(words) // 30)):
+            words[rnd.randrange(len(words))] = rnd.choice(vocab)
+        grp = f"group-{(src + 1 + j) % groups}"
+        data[grp][f"dup{j}"] = {"text": " ".join(words), "count": 0}
+        planted.append(((f"group-{src % groups}", f"p{src}"), (grp, f"dup{j}")))
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    return planted
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--prompts", type=int, default=100_000)
+    ap.add_argument("--dups", type=int, default=1000)
+    ap.add_argument("--queries", type=int, default=500)
+    args = ap.parse_args()
+
+    from promptlauncher.model import PromptModel
+    from promptlauncher.similarity import THRESHOLD, jaccard, shingles
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "prompt.json")
+        planted = make_library(path, args.prompts, args.dups)
+        model = PromptModel(path)
+
+        t0 = time.perf_counter()
+        model._similarity_index()
+        build = time.perf_counter() - t0
+        # 内存单独测一次：tracemalloc 会让构建慢很多倍
+        model._similar = None
+        _, retained, _ = traced(model._similarity_index)
+
+        rnd = random.Random(2)
+        keys = [(g, a) for g, recs in model.records.items() for a in recs]
+        lat = []
+        for key in rnd.sample(keys, min(args.queries, len(keys))):
+            text = model.get_text(*key)
+            t0 = time.perf_counter()
+            model.similar_prompts(text, exclude=key)
+            lat.append((time.perf_counter() - t0) * 1000)
+        lat.sort()
+
+        t0 = time.perf_counter()
+        clusters = model.duplicate_clusters()
+        report = time.perf_counter() - t0
+
+        # 只统计真实相似度达到阈值的植入对（短文本改一个词可能已低于阈值）
+        planted = [(a, b) for a, b in planted
+                   if jaccard(shingles(model.get_text(*a)), shingles(model.get_text(*b))) >= THRESHOLD]
+        together = {k: i for i, c in enumerate(clusters) for k in c}
+        found = sum(1 for a, b in planted if a in together and together.get(a) == together.get(b))
+
+        print(f"{args.prompts} prompts, {len(planted)} planted pairs at Jaccard >= {THRESHOLD}")
+        print(f"index build       {build:8.2f} s   retained {retained / 1e6:.1f} MB")
+        print(f"query p50/p99     {statistics.median(lat):8.3f} / {lat[int(len(lat) * 0.99)]:.3f} ms")
+        print(f"duplicate report  {report:8.2f} s   {len(clusters)} clusters")
+        print(f"recall            {found / max(1, len(planted)):8.1%}")
+
+
+if __name__ == "__main__":
+    main()
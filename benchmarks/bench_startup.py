@@ -0,0 +1,97 @@
+"""Measure the wall time of launching PromptLauncher while it is already running.
+
+A stand-in primary instance listens on the single-instance socket (a
+private ``TMPDIR`` is used so a real running app is not disturbed) and
+``python -m promptlauncher`` is launched repeatedly against it.  For
+comparison the script also times what a second launch used to pay before
+it could find the primary: importing PyQt6, ``keyboard`` and paramiko and
+creating a ``QApplication`` (reported as n/a when those are not installed).
+
+Unix only, since the stand-in primary uses an ``AF_UNIX`` socket.
+
+Usage::
+
+    python benchmarks/bench_startup.py [--repeat 20]
+"""
+import os
+import sys
+import socket
+import argparse
+import tempfile
+import threading
+import statistics
+import subprocess
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from promptlauncher import ipc  # noqa: E402
+
+OLD_PATH = """
+import sys
+import keyboard, paramiko
+from PyQt6.QtWidgets import QApplication
+app = QApplication(sys.argv)
+"""
+
+
+def serve_forever(srv: socket.socket, activations: list):
+    while True:
+        try:
+            conn, _ = srv.accept()
+        except OSError:
+            return
+        dec = ipc.FrameDecoder()
+        with conn:
+            while data := conn.recv(65536):
+                activations.extend(m for m in dec.feed(data) if m.get("cmd") == "activate")
+
+
+def time_runs(cmd: list[str], env: dict, repeat: int) -> list[float]:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(cmd, env=env, cwd=ROOT, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        times.append((time.perf_counter() - start) * 1000)
+    return times
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--repeat", type=int, default=20)
+    args = ap.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    env = dict(os.environ, TMPDIR=tmp, QT_QPA_PLATFORM="offscreen")
+    os.environ["TMPDIR"] = tmp
+    srv = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    srv.bind(ipc.server_address())
+    srv.listen(8)
+    activations: list = []
+    threading.Thread(target=serve_forever, args=(srv, activations), daemon=True).start()
+
+    rows = [
+        ("python -c pass (interpreter floor)", [sys.executable, "-c", "pass"]),
+        ("second launch, fast path", [sys.executable, "-m", "promptlauncher"]),
+        ("PyQt6 + keyboard + paramiko + QApplication", [sys.executable, "-c", OLD_PATH]),
+    ]
+    print("| case | median (ms) | min (ms) |")
+    print("|------|------------:|---------:|")
+    for name, cmd in rows:
+        try:
+            times = time_runs(cmd, env, args.repeat)
+        except subprocess.CalledProcessError:
+            print(f"| {name} | n/a | n/a |")
+            continue
+        print(f"| {name} | {statistics.median(times):.1f} | {min(times):.1f} |")
+
+    time.sleep(0.1)
+    print(f"\nactivate requests received: {len(activations)} of {args.repeat}")
+    srv.close()
+
+
+if __name__ == "__main__":
+    main()
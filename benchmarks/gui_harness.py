@@ -0,0 +1,159 @@
+"""Offscreen performance harness for PromptWindow.
+
+Runs the real ``PromptWindow`` on the ``offscreen`` Qt platform against a
+synthetic library and replays an interaction trace.  It reports per-op
+latency percentiles, peak RSS and the number of live QObjects, and exits
+non-zero when a budget is exceeded, so it can run as a regression gate.
+
+Traces come from ``--trace`` (recorded in the app with
+``PROMPTLAUNCHER_TRACE=trace.jsonl``) or are generated with ``--synthetic N``.
+The synthetic trace mixes hotkey toggles, typed searches, tab switches,
+copies, edits and group renames.  ``--save-trace`` writes the generated
+trace so a run can be repeated exactly.
+
+Usage::
+
+    python benchmarks/gui_harness.py --prompts 10000 --synthetic 500 \\
+        --budgets benchmarks/gui_budgets.json
+    python benchmarks/gui_harness.py --data prompt.json --trace slow_session.jsonl
+"""
+import os
+import sys
+import json
+import random
+import argparse
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from bench_memory import make_library  # noqa: E402
+from promptlauncher.trace import (  # noqa: E402
+    TraceEvent, check_budgets, load_trace, replay, save_trace, summarize
+)
+
+
+def synthetic_trace(model, n: int, seed: int = 1) -> list[TraceEvent]:
+    rnd = random.Random(seed)
+    # 生成时模型并不改名：按原分组名取别名和正文，另记每个分组回放时的当前名字
+    origins = list(model.records)
+    aliases_of = {g: list(recs) for g, recs in model.records.items()}
+    current = {g: g for g in origins}
+    events: list[TraceEvent] = []
+    t = 0.0
+
+    def add(op, **args):
+        nonlocal t
+        t += rnd.uniform(0.05, 0.5)
+        events.append(TraceEvent(round(t, 3), op, args))
+
+    renamed = 0
+    while len(events) < n:
+        roll = rnd.random()
+        origin = rnd.choice(origins)
+        group = current[origin]
+        aliases = aliases_of[origin]
+        if roll < 0.1:
+            add("toggle")
+        elif roll < 0.45 and aliases:
+            # 逐字输入一个别名片段再清空，模拟每次按键
+            word = rnd.choice(aliases).split("-")[0]
+            for i in range(1, len(word) + 1):
+                add("search", text=word[:i])
+            add("search", text="")
+        elif roll < 0.65:
+            add("tab", group=group)
+        elif roll < 0.9 and aliases:
+            add("copy", group=group, alias=rnd.choice(aliases))
+        elif roll < 0.98 and aliases:
+            alias = rnd.choice(aliases)
+            add("edit", group=group, old_alias=alias, new_alias=alias,
+                text=model.get_text(origin, alias) + " (edited)")
+        else:
+            renamed += 1
+            new = f"{origin}-r{renamed}"
+            add("rename_group", old=group, new=new)
+            current[origin] = new
+    return events[:n]
+
+
+def peak_rss_mb() -> float | None:
+    try:
+        import resource
+    except ImportError:  # Windows
+        try:
+            import psutil
+        except ImportError:
+            return None
+        return psutil.Process().memory_info().peak_wset / 2**20
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 以 KB 为单位，macOS 以字节为单位
+    return rss / 2**20 if sys.platform == "darwin" else rss / 2**10
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--data", help="existing data file to load instead of a synthetic library")
+    ap.add_argument("--prompts", type=int, default=10_000)
+    ap.add_argument("--groups", type=int, default=20)
+    ap.add_argument("--nav", choices=("tabs", "sidebar"), default="tabs", help="group navigator to measure")
+    src = ap.add_mutually_exclusive_group()
+    src.add_argument("--trace", help="replay this recorded trace")
+    src.add_argument("--synthetic", type=int, default=300, help="number of generated events")
+    ap.add_argument("--save-trace", help="write the replayed trace to this file")
+    ap.add_argument("--realtime", action="store_true", help="keep the recorded pauses")
+    ap.add_argument("--budgets", help="JSON budgets; exit 1 if any is exceeded")
+    ap.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = ap.parse_args()
+
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt6.QtCore import QObject
+    from PyQt6.QtWidgets import QApplication
+    from promptlauncher.gui import PromptWindow
+
+    app = QApplication(sys.argv)
+    tmp = tempfile.mkdtemp()
+    data = os.path.join(tmp, "prompt.json")
+    if args.data:
+        with open(args.data, "rb") as src_f, open(data, "wb") as dst_f:
+            dst_f.write(src_f.read())
+    else:
+        make_library(data, args.prompts, args.groups)
+
+    # 同步加载：回放从数据就绪的窗口开始
+    window = PromptWindow({"group_nav": args.nav}, data, async_load=False)
+    window.show_window()
+    app.processEvents()
+
+    events = load_trace(args.trace) if args.trace else synthetic_trace(window.model, args.synthetic)
+    if args.save_trace:
+        save_trace(args.save_trace, events)
+    samples = replay(window, events, app, realtime=args.realtime)
+
+    report = {
+        "prompts": sum(len(r) for r in window.model.records.values()),
+        "events": len(events),
+        "ops": {op: summarize(vals) for op, vals in sorted(samples.items())},
+        "peak_rss_mb": round(peak_rss_mb() or 0, 1) or None,
+        "qobjects": len(window.findChildren(QObject)) + 1,
+    }
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"{report['prompts']} prompts, {report['events']} events")
+        print("| op | count | p50 (ms) | p95 (ms) | p99 (ms) | max (ms) |")
+        print("|----|------:|---------:|---------:|---------:|---------:|")
+        for op, s in report["ops"].items():
+            print(f"| {op} | {s['count']} | {s['p50']:.2f} | {s['p95']:.2f} | {s['p99']:.2f} | {s['max']:.2f} |")
+        print(f"peak RSS {report['peak_rss_mb']} MB, live QObjects {report['qobjects']}")
+
+    if args.budgets:
+        with open(args.budgets, encoding="utf-8") as f:
+            failures = check_budgets(report, json.load(f))
+        for msg in failures:
+            print(f"BUDGET EXCEEDED: {msg}", file=sys.stderr)
+        sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
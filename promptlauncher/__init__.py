@@ -1,12 +1,17 @@
-from .gui import PromptWindow
-from .tray import create_tray
-from .hotkey import get_custom_hotkey
-from .ssh_backup import SshBackupManager
-from .model import PromptModel
-from .controller import PromptController
-from .main import main
 from .version import __version__
 
+# 按需导入：命令行工具和第二实例的快速唤醒只用到纯 Python 模块，
+# 不应为此加载 PyQt6、keyboard 或 paramiko
+_EXPORTS = {
+    "PromptWindow": ".gui",
+    "create_tray": ".tray",
+    "get_custom_hotkey": ".hotkey",
+    "SshBackupManager": ".ssh_backup",
+    "PromptModel": ".model",
+    "PromptController": ".controller",
+    "main": ".main",
+}
+
 __all__ = [
     "PromptWindow",
     "create_tray",
@@ -17,3 +22,13 @@ __all__ = [
     "main",
     "__version__",
 ]
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from importlib import import_module
+    value = getattr(import_module(module, __name__), name)
+    globals()[name] = value
+    return value
@@ -1,3 +1,22 @@
+import sys
+
+if len(sys.argv) > 1:
+    from promptlauncher import cli
+    if set(sys.argv[1:]) & set(cli.COMMANDS):
+        # 子命令（import/export 等）走命令行工具，不启动界面
+        sys.exit(cli.main())
+
+# 快速路径：已有实例运行时连上它的本地 socket 发送 activate，确认成功后立即退出，
+# 这一步在导入 PyQt6 / keyboard / paramiko 之前完成；守护进程模式不唤醒已有实例
+from promptlauncher.ipc import IpcError, send_activate
+
+try:
+    if "--daemon" not in sys.argv and send_activate():
+        sys.exit(0)
+except IpcError:
+    # 已运行的实例没有窗口（守护进程）：继续启动，由 main 中的单例检查提示用户
+    pass
+
 from promptlauncher.main import main
 
 if __name__ == "__main__":
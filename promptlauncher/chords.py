@@ -0,0 +1,182 @@
+"""Global key chords resolved through a trie.
+
+A binding is a sequence of strokes such as ``"ctrl+alt+g, 3"``.  All
+bindings share one trie, and :class:`ChordDispatcher` walks it one stroke
+at a time, so a single low-level keyboard hook serves any number of
+bindings.  When a sequence is both a binding and the prefix of a longer
+one, the dispatcher waits ``timeout`` seconds for the next stroke before
+firing the shorter binding.  The main hotkey must fire at once, so
+prompt bindings that start with it are refused (see :func:`starts_with`).
+
+The dispatcher runs on the keyboard hook thread: it only does dict
+lookups and hands matched actions to ``fire``, which must not block.
+``fire`` also receives the stamp passed with the chord's first stroke
+(e.g. the key-down time), so latency measurements include any wait for
+the rest of the chord.
+"""
+import time
+import threading
+from typing import Callable, Hashable
+
+# keyboard 库的修饰键名 → 统一名称
+MODIFIERS = {
+    "ctrl": "ctrl", "control": "ctrl", "left ctrl": "ctrl", "right ctrl": "ctrl",
+    "alt": "alt", "left alt": "alt", "right alt": "alt", "alt gr": "alt",
+    "shift": "shift", "left shift": "shift", "right shift": "shift",
+    "win": "win", "windows": "win", "left windows": "win", "right windows": "win",
+    "cmd": "win", "command": "win",
+}
+_MOD_ORDER = ("ctrl", "alt", "shift", "win")
+# 与序列语法冲突的按键用名字表示
+KEY_NAMES = {"+": "plus", ",": "comma"}
+
+DEFAULT_TIMEOUT = 0.8
+# 主热键（打开窗口/快速选择框）的默认值
+DEFAULT_HOTKEY = "ctrl+alt+p"
+
+
+def normalize_stroke(text: str) -> str:
+    """Canonical form of one stroke: modifiers in a fixed order, then the key."""
+    mods, keys = set(), []
+    for part in text.lower().split("+"):
+        part = part.strip()
+        if not part:
+            raise ValueError(f"empty key in stroke {text!r}")
+        if part in MODIFIERS:
+            mods.add(MODIFIERS[part])
+        else:
+            keys.append(part)
+    if len(keys) != 1:
+        raise ValueError(f"stroke {text!r} must contain exactly one non-modifier key")
+    return "+".join([m for m in _MOD_ORDER if m in mods] + keys)
+
+
+def parse_sequence(text: str) -> tuple[str, ...]:
+    """Parse ``"ctrl+alt+g, 3"`` into normalized strokes."""
+    strokes = tuple(normalize_stroke(s) for s in text.split(","))
+    if not strokes:
+        raise ValueError("empty key sequence")
+    return strokes
+
+
+def format_sequence(seq: tuple[str, ...]) -> str:
+    return ", ".join(seq)
+
+
+def starts_with(seq: tuple[str, ...], prefix: tuple[str, ...]) -> bool:
+    """Whether ``seq`` is ``prefix`` or continues it with more strokes."""
+    return seq[:len(prefix)] == prefix
+
+
+class _Node:
+    __slots__ = ("children", "action")
+
+    def __init__(self):
+        self.children: dict[str, _Node] = {}
+        self.action: Hashable | None = None
+
+
+class ChordTrie:
+    """Key sequences mapped to actions."""
+    def __init__(self):
+        self.root = _Node()
+        self._count = 0
+
+    def add(self, seq: tuple[str, ...], action: Hashable):
+        """Bind ``seq``; raises ``ValueError`` if it is already bound to another action."""
+        node = self.root
+        for stroke in seq:
+            node = node.children.setdefault(stroke, _Node())
+        if node.action is not None and node.action != action:
+            raise ValueError(f"{format_sequence(seq)} is already bound")
+        if node.action is None:
+            self._count += 1
+        node.action = action
+
+    def get(self, seq: tuple[str, ...]) -> Hashable | None:
+        node = self.root
+        for stroke in seq:
+            node = node.children.get(stroke)
+            if node is None:
+                return None
+        return node.action
+
+    def __len__(self):
+        return self._count
+
+
+class ChordDispatcher:
+    """Resolve a stream of strokes against a :class:`ChordTrie`.
+
+    ``trie`` may be replaced at any time from another thread; the next
+    stroke starts from the new root.
+    """
+    def __init__(self, trie: ChordTrie, fire: Callable[[Hashable, object], None],
+                 timeout: float = DEFAULT_TIMEOUT, clock: Callable[[], float] = time.monotonic,
+                 timer_factory=threading.Timer):
+        self.trie = trie
+        self.timeout = timeout
+        self._fire = fire
+        self._clock = clock
+        self._timer_factory = timer_factory
+        self._lock = threading.Lock()
+        self._node: _Node | None = None
+        self._last = 0.0
+        self._stamp = None
+        self._timer = None
+
+    @property
+    def pending(self) -> bool:
+        """True while a chord has been started but not completed."""
+        return self._node is not None
+
+    def feed(self, stroke: str, stamp=None):
+        """Advance by one stroke; ``stamp`` is handed to ``fire`` with the chord it starts."""
+        fired = []
+        with self._lock:
+            self._cancel_timer()
+            root = self.trie.root
+            node = self._node
+            if node is not None and self._clock() - self._last > self.timeout:
+                node = None
+            child = (node or root).children.get(stroke)
+            if child is None and node is not None:
+                # 和弦被其他键打断：先执行已匹配的较短绑定，再从根重新匹配这个键
+                if node.action is not None:
+                    fired.append((node.action, self._stamp))
+                node = None
+                child = root.children.get(stroke)
+            if node is None:
+                # 新和弦从这一键开始计时
+                self._stamp = stamp
+            self._node = None
+            if child is not None:
+                if child.children:
+                    self._node = child
+                    self._last = self._clock()
+                    if child.action is not None:
+                        self._timer = self._timer_factory(self.timeout, self._expire, (child, self._stamp))
+                        self._timer.daemon = True
+                        self._timer.start()
+                else:
+                    fired.append((child.action, self._stamp))
+        for action, started in fired:
+            self._fire(action, started)
+
+    def reset(self):
+        with self._lock:
+            self._cancel_timer()
+            self._node = None
+
+    def _expire(self, node: _Node, stamp):
+        with self._lock:
+            if self._node is not node:
+                return
+            self._node = None
+            self._timer = None
+        self._fire(node.action, stamp)
+
+    def _cancel_timer(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
@@ -0,0 +1,151 @@
+"""Command line interface (``promptlauncher-cli``) for the prompt library.
+
+``import``/``export`` work on the data file directly.  The other commands
+talk to the running instance over its local socket, which answers in a few
+milliseconds; none of them imports PyQt.
+
+Examples::
+
+    python -m promptlauncher.cli search review
+    python -m promptlauncher.cli search --semantic "polish the wording of an email"
+    python -m promptlauncher.cli copy default "code review"
+    python -m promptlauncher import pack.jsonl --policy rename
+    python -m promptlauncher export backup.csv --group default
+"""
+import sys
+import json
+import argparse
+import logging
+from .logging_config import setup_logging
+from .paths import DATA_PATH
+
+logger = logging.getLogger(__name__)
+
+FILE_COMMANDS = ("import", "export")
+IPC_COMMANDS = ("ping", "activate", "groups", "search", "get", "copy", "increment", "reload", "metrics")
+COMMANDS = FILE_COMMANDS + IPC_COMMANDS
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    from .packio import FORMATS, POLICIES
+
+    parser = argparse.ArgumentParser(prog="promptlauncher-cli", description="Prompt Launcher command line tools")
+    parser.add_argument("--data", default=DATA_PATH, help="prompt data file (default: %(default)s)")
+    parser.add_argument("--json", action="store_true", help="print raw JSON results of instance commands")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_imp = sub.add_parser("import", help="import a prompt pack into the library")
+    p_imp.add_argument("path", help="pack file (.jsonl/.csv) or Markdown folder")
+    p_imp.add_argument("--format", choices=FORMATS, help="pack format, detected from the path by default")
+    p_imp.add_argument("--policy", choices=POLICIES, default="skip",
+                       help="what to do when an alias already exists (default: %(default)s)")
+
+    p_exp = sub.add_parser("export", help="export the library as a prompt pack")
+    p_exp.add_argument("path", help="target file (.jsonl/.csv) or folder")
+    p_exp.add_argument("--format", choices=FORMATS, help="pack format, detected from the path by default")
+    p_exp.add_argument("--group", action="append", dest="groups", help="only export this group (repeatable)")
+
+    # 以下命令发送给正在运行的实例
+    sub.add_parser("ping", help="check that an instance is running")
+    sub.add_parser("activate", help="show the main window")
+    sub.add_parser("groups", help="list groups")
+    p_search = sub.add_parser("search", help="search prompts by alias, most used first")
+    p_search.add_argument("query", nargs="?", default="")
+    p_search.add_argument("--group")
+    p_search.add_argument("--limit", type=int, default=20)
+    p_search.add_argument("--semantic", action="store_true",
+                          help="rank by what the prompt text says instead of matching the alias")
+    for name, help_text in [("get", "print a prompt's text"),
+                            ("copy", "copy a prompt to the clipboard and count the use"),
+                            ("increment", "count one use of a prompt")]:
+        p = sub.add_parser(name, help=help_text)
+        p.add_argument("group")
+        p.add_argument("alias")
+        if name != "increment":
+            p.add_argument("--set", action="append", dest="values", metavar="NAME=VALUE",
+                           help="fill a template placeholder (repeatable); defaults fill the rest")
+    sub.add_parser("reload", help="reload the data file in the running instance")
+    sub.add_parser("metrics", help="show counters and latency histograms of the running instance")
+    return parser
+
+
+def _ipc_command(args) -> int:
+    from .ipc import IpcClient, IpcError
+
+    params = {k: v for k, v in vars(args).items()
+              if k in ("query", "group", "alias", "limit") and v is not None}
+    if getattr(args, "semantic", False):
+        params["semantic"] = True
+    if getattr(args, "values", None) is not None:
+        params["values"] = dict(v.partition("=")[::2] for v in args.values)
+    try:
+        with IpcClient.connect() as cli:
+            result = cli.request(args.command, **params)
+    except OSError:
+        print("Prompt Launcher is not running", file=sys.stderr)
+        return 3
+    except IpcError as e:
+        print(f"{args.command} failed: {e}", file=sys.stderr)
+        return 1
+
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+    elif args.command == "search":
+        for hit in result:
+            print(f"{hit['group']}\t{hit['alias']}\t{hit.get('count', hit.get('score'))}")
+    elif args.command == "groups":
+        for g in result:
+            print(f"{g['group']}\t{g['prompts']}")
+    elif args.command == "get":
+        sys.stdout.write(result["text"])
+    elif args.command == "metrics":
+        from .metrics import format_report
+        print(format_report(result))
+    elif args.command == "ping":
+        print(f"running, version {result['version']}")
+    elif result is not True:
+        print(result)
+    return 0
+
+
+def _notify_reload():
+    """导入后让正在运行的实例重新加载，避免其稍后保存时覆盖导入结果"""
+    from .ipc import IpcClient, IpcError
+    try:
+        with IpcClient.connect(timeout=0.5) as cli:
+            cli.request("reload")
+    except (OSError, IpcError):
+        pass
+
+
+def main(argv=None) -> int:
+    setup_logging()
+    args = _build_parser().parse_args(argv)
+    if args.command in IPC_COMMANDS:
+        return _ipc_command(args)
+    from .model import PromptModel
+    from . import packio
+
+    model = PromptModel(args.data)
+    try:
+        if args.command == "import":
+            res = packio.import_pack(model, args.path, args.format, args.policy)
+            print(f"added {res.added}, overwritten {res.overwritten}, "
+                  f"renamed {res.renamed}, skipped {res.skipped}")
+            _notify_reload()
+        elif args.command == "export":
+            groups = args.groups
+            missing = [g for g in groups or () if g not in model.prompt_dict]
+            if missing:
+                print(f"unknown group: {', '.join(missing)}", file=sys.stderr)
+                return 2
+            n = packio.export_pack(model, args.path, args.format, groups)
+            print(f"exported {n} prompts")
+    except (OSError, ValueError) as e:
+        logger.error(f"{args.command} failed: {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,13 +1,44 @@
+from contextlib import contextmanager
 from .model import PromptModel
+from .history import History
+from .chords import format_sequence, parse_sequence, starts_with
 
 class PromptController:
-    """High level operations for PromptWindow."""
-    def __init__(self, model: PromptModel):
+    """High level operations for PromptWindow.
+
+    With a :class:`History`, edits made through the controller or directly
+    on the model (imports, batches) can be undone and redone step by step.
+    """
+    def __init__(self, model: PromptModel, history: History | None = None):
         self.model = model
+        self.history = history
+        if history is not None:
+            history.attach(model)
 
     def save(self):
         self.model.save()
 
+    @contextmanager
+    def batch(self):
+        """Run several operations as one transaction with a single save."""
+        with self.model.batch():
+            yield self
+
+    # undo / redo
+    @property
+    def can_undo(self) -> bool:
+        return self.history is not None and self.history.can_undo
+
+    @property
+    def can_redo(self) -> bool:
+        return self.history is not None and self.history.can_redo
+
+    def undo(self) -> bool:
+        return self.history is not None and self.history.undo()
+
+    def redo(self) -> bool:
+        return self.history is not None and self.history.redo()
+
     # group operations
     def add_group(self, name: str):
         self.model.add_group(name)
@@ -28,8 +59,69 @@ class PromptController:
     def delete_prompt(self, group: str, alias: str):
         self.model.delete_prompt(group, alias)
 
+    def move_prompts(self, src: str, dst: str, aliases):
+        with self.model.batch():
+            self.model.add_group(dst)
+            for alias in aliases:
+                self.model.move_prompt(src, dst, alias)
+
     def increment_usage(self, group: str, alias: str):
         self.model.increment_usage(group, alias)
 
+    def reset_usage(self, group: str | None = None):
+        self.model.reset_usage(group)
+
     def get_prompt_text(self, group: str, alias: str) -> str:
-        return self.model.prompt_dict.get(group, {}).get(alias, "")
+        return self.model.get_text(group, alias)
+
+    # templates
+    def set_template(self, group: str, alias: str, on: bool):
+        """Mark a prompt as a template, so its ``{placeholders}`` are filled in on copy."""
+        self.model.set_meta(group, alias, template=True if on else None)
+
+    def is_template(self, group: str, alias: str) -> bool:
+        return self.model.is_template(group, alias)
+
+    def template_fields(self, group: str, alias: str):
+        """Placeholders of a prompt, empty when it is not a template."""
+        return self.model.template(group, alias).fields
+
+    def render_prompt(self, group: str, alias: str, values: dict[str, str] | None = None) -> str:
+        """Prompt text with its placeholders filled from ``values`` or their defaults."""
+        return self.model.template(group, alias).render(values)
+
+    # near duplicates
+    def find_similar(self, text: str, exclude: tuple[str, str] | None = None):
+        """``(group, alias, similarity)`` of prompts nearly identical to ``text``."""
+        return self.model.similar_prompts(text, exclude=exclude)
+
+    def find_duplicates(self):
+        return self.model.duplicate_clusters()
+
+    # per-prompt hotkeys (stored in the prompt's metadata)
+    def set_hotkey(self, group: str, alias: str, seq: str | None, reserved: str | None = None):
+        """Bind ``seq`` (e.g. ``"ctrl+alt+g, 3"``) to a prompt; ``None`` clears it.
+
+        ``reserved`` is the main hotkey: a sequence starting with it would
+        delay every press of the main hotkey and is refused.
+        """
+        if seq is not None:
+            strokes = parse_sequence(seq)
+            seq = format_sequence(strokes)
+            if reserved and starts_with(strokes, parse_sequence(reserved)):
+                raise ValueError(f"{seq} starts with the main hotkey {reserved}")
+            for other, grp, other_alias in self.prompt_hotkeys():
+                if other == seq and (grp, other_alias) != (group, alias):
+                    raise ValueError(f"{seq} is already used by {grp}/{other_alias}")
+        self.model.set_meta(group, alias, hotkey=seq)
+
+    def get_hotkey(self, group: str, alias: str) -> str | None:
+        rec = self.model.get_record(group, alias)
+        return (rec.meta or {}).get("hotkey") if rec is not None else None
+
+    def prompt_hotkeys(self):
+        """Yield ``(sequence, group, alias)`` for every prompt with a hotkey."""
+        for grp, recs in self.model.records.items():
+            for alias, rec in recs.items():
+                if rec.meta and rec.meta.get("hotkey"):
+                    yield rec.meta["hotkey"], grp, alias
@@ -3,3 +3,6 @@ from .ssh_config_dialog import SshConfigDialog
 from .new_prompt_dialog import NewPromptDialog
 from .edit_prompt_dialog import EditPromptDialog
 from .custom_hotkey_dialog import CustomHotkeyDialog
+from .diagnostics_dialog import DiagnosticsDialog
+from .duplicates_dialog import DuplicatesDialog
+from .template_fill_dialog import TemplateFillDialog
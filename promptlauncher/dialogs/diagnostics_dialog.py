@@ -0,0 +1,43 @@
+from PyQt6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QPlainTextEdit, QPushButton, QCheckBox
+)
+from PyQt6.QtGui import QFontDatabase
+from .. import metrics
+
+
+class DiagnosticsDialog(QDialog):
+    """显示计数器与延迟直方图，可开关统计并清零"""
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("诊断信息")
+        self.resize(640, 420)
+
+        layout = QVBoxLayout(self)
+        self.text = QPlainTextEdit()
+        self.text.setReadOnly(True)
+        self.text.setFont(QFontDatabase.systemFont(QFontDatabase.SystemFont.FixedFont))
+        layout.addWidget(self.text)
+
+        row = QHBoxLayout()
+        self.chk_enabled = QCheckBox("启用统计")
+        self.chk_enabled.setChecked(metrics.enabled())
+        self.chk_enabled.toggled.connect(self._toggle)
+        row.addWidget(self.chk_enabled)
+        row.addStretch()
+        for label, slot in [("清零", self._reset), ("刷新", self.refresh), ("关闭", self.accept)]:
+            btn = QPushButton(label)
+            btn.clicked.connect(slot)
+            row.addWidget(btn)
+        layout.addLayout(row)
+        self.refresh()
+
+    def refresh(self):
+        self.text.setPlainText(metrics.format_report(metrics.snapshot()))
+
+    def _toggle(self, on: bool):
+        metrics.enable(on)
+        self.refresh()
+
+    def _reset(self):
+        metrics.reset()
+        self.refresh()
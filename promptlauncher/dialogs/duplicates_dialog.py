@@ -0,0 +1,64 @@
+from PyQt6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QTreeWidget, QTreeWidgetItem, QPushButton, QLabel, QMessageBox
+)
+from PyQt6.QtCore import Qt
+
+
+def confirm_similar(parent, hits: list[tuple[str, str, float]]) -> bool:
+    """新建/编辑时发现高度相似的 Prompt：列出并询问是否仍然保存"""
+    lines = "\n".join(f"  {grp} / {alias}（相似度 {score:.0%}）" for grp, alias, score in hits)
+    resp = QMessageBox.question(
+        parent, "发现相似 Prompt",
+        f"内容与以下已有 Prompt 高度相似：\n{lines}\n\n仍要保存吗？",
+        QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+    )
+    return resp == QMessageBox.StandardButton.Yes
+
+
+class DuplicatesDialog(QDialog):
+    """列出全部分组中内容几乎相同的 Prompt，双击定位到对应条目"""
+    def __init__(self, window):
+        super().__init__(window)
+        self.window = window
+        self.setFont(window.font())
+        self.setWindowTitle("查找重复 Prompt")
+        self.resize(640, 480)
+
+        layout = QVBoxLayout(self)
+        self.summary = QLabel()
+        layout.addWidget(self.summary)
+        self.tree = QTreeWidget()
+        self.tree.setHeaderLabels(["分组 / 别名", "内容"])
+        self.tree.setColumnWidth(0, 220)
+        self.tree.itemDoubleClicked.connect(self._reveal)
+        layout.addWidget(self.tree)
+
+        row = QHBoxLayout()
+        row.addStretch()
+        for label, slot in [("刷新", self.refresh), ("关闭", self.accept)]:
+            btn = QPushButton(label)
+            btn.clicked.connect(slot)
+            row.addWidget(btn)
+        layout.addLayout(row)
+        self.refresh()
+
+    def refresh(self):
+        controller = self.window.controller
+        clusters = controller.find_duplicates()
+        self.tree.clear()
+        for members in clusters:
+            top = QTreeWidgetItem([f"{len(members)} 条相似"])
+            for grp, alias in members:
+                preview = controller.get_prompt_text(grp, alias).replace("\n", " ")[:80]
+                child = QTreeWidgetItem([f"{grp} / {alias}", preview])
+                child.setData(0, Qt.ItemDataRole.UserRole, (grp, alias))
+                top.addChild(child)
+            self.tree.addTopLevelItem(top)
+        self.tree.expandAll()
+        dup = sum(len(m) - 1 for m in clusters)
+        self.summary.setText(f"共 {len(clusters)} 组，{dup} 条可能重复" if clusters else "没有发现重复的 Prompt")
+
+    def _reveal(self, item: QTreeWidgetItem, _column: int):
+        key = item.data(0, Qt.ItemDataRole.UserRole)
+        if key:
+            self.window.reveal_prompt(*key)
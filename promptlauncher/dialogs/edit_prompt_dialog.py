@@ -1,8 +1,18 @@
+from typing import Callable
 from PyQt6.QtWidgets import QDialog, QVBoxLayout, QLabel, QLineEdit, QTextEdit, QDialogButtonBox, QPushButton, QHBoxLayout
+from ..widgets.large_text_edit import LargeTextEdit
+from .duplicates_dialog import confirm_similar
+
+# 超过该字符数的正文用纯文本大文档编辑器分块载入
+LARGE_PROMPT_CHARS = 50_000
 
 class EditPromptDialog(QDialog):
-    def __init__(self, parent=None, alias: str = "", text: str = ""):
+    def __init__(self, parent=None, alias: str = "", text: str = "",
+                 find_similar: Callable[[str], list] | None = None):
         super().__init__(parent)
+        self._orig_text = text.strip()
+        self.large = len(text) >= LARGE_PROMPT_CHARS
+        self._find_similar = find_similar
         self.setFont(parent.font())
         self.setWindowTitle("编辑 Prompt")
         self.result_action = None
@@ -14,9 +24,16 @@ class EditPromptDialog(QDialog):
         layout.addWidget(self.inp_alias)
 
         layout.addWidget(QLabel("内容:"))
-        self.editor = QTextEdit()
-        self.editor.setFont(parent.font())
-        self.editor.setPlainText(text)
+        if self.large:
+            self.editor = LargeTextEdit()
+            self.editor.setFont(parent.font())
+            self.editor.load_text(text)
+        else:
+            self.editor = QTextEdit()
+            self.editor.setAcceptRichText(False)
+            self.editor.setFont(parent.font())
+            self.editor.setPlainText(text)
+            self.editor.document().setModified(False)
         layout.addWidget(self.editor)
 
         btn_box = QDialogButtonBox(QDialogButtonBox.StandardButton.Ok)
@@ -41,7 +58,26 @@ class EditPromptDialog(QDialog):
 
         btn_box.accepted.connect(self._on_save)
 
+    @property
+    def text_modified(self) -> bool:
+        """正文是否被改动过；未改动时保存不必重写正文"""
+        if self.large:
+            return self.editor.is_modified()
+        return self.editor.document().isModified()
+
+    def _text(self) -> str:
+        if not self.text_modified:
+            return self._orig_text
+        text = self.editor.text() if self.large else self.editor.toPlainText()
+        return text.strip()
+
     def _on_save(self):
+        text = self._text()
+        # 只有内容改动时才检查相似
+        if self._find_similar and text and text != self._orig_text:
+            hits = self._find_similar(text)
+            if hits and not confirm_similar(self, hits):
+                return
         self.result_action = "save"
         self.accept()
 
@@ -51,5 +87,4 @@ class EditPromptDialog(QDialog):
 
     def get_result(self):
         alias = self.inp_alias.text().strip()
-        text = self.editor.toPlainText().strip()
-        return self.result_action, alias, text
+        return self.result_action, alias, self._text()
@@ -1,8 +1,12 @@
+from typing import Callable
 from PyQt6.QtWidgets import QDialog, QVBoxLayout, QLabel, QLineEdit, QTextEdit, QDialogButtonBox
+from .duplicates_dialog import confirm_similar
 
 class NewPromptDialog(QDialog):
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, find_similar: Callable[[str], list] | None = None):
         super().__init__(parent)
+        # 保存前查找内容相近的已有 Prompt
+        self._find_similar = find_similar
         self.setFont(parent.font() if parent else None)
         self.setWindowTitle("新建 Prompt")
 
@@ -20,9 +24,17 @@ class NewPromptDialog(QDialog):
         )
         self.layout.addWidget(self.btn_box)
 
-        self.btn_box.accepted.connect(self.accept)
+        self.btn_box.accepted.connect(self._on_accept)
         self.btn_box.rejected.connect(self.reject)
 
+    def _on_accept(self):
+        content = self.editor.toPlainText().strip()
+        if self._find_similar and content:
+            hits = self._find_similar(content)
+            if hits and not confirm_similar(self, hits):
+                return
+        self.accept()
+
     def get_prompt_data(self):
         alias = self.inp_alias.text().strip()
         content = self.editor.toPlainText().strip()
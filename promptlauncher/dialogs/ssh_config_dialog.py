@@ -17,6 +17,7 @@ class SshConfigDialog(QDialog):
             ("远程路径:", "remote_path", ""),
             ("私钥路径:", "key_path", ""),
             ("备份间隔(秒):", "interval", "3600"),
+            ("审计间隔(秒，0 为关闭):", "audit_interval", "0"),
         ]:
             val = ssh_cfg.get(key, default)
             layout.addWidget(QLabel(label_text))
@@ -0,0 +1,54 @@
+from PyQt6.QtWidgets import (
+    QDialog, QVBoxLayout, QFormLayout, QComboBox, QLabel, QPlainTextEdit, QDialogButtonBox
+)
+from ..templates import Template
+
+
+class TemplateFillDialog(QDialog):
+    """复制模板前填写变量：下拉框给出最近用过的值，下方实时预览结果"""
+    def __init__(self, parent, alias: str, template: Template, recent: dict[str, list[str]]):
+        super().__init__(parent)
+        self.setFont(parent.font() if parent else None)
+        self.setWindowTitle(f"填写模板 - {alias}")
+        self.resize(520, 420)
+        self.template = template
+
+        layout = QVBoxLayout(self)
+        form = QFormLayout()
+        self.inputs: dict[str, QComboBox] = {}
+        for field in template.fields:
+            box = QComboBox()
+            box.setEditable(True)
+            box.addItems(recent.get(field.name, []))
+            if field.default is not None:
+                box.lineEdit().setPlaceholderText(field.default)
+            if box.count() == 0:
+                box.setEditText("")
+            box.editTextChanged.connect(self._update_preview)
+            form.addRow(f"{field.name}:", box)
+            self.inputs[field.name] = box
+        layout.addLayout(form)
+
+        layout.addWidget(QLabel("预览:"))
+        self.preview = QPlainTextEdit()
+        self.preview.setReadOnly(True)
+        layout.addWidget(self.preview)
+
+        btns = QDialogButtonBox(
+            QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel
+        )
+        btns.button(QDialogButtonBox.StandardButton.Ok).setText("复制")
+        btns.accepted.connect(self.accept)
+        btns.rejected.connect(self.reject)
+        layout.addWidget(btns)
+
+        self._update_preview()
+        if self.inputs:
+            next(iter(self.inputs.values())).setFocus()
+
+    def values(self) -> dict[str, str]:
+        return {name: box.currentText().strip() for name, box in self.inputs.items()}
+
+    def _update_preview(self, *_):
+        # 模板已编译，渲染只是拼接字符串，每次按键都可以刷新
+        self.preview.setPlainText(self.template.render(self.values()))
@@ -1,32 +1,170 @@
-import os, sys
-from PyQt6.QtCore import Qt, QEvent, QTimer
-from PyQt6.QtGui import QIcon, QFont
+import os, sys, time, logging, threading, functools
+from contextlib import contextmanager
+from PyQt6.QtCore import Qt, QObject, QEvent, QTimer, pyqtSignal
+from PyQt6.QtGui import QIcon, QFont, QKeySequence, QShortcut
 from PyQt6.QtWidgets import (
     QWidget, QApplication,
     QVBoxLayout, QLineEdit,
-    QTabWidget, QListWidget, QListWidgetItem,
+    QListView,
     QSizePolicy, QPushButton, QHBoxLayout, QLabel,
-    QDialog, QTextEdit, QDialogButtonBox, QInputDialog, QMessageBox, QMenu
+    QDialog, QTextEdit, QDialogButtonBox, QInputDialog, QMessageBox, QMenu,
+    QFileDialog, QSplitter
 )
-from .dialogs import SshConfigDialog
+from .dialogs import SshConfigDialog, DuplicatesDialog, TemplateFillDialog
 from .dialogs.new_prompt_dialog import NewPromptDialog
 from .dialogs.edit_prompt_dialog import EditPromptDialog
-from .widgets import PromptItemWidget
+from .widgets import PromptItemDelegate, PromptListView, TabNavigator, SidebarNavigator, PreviewPane
+from .widgets.prompt_list import format_count
+from .preview import PreviewCache, DEFAULT_MAX_CHARS as PREVIEW_CACHE_CHARS
 from .model import PromptModel
 from .controller import PromptController
+from .chords import DEFAULT_HOTKEY
+from .history import History, DEFAULT_MAX_BYTES
+from .mirror import MarkdownMirror
+from .stats import StatsIndex, DEFAULT_TOKENIZER
+from . import packio, metrics, templates
+
+logger = logging.getLogger(__name__)
+
+# 导入导出对话框中的格式选项
+PACK_FORMATS = {
+    "JSON Lines (*.jsonl)": "jsonl",
+    "CSV (*.csv)": "csv",
+    "Markdown 文件夹": "md",
+}
+IMPORT_POLICIES = {
+    "跳过已存在的别名": "skip",
+    "覆盖已存在的别名": "overwrite",
+    "重命名后导入": "rename",
+}
+
+
+class ModelLoader(QObject):
+    """在后台线程逐组解析数据文件，每解析完一组就通过信号交给界面线程。
+
+    工作线程只读文件、构造记录，不碰 model.records 和界面；
+    分组由界面线程插入，所以插入期间界面可以正常响应。
+    """
+    group_loaded = pyqtSignal(str, object)
+    finished = pyqtSignal(object)
+
+    def __init__(self, model: PromptModel, parent=None):
+        super().__init__(parent)
+        self.model = model
+
+    def start(self):
+        threading.Thread(target=self._work, daemon=True, name="model-load").start()
+
+    def _work(self):
+        t0 = time.perf_counter()
+        try:
+            for name, recs in self.model.read_groups():
+                self.group_loaded.emit(name, recs)
+        except Exception as e:
+            self.finished.emit(e)
+            return
+        metrics.observe("model.load_ms", (time.perf_counter() - t0) * 1000)
+        self.finished.emit(None)
+
+
+def _after_load(method):
+    """数据加载完成前调用的操作先排队，加载完成后按顺序执行"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self._loaded:
+            return method(self, *args, **kwargs)
+        self._pending.append(lambda: method(self, *args, **kwargs))
+    return wrapper
+
 
 class PromptWindow(QWidget):
-    def __init__(self, cfg: dict, data_path: str = "prompt.json"):
+    # Prompt 快捷键变化时发出，HotkeyManager 据此重建绑定
+    hotkeys_changed = pyqtSignal()
+    # 数据全部加载完成时发出
+    loaded = pyqtSignal()
+    # 后台下载备份完成：(临时文件路径, 异常)
+    _backup_fetched = pyqtSignal(object, object)
+    # 语义搜索时每个分组最多显示的条目数
+    SEMANTIC_LIMIT = 50
+    # 语义搜索在输入停顿多久后查询（毫秒）
+    SEMANTIC_DELAY_MS = 150
+    # 每次空闲处理的统计条目数
+    STATS_BATCH = 300
+    # 使用计数停顿多久后写盘（毫秒）
+    USAGE_SAVE_MS = 1000
+
+    def __init__(self, cfg: dict, data_path: str = "prompt.json", async_load: bool = True):
         super().__init__()
         self._cfg = cfg
         self._init_paths(data_path)
-        self.model = PromptModel(self._data_path)
-        self.controller = PromptController(self.model)
+        # 异步加载时先显示空窗口，分组解析一个插入一个
+        self.model = PromptModel(self._data_path, cfg.get("data_format"), load=not async_load)
+        self._loaded = not async_load
+        self._pending: list = []
+        # 撤销记录保存在数据文件旁，重启后仍可撤销
+        undo_mb = cfg.get("undo", {}).get("max_mb", DEFAULT_MAX_BYTES / 2**20)
+        self.controller = PromptController(
+            self.model, History(self.model.path + ".undo", int(undo_mb * 2**20))
+        )
+        # Markdown 镜像：每个 Prompt 一个文件，方便用 git/编辑器管理
+        self.mirror = None
+        mirror_path = cfg.get("mirror", {}).get("path")
+        if mirror_path:
+            self.mirror = MarkdownMirror(mirror_path, self.model.path + ".mirror.json")
+            self.mirror.attach(self.model)
+        # 每条 Prompt 的字数/token 统计：空闲时分批计算，按正文哈希缓存到数据文件旁
+        self.stats = StatsIndex(
+            self.model.path + ".stats", cfg.get("stats", {}).get("tokenizer", DEFAULT_TOKENIZER)
+        )
+        self.stats.attach(self.model)
         # Alias for convenience in existing code
         self.prompt_dict = self.model.prompt_dict
         self.usage_counts = self.model.usage_counts
+        # 热键触发时刻（perf_counter_ns），首帧绘制后记录延迟
+        self._shown_at: int | None = None
+        # 交互轨迹记录器（trace.TraceRecorder），用于离线复现性能问题
+        self.tracer = None
+        # SSH 备份管理（ssh_backup.SshBackupManager），由 main 在配置了主机时设置
+        self.backup = None
         self._setup_ui()
         self._connect_signals()
+        # 空闲时分批建立相似度索引，新建/编辑时的重复检查无需等待
+        self._similar_timer = QTimer(self)
+        self._similar_timer.timeout.connect(
+            lambda: self.model.build_similarity_step() and self._similar_timer.stop()
+        )
+        # 语义索引：打开语义搜索后在空闲时分批加载/建立；查询在输入停顿后进行
+        self._semantic_timer = QTimer(self)
+        self._semantic_timer.timeout.connect(self._semantic_step)
+        self._semantic_query = QTimer(self)
+        self._semantic_query.setSingleShot(True)
+        self._semantic_query.setInterval(self.SEMANTIC_DELAY_MS)
+        self._semantic_query.timeout.connect(self._filter_semantic)
+        # 统计：有待处理条目时连续分批，空闲时每秒检查一次
+        self._stats_timer = QTimer(self)
+        self._stats_timer.timeout.connect(self._stats_step)
+        self._stats_timer.start(0)
+        # 复制计数延后合并写盘：整份数据重写要几十毫秒，不放在复制路径上
+        self._usage_timer = QTimer(self)
+        self._usage_timer.setSingleShot(True)
+        self._usage_timer.setInterval(self.USAGE_SAVE_MS)
+        self._usage_timer.timeout.connect(self.model.flush)
+        if async_load:
+            self._start_loading()
+        else:
+            self._start_mirror()
+            self._similar_timer.start(0)
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._loaded
+
+    def when_loaded(self, fn):
+        """数据就绪后调用 fn；已就绪则立即调用"""
+        if self._loaded:
+            fn()
+        else:
+            self._pending.append(fn)
 
     # region ——— 数据初始化与加载
     def _init_paths(self, data_path: str):
@@ -43,6 +181,85 @@ class PromptWindow(QWidget):
         else:
             self._data_path = data_path
 
+    def _start_loading(self):
+        if not self.model.begin_load():
+            # 数据文件刚创建，没有需要读取的内容
+            self._on_loaded(None)
+            return
+        self.setWindowTitle("Prompt Launcher - 加载中…")
+        self._loader = ModelLoader(self.model, self)
+        self._loader.group_loaded.connect(self._on_group_loaded)
+        self._loader.finished.connect(self._on_loaded)
+        self._loader.start()
+
+    def _on_group_loaded(self, name: str, recs: dict):
+        self.model.records[name] = recs
+        self.nav.add_group(name)
+        text = self.search.text()
+        if text and self.nav.group_count() == 1:
+            self.filter_current_tab(text)
+
+    def _on_loaded(self, error: Exception | None):
+        self._loader = None
+        if error is not None:
+            # 不完成加载：模型保持只读，避免用残缺数据覆盖文件
+            logger.error(f"failed to load {self._data_path}: {error}")
+            QMessageBox.critical(self, "Prompt Launcher", f"无法读取数据文件:\n{self._data_path}\n\n{error}")
+            QApplication.quit()
+            return
+        self.model.finish_load()
+        self._loaded = True
+        self.setWindowTitle("Prompt Launcher")
+        pending, self._pending = self._pending, []
+        for fn in pending:
+            fn()
+        self._start_mirror()
+        if self.search.text():
+            self.filter_current_tab(self.search.text())
+        self._similar_timer.start(0)
+        self.hotkeys_changed.emit()
+        self.loaded.emit()
+
+    def _start_mirror(self):
+        if self.mirror is None:
+            return
+        try:
+            if any(self.mirror.start()):
+                self.reload_tabs()
+        except OSError:
+            logger.error(f"could not sync mirror {self.mirror.root}", exc_info=True)
+
+    def _stats_step(self):
+        if not self.stats.pending or self.model.loading:
+            self._stats_timer.setInterval(1000)
+            return
+        done = self.stats.step(self.STATS_BATCH)
+        self._stats_timer.setInterval(1000 if done else 0)
+        for view in self.nav.views():
+            view.viewport().update()
+        self._update_stats_label()
+
+    def _update_stats_label(self):
+        total = self.stats.totals()
+        prompts = sum(len(recs) for recs in self.model.records.values())
+        text = f"{prompts} 条 · {format_count(total.tokens)} tokens"
+        if self.stats.pending:
+            text += " …"
+        self.stats_label.setText(text)
+        self.stats_label.setToolTip(
+            f"字符: {total.chars}\n词: {total.words}\n估计 token: {total.tokens}（{self.stats.tokenizer}）"
+        )
+
+    def scan_mirror(self):
+        """导入在镜像文件夹中直接修改的文件（窗口激活时调用）"""
+        if self.mirror is None or not self._loaded:
+            return
+        try:
+            if any(self.mirror.scan()):
+                self.reload_tabs()
+        except OSError:
+            logger.error(f"could not scan mirror {self.mirror.root}", exc_info=True)
+
     # endregion
 
     # region ——— UI 构建
@@ -82,18 +299,56 @@ class PromptWindow(QWidget):
         self.search.setFont(default_font)
         self.search.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Fixed)
         self.search.setContentsMargins(0, 0, 0, 5)
-        layout.addWidget(self.search)
-
-        # 标签页
-        self.tabs = QTabWidget()
-        self.tabs.setFont(default_font)
-        self.tabs.setContentsMargins(0, 0, 0, 0)
-
-        self.tab_lists: dict[str, QListWidget] = {}
+        # 语义搜索开关：按 Prompt 内容的含义匹配，而不是别名
+        self.btn_semantic = QPushButton("≈")
+        self.btn_semantic.setCheckable(True)
+        self.btn_semantic.setFixedSize(30, 30)
+        self.btn_semantic.setToolTip("语义搜索：按内容描述查找 Prompt")
+        search_row = QHBoxLayout()
+        search_row.setSpacing(5)
+        search_row.addWidget(self.search)
+        search_row.addWidget(self.btn_semantic)
+        # 预览窗格开关
+        preview_cfg = self._cfg.get("preview", {})
+        self.btn_preview = QPushButton("▤")
+        self.btn_preview.setCheckable(True)
+        self.btn_preview.setChecked(bool(preview_cfg.get("enabled")))
+        self.btn_preview.setFixedSize(30, 30)
+        self.btn_preview.setToolTip("预览窗格")
+        search_row.addWidget(self.btn_preview)
+        layout.addLayout(search_row)
+
+        # 预览更新：方向键快速移动时合并多次更新
+        self._preview_timer = QTimer(self)
+        self._preview_timer.setSingleShot(True)
+        self._preview_timer.setInterval(15)
+        self._preview_timer.timeout.connect(self._update_preview)
+
+        # 分组导航：默认每组一个标签页；分组很多时可在配置中改为侧栏（"group_nav": "sidebar"），
+        # 侧栏只有一个共享的 Prompt 列表
+        self._item_delegate = PromptItemDelegate(self)
+        self._item_delegate.stats = self.stats
+        if self._cfg.get("group_nav") == "sidebar":
+            self.nav = SidebarNavigator(self.model.records, self._make_list_view, self.search.text)
+        else:
+            self.nav = TabNavigator(self.model.records, self._make_list_view)
+        self.nav.setFont(default_font)
+        self.nav.setContentsMargins(0, 0, 0, 0)
         for name in list(self.prompt_dict.keys()):
-            self._add_group_tab(name)
+            self.nav.add_group(name)
 
-        layout.addWidget(self.tabs)
+        # 右侧预览：渲染结果按正文哈希缓存，上限按 HTML 字符数
+        cache_chars = int(preview_cfg.get("cache_mb", PREVIEW_CACHE_CHARS / 2**20) * 2**20)
+        self.preview = PreviewPane(PreviewCache(cache_chars))
+        self.preview.setFont(default_font)
+        self.preview.setVisible(self.btn_preview.isChecked())
+        body = QSplitter(Qt.Orientation.Horizontal)
+        body.addWidget(self.nav)
+        body.addWidget(self.preview)
+        body.setStretchFactor(0, 1)
+        body.setStretchFactor(1, 1)
+
+        layout.addWidget(body)
 
         # 底部按钮：新建、删除分组、上一页、下一页
         btn_new = QPushButton("＋")
@@ -125,6 +380,10 @@ class PromptWindow(QWidget):
         self.sync_label.setCursor(Qt.CursorShape.PointingHandCursor)
         self.sync_label.mousePressEvent = lambda ev: self.configure_ssh_backup()
         bottom_layout.insertWidget(0, self.sync_label)
+        # 全库统计：条目数与 token 总数，悬停显示字符/词数
+        self.stats_label = QLabel("")
+        self.stats_label.setFont(self.font())
+        bottom_layout.insertWidget(1, self.stats_label)
 
         layout.addWidget(bottom_widget)
     # endregion
@@ -132,42 +391,110 @@ class PromptWindow(QWidget):
     # region ——— 信号绑定
     def _connect_signals(self):
         self.search.textChanged.connect(self.filter_current_tab)
-
-        # 安装事件过滤，实现 Ctrl+C 复制
-        for lst in self.tab_lists.values():
-            lst.installEventFilter(self)
-
-        # 支持双击标签页重命名
-        tab_bar = self.tabs.tabBar()
-        tab_bar.installEventFilter(self)
+        self.btn_semantic.toggled.connect(self._on_semantic_toggled)
+        self.search.textChanged.connect(lambda text: self._trace("search", text=text))
+        self.nav.current_changed.connect(self._on_group_changed)
+        self.nav.current_changed.connect(lambda _: self._preview_timer.start())
+        self.search.textChanged.connect(lambda _: self._preview_timer.start())
+        self.btn_preview.toggled.connect(self._toggle_preview)
+        self._backup_fetched.connect(self._on_backup_fetched)
+        # 双击标签页或侧栏中的分组名重命名
+        self.nav.rename_requested.connect(self.rename_group)
+        # 撤销/重做；搜索框有焦点时由搜索框自己处理
+        QShortcut(QKeySequence.StandardKey.Undo, self, self.undo)
+        QShortcut(QKeySequence.StandardKey.Redo, self, self.redo)
     # endregion
 
-    def _add_group_tab(self, group_name: str):
-        alias_map = self.prompt_dict.get(group_name, {})
-        lst = QListWidget()
+    def _on_group_changed(self, group: str):
+        self._trace("tab", group=group)
+        if not self.nav.shared_view:
+            return
+        # 共享视图：换上该分组自己的搜索词（首次进入为空）并重新过滤
+        state = self.nav.state_of(group)
+        keyword = state.keyword if state else ""
+        if keyword != self.search.text():
+            self.search.blockSignals(True)
+            self.search.setText(keyword)
+            self.search.blockSignals(False)
+        if keyword:
+            self.filter_current_tab(keyword)
+
+    def _make_list_view(self) -> QListView:
+        lst = PromptListView()
         lst.setFont(self.font())
         lst.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
         lst.setUniformItemSizes(True)
+        lst.setEditTriggers(QListView.EditTrigger.NoEditTriggers)
+        lst.setItemDelegate(self._item_delegate)
         # 双击进入编辑
-        lst.itemDoubleClicked.connect(self.edit_prompt)
+        lst.doubleClicked.connect(self.edit_prompt)
         # 右键菜单：新建 Prompt
         lst.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
         lst.customContextMenuRequested.connect(
-            lambda pos, grp=group_name, lw=lst: self._show_prompt_context_menu(grp, lw, pos)
+            lambda pos, lw=lst: self._show_prompt_context_menu(lw, pos)
         )
-        for alias, text in alias_map.items():
-            cnt = self.usage_counts.get(group_name, {}).get(alias, 0)
-            self._add_prompt_item(lst, alias, text, cnt)
-        self.tab_lists[group_name] = lst
-        self.tabs.addTab(lst, group_name)
-
-    def _add_prompt_item(self, lst: QListWidget, alias: str, prompt_text: str, count: int):
-        item = QListWidgetItem()
-        widget = PromptItemWidget(alias, count, self.font())
-        item.setSizeHint(widget.sizeHint())
-        lst.addItem(item)
-        lst.setItemWidget(item, widget)
-
+        # 安装事件过滤，实现 Ctrl+C 复制
+        lst.installEventFilter(self)
+        lst.current_changed.connect(lambda _: self._preview_timer.start())
+        return lst
+
+    def _toggle_preview(self, on: bool):
+        self._cfg.setdefault("preview", {})["enabled"] = on
+        self.preview.setVisible(on)
+        if on:
+            self._update_preview()
+
+    def _update_preview(self):
+        if not self.preview.isVisible():
+            return
+        group = self._current_group()
+        lst = self.nav.view_of(group)
+        alias = self._current_alias(lst) if lst is not None else None
+        terms = self.search.text().split()
+        if alias is None:
+            self.preview.show_text(None)
+            return
+        self.preview.show_text(self.model.get_text(group, alias), terms)
+        # 预先渲染上下相邻的可见条目
+        list_model = lst.model()
+        row = lst.currentIndex().row()
+        nearby = []
+        for step in (1, -1):
+            r = row + step
+            while 0 <= r < list_model.rowCount() and lst.isRowHidden(r):
+                r += step
+            neighbor = list_model.alias_at(r)
+            if neighbor is not None:
+                nearby.append(self.model.get_text(group, neighbor))
+        self.preview.prefetch(nearby)
+
+    def _current_group(self) -> str | None:
+        return self.nav.current_group()
+
+    def _current_alias(self, lst: QListView) -> str | None:
+        idx = lst.currentIndex()
+        return lst.model().alias_at(idx.row()) if idx.isValid() else None
+
+    @contextmanager
+    def batch(self):
+        """批量修改数据：期间只改内存，结束时保存一次并统一刷新一次界面"""
+        try:
+            with self.controller.batch() as ctrl:
+                yield ctrl
+        finally:
+            # 无论提交还是回滚，界面都与模型重新对齐
+            self.reload_tabs()
+
+    @_after_load
+    def reload_tabs(self):
+        """按模型数据重建分组导航，尽量保留当前分组"""
+        self.nav.reset()
+        if self.search.text():
+            self.filter_current_tab(self.search.text())
+        self.hotkeys_changed.emit()
+        self._preview_timer.start()
+
+    @_after_load
     def add_group(self):
         # 循环弹窗，直到有效输入或取消
         while True:
@@ -184,14 +511,14 @@ class PromptWindow(QWidget):
             break
         # 无重名，执行创建
         self.controller.add_group(name)
-        self._add_group_tab(name)
-        self.tabs.setCurrentIndex(self.tabs.count() - 1)
+        self.nav.add_group(name)
+        self.nav.set_current_group(name)
 
+    @_after_load
     def delete_group(self):
-        idx = self.tabs.currentIndex()
-        if idx < 0:
+        name = self._current_group()
+        if name is None:
             return
-        name = self.tabs.tabText(idx)
 
         resp = QMessageBox.question(
             self, "删除分组",
@@ -200,13 +527,11 @@ class PromptWindow(QWidget):
         )
         if resp == QMessageBox.StandardButton.Yes:
             self.controller.delete_group(name)
-            self.tabs.removeTab(idx)
-            self.tab_lists.pop(name, None)
+            self.nav.remove_group(name)
+            self.hotkeys_changed.emit()
 
-    def rename_group(self, index: int):
-        if index < 0:
-            return
-        old_name = self.tabs.tabText(index)
+    @_after_load
+    def rename_group(self, old_name: str):
         # 循环弹窗，直到有效输入或取消
         while True:
             new_name, ok = QInputDialog.getText(self, "重命名分组", "新名称:", text=old_name)
@@ -223,19 +548,20 @@ class PromptWindow(QWidget):
                 continue
             break
         # 无重名，执行重命名
+        self.apply_group_rename(old_name, new_name)
+
+    def apply_group_rename(self, old_name: str, new_name: str):
+        """重命名分组并同步标签页（对话框与轨迹回放共用）"""
+        self._trace("rename_group", old=old_name, new=new_name)
         self.controller.rename_group(old_name, new_name)
-        self.tabs.setTabText(index, new_name)
-        self.tab_lists[new_name] = self.tab_lists.pop(old_name)
+        self.nav.rename_group(old_name, new_name)
+        self.hotkeys_changed.emit()
 
     def prev_tab(self):
-        idx = self.tabs.currentIndex()
-        if idx > 0:
-            self.tabs.setCurrentIndex(idx - 1)
+        self.nav.step(-1)
 
     def next_tab(self):
-        idx = self.tabs.currentIndex()
-        if idx < self.tabs.count() - 1:
-            self.tabs.setCurrentIndex(idx + 1)
+        self.nav.step(1)
 
     def show_window(self):
         # 恢复窗口并激活到前台
@@ -247,34 +573,57 @@ class PromptWindow(QWidget):
         self.activateWindow()
         self.setFocus()
 
-    def toggle_window(self):
+    def toggle_window(self, triggered_at: int | None = None):
         """Ctrl+Alt+P 调用，隐藏或显示主窗口"""
+        self._trace("toggle")
         if self.isVisible():
             self.hide()
         else:
+            self._shown_at = triggered_at
             self.show_window()
 
-    def edit_prompt(self, item: QListWidgetItem):
-        group = self.tabs.tabText(self.tabs.currentIndex())
-        widget = self.tab_lists[group].itemWidget(item)
-        alias_label = widget.findChild(QLabel)
-        old_alias = alias_label.text()
-        old_text = self.prompt_dict.get(group, {}).get(old_alias, "")
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if self._shown_at is not None:
+            metrics.observe("hotkey.window_ms", (time.perf_counter_ns() - self._shown_at) / 1e6)
+            self._shown_at = None
+
+    @_after_load
+    def edit_prompt(self, index):
+        group = self._current_group()
+        list_model = self.nav.view_of(group).model()
+        old_alias = list_model.alias_at(index.row())
+        if old_alias is None:
+            return
+        old_text = self.controller.get_prompt_text(group, old_alias)
 
-        dlg = EditPromptDialog(self, old_alias, old_text)
+        dlg = EditPromptDialog(self, old_alias, old_text,
+                               lambda text: self.controller.find_similar(text, exclude=(group, old_alias)))
         if dlg.exec() == QDialog.DialogCode.Accepted:
             action, new_alias, new_text = dlg.get_result()
             if action == "delete":
-                self._delete_prompt(group, old_alias, item, dlg)
-            elif action == "save":
-                # 更新数据
-                self.controller.update_prompt(group, old_alias, new_alias, new_text)
-                # 更新界面
-                alias_label.setText(new_alias)
-                widget.setFixedHeight(widget.sizeHint().height())
-                item.setSizeHint(widget.sizeHint())
-
-    def _delete_prompt(self, group: str, alias: str, item: QListWidgetItem, dialog: QDialog):
+                self._delete_prompt(group, old_alias, dlg)
+            elif action == "save" and (new_alias != old_alias or dlg.text_modified):
+                # 别名和正文都没变时不重新保存
+                self.save_prompt_edit(group, old_alias, new_alias, new_text)
+                self._preview_timer.start()
+
+    def save_prompt_edit(self, group: str, old_alias: str, new_alias: str, new_text: str):
+        """保存编辑结果（编辑对话框与轨迹回放共用）"""
+        self._trace("edit", group=group, old_alias=old_alias, new_alias=new_alias, text=new_text)
+        lst = self.nav.view_of(group)
+        # 更新数据
+        self.controller.update_prompt(group, old_alias, new_alias, new_text)
+        # 更新界面（侧栏模式下未显示的分组下次切换时自然是最新的）
+        if new_alias != old_alias:
+            if lst is not None:
+                list_model = lst.model()
+                list_model.remove(new_alias)
+                list_model.rename(old_alias, new_alias)
+            # 快捷键绑定记录的是别名，改名后重建
+            self.hotkeys_changed.emit()
+
+    def _delete_prompt(self, group: str, alias: str, dialog: QDialog):
         resp = QMessageBox.question(
             self, "删除",
             f"确认删除提示“{alias}”？",
@@ -283,44 +632,110 @@ class PromptWindow(QWidget):
         if resp == QMessageBox.StandardButton.Yes:
             # 删除数据及界面项
             self.controller.delete_prompt(group, alias)
-            list_widget = self.tab_lists[group]
-            list_widget.takeItem(list_widget.row(item))
+            lst = self.nav.view_of(group)
+            if lst is not None:
+                lst.model().remove(alias)
+            self.hotkeys_changed.emit()
             # 改为 reject()，避免 edit_prompt 在 exec() 后继续保存已删除条目
             dialog.reject()
 
     def filter_current_tab(self, keyword: str):
-        lst = self.tab_lists[self.tabs.tabText(self.tabs.currentIndex())]
+        lst = self.nav.view_of(self._current_group())
+        if lst is None:
+            # 还没有任何分组加载进来
+            return
+        list_model = lst.model()
         key = keyword.lower()
-        for i in range(lst.count()):
-            item = lst.item(i)
-            widget = lst.itemWidget(item)
-            # 只按别名过滤
-            alias = widget.findChild(QLabel).text().lower()
-            item.setHidden(key not in alias)
+        with metrics.timer("ui.search_ms"):
+            if self.btn_semantic.isChecked() and key.strip():
+                if not self._loaded:
+                    # 语义索引需要完整数据，加载完成后会重新过滤
+                    return
+                if not self.model.semantic_ready:
+                    # 索引建好后由 _semantic_step 重新过滤
+                    self._semantic_timer.start(0)
+                    return
+                # 查询比按别名过滤慢得多，不在每次按键时执行
+                self._semantic_query.start()
+                return
+            for row in range(list_model.rowCount()):
+                # 只按别名过滤
+                lst.setRowHidden(row, key not in list_model.alias_at(row).lower())
+
+    def _filter_semantic(self):
+        """语义模式：只显示当前分组中内容最相关的条目"""
+        keyword = self.search.text()
+        group = self._current_group()
+        lst = self.nav.view_of(group)
+        if lst is None or not self.btn_semantic.isChecked() or not keyword.strip():
+            return
+        list_model = lst.model()
+        with metrics.timer("ui.search_ms"):
+            hits = {alias for _, alias, _ in self.model.semantic_search(keyword, group, self.SEMANTIC_LIMIT)}
+            for row in range(list_model.rowCount()):
+                lst.setRowHidden(row, list_model.alias_at(row) not in hits)
+
+    def _on_semantic_toggled(self, on: bool):
+        if on and self._loaded:
+            # 打开开关时就开始准备索引，通常输入完第一个词前就已就绪
+            self._semantic_timer.start(0)
+        self.filter_current_tab(self.search.text())
+
+    def _semantic_step(self):
+        if self.model.loading or not self.model.build_semantic_step():
+            return
+        self._semantic_timer.stop()
+        if self.btn_semantic.isChecked() and self.search.text().strip():
+            self._filter_semantic()
 
     def get_selected_prompt(self) -> str | None:
-        group = self.tabs.tabText(self.tabs.currentIndex())
-        item = self.tab_lists[group].currentItem()
-        if not item:
+        group = self._current_group()
+        lst = self.nav.view_of(group)
+        alias = self._current_alias(lst) if lst is not None else None
+        if alias is None:
             return None
-        alias = self.tab_lists[group].itemWidget(item).findChild(QLabel).text()
         text = self.controller.get_prompt_text(group, alias)
         # 每次取用时自增并保存
         self._increment_usage(group, alias)
         return text
 
     def _increment_usage(self, group: str, alias: str):
-        self.controller.increment_usage(group, alias)
-        # 界面上同步更新对应 count 标签
-        lst = self.tab_lists.get(group)
-        if not lst:
+        autosave, self.model.autosave = self.model.autosave, False
+        try:
+            self.controller.increment_usage(group, alias)
+        finally:
+            self.model.autosave = autosave
+        self._usage_timer.start()
+        self.refresh_prompt(group, alias)
+
+    def reveal_prompt(self, group: str, alias: str):
+        """切换到分组并选中该 Prompt（重复列表双击时使用）"""
+        if not self.nav.set_current_group(group):
             return
-        for i in range(lst.count()):
-            item = lst.item(i)
-            widget: PromptItemWidget = lst.itemWidget(item)
-            if widget.alias_label.text() == alias:
-                widget.set_count(self.usage_counts[group][alias])
-                break
+        # 先切换再清空搜索：侧栏模式切换时会换上该分组自己的搜索词
+        if self.search.text():
+            self.search.clear()
+        lst = self.nav.view_of(group)
+        row = lst.model().row_of(alias)
+        if row >= 0:
+            idx = lst.model().index(row)
+            lst.setCurrentIndex(idx)
+            lst.scrollTo(idx)
+        self.show_window()
+
+    @_after_load
+    def find_duplicates(self):
+        DuplicatesDialog(self).exec()
+
+    def refresh_prompt(self, group: str, alias: str):
+        """界面上同步更新对应行的计数"""
+        lst = self.nav.view_of(group)
+        if lst:
+            lst.model().refresh(alias)
+
+    def _trace(self, op: str, **args):
+        if self.tracer is not None:
+            self.tracer.record(op, **args)
 
     def closeEvent(self, event):
         # 关闭时保存当前窗口尺寸
@@ -341,48 +756,111 @@ class PromptWindow(QWidget):
         if event.type() == QEvent.Type.WindowStateChange and self.isMinimized():
             # 延迟 hide 保证内部状态切换完成
             QTimer.singleShot(0, self.hide)
+        # 切回窗口时检查镜像文件夹，只读取 mtime/大小变了的文件
+        elif event.type() == QEvent.Type.ActivationChange and self.isActiveWindow():
+            self.scan_mirror()
 
     def eventFilter(self, obj, event):
-        # 支持双击标签页重命名
-        if event.type() == QEvent.Type.MouseButtonDblClick and obj == self.tabs.tabBar():
-            mouse_event = event  # QMouseEvent
-            idx = obj.tabAt(mouse_event.pos())
-            if idx >= 0:
-                self.rename_group(idx)
-            return True
-
         # 支持按 Ctrl+C 复制选中 prompt 文本并计数
-        if event.type() == QEvent.Type.KeyPress and obj in self.tab_lists.values():
+        if event.type() == QEvent.Type.KeyPress and obj in self.nav.views():
             if (event.key() == Qt.Key.Key_C 
                 and event.modifiers() & Qt.KeyboardModifier.ControlModifier):
-                group = self.tabs.tabText(self.tabs.currentIndex())
-                item = obj.currentItem()
-                if item:
-                    alias = obj.itemWidget(item).findChild(QLabel).text()
-                    text = self.controller.get_prompt_text(group, alias)
-                    QApplication.clipboard().setText(text)
+                group = self._current_group()
+                alias = self._current_alias(obj)
+                if alias is not None:
                     # 复制时计数并写回
-                    self._increment_usage(group, alias)
+                    self.copy_prompt(group, alias)
                 return True
         return super().eventFilter(obj, event)
 
-    def insert_prompt(self, group: str, item: QListWidgetItem):
-        alias = self.tab_lists[group].itemWidget(item).findChild(QLabel).text()
-        text = self.controller.get_prompt_text(group, alias)
-        # 复制到剪贴板并计数
+    def insert_prompt(self, group: str, index):
+        lst = self.nav.view_of(group)
+        alias = lst.model().alias_at(index.row()) if lst is not None else None
+        if alias is None:
+            return
+        self.copy_prompt(group, alias)
+
+    def copy_prompt(self, group: str, alias: str, values: dict[str, str] | None = None):
+        """复制到剪贴板并计数（列表双击、快速选择框共用）。
+
+        标记为模板且含 ``{变量}`` 的先弹出填写框，其余直接复制原文；
+        传入 values 时直接使用（轨迹回放）。
+        分组尚未加载时（快捷键在启动期间触发）排到加载完成后。
+        """
+        if group not in self.model.records and not self._loaded:
+            self._pending.append(lambda: self.copy_prompt(group, alias, values))
+            return
+        if self.model.get_record(group, alias) is None:
+            # 已删除或改名（如快速选择框里过时的结果）：不复制空文本，也不计数
+            logger.warning(f"copy target {group}/{alias} no longer exists")
+            return
+        tpl = self.model.template(group, alias)
+        if tpl and values is None:
+            recent = self._cfg.setdefault("template_recent", {})
+            dlg = TemplateFillDialog(self, alias, tpl, recent)
+            if dlg.exec() != QDialog.DialogCode.Accepted:
+                return
+            values = dlg.values()
+            templates.remember(recent, values)
+        if values:
+            self._trace("copy", group=group, alias=alias, values=values)
+        else:
+            self._trace("copy", group=group, alias=alias)
+        text = tpl.render(values) if tpl else self.controller.get_prompt_text(group, alias)
         QApplication.clipboard().setText(text)
         self._increment_usage(group, alias)
 
-    def _show_prompt_context_menu(self, group: str, lst: QListWidget, pos):
-        """在列表空白或项上右键，显示新建 Prompt 选项"""
+    def _show_prompt_context_menu(self, lst: QListView, pos):
+        """在列表空白或项上右键，显示新建 Prompt 选项；在项上另有设置快捷键"""
+        group = self._current_group()
         menu = QMenu(self)
         menu.addAction("新建 Prompt", lambda: self._new_prompt(group))
+        idx = lst.indexAt(pos)
+        alias = lst.model().alias_at(idx.row()) if idx.isValid() else None
+        if alias is not None:
+            menu.addAction("设置快捷键…", lambda: self.set_prompt_hotkey(group, alias))
+            # 模板需手动开启：只有标记为模板的 Prompt 复制时才填写 {变量}
+            act = menu.addAction("作为模板（复制时填写 {变量}）")
+            act.setCheckable(True)
+            act.setChecked(self.controller.is_template(group, alias))
+            act.toggled.connect(lambda on: self.controller.set_template(group, alias, on))
+        menu.addSeparator()
+        menu.addAction("撤销", self.undo).setEnabled(self.controller.can_undo)
+        menu.addAction("重做", self.redo).setEnabled(self.controller.can_redo)
         menu.exec(lst.mapToGlobal(pos))
 
+    @_after_load
+    def undo(self):
+        if self.controller.undo():
+            # 一步可能涉及任意分组，整体刷新
+            self.reload_tabs()
+
+    @_after_load
+    def redo(self):
+        if self.controller.redo():
+            self.reload_tabs()
+
+    def set_prompt_hotkey(self, group: str, alias: str):
+        """为 Prompt 设置全局快捷键，支持多段和弦，如 ctrl+alt+g, 3；留空则清除"""
+        current = self.controller.get_hotkey(group, alias) or ""
+        seq, ok = QInputDialog.getText(
+            self, "设置快捷键", f"“{alias}”的快捷键（多段用逗号分隔，留空清除）:", text=current
+        )
+        if not ok:
+            return
+        seq = seq.strip() or None
+        try:
+            self.controller.set_hotkey(group, alias, seq, reserved=self._cfg.get("hotkey", DEFAULT_HOTKEY))
+        except ValueError as e:
+            QMessageBox.warning(self, "设置快捷键", f"无效的快捷键: {e}")
+            return
+        self.hotkeys_changed.emit()
+
+    @_after_load
     def _new_prompt(self, group: str):
         # 循环弹窗，直到有效输入或取消
         while True:
-            dlg = NewPromptDialog(self)
+            dlg = NewPromptDialog(self, self.controller.find_similar)
             if dlg.exec() != QDialog.DialogCode.Accepted:
                 return
             alias, content = dlg.get_prompt_data()
@@ -396,18 +874,131 @@ class PromptWindow(QWidget):
                 continue
             # 添加新的 prompt 并保存
             self.controller.add_prompt(group, alias, content)
-            lst = self.tab_lists[group]
-            self._add_prompt_item(lst, alias, content, 0)
+            lst = self.nav.view_of(group)
+            if lst is not None:
+                lst.model().append(alias)
             break
 
+    def _ask_pack_path(self, title: str, saving: bool) -> tuple[str, str] | None:
+        """选择导入/导出格式与路径，返回 (path, fmt)"""
+        label, ok = QInputDialog.getItem(self, title, "格式:", list(PACK_FORMATS), 0, False)
+        if not ok:
+            return None
+        fmt = PACK_FORMATS[label]
+        if fmt == "md":
+            path = QFileDialog.getExistingDirectory(self, title)
+        elif saving:
+            path, _ = QFileDialog.getSaveFileName(self, title, f"prompts.{fmt}", label)
+        else:
+            path, _ = QFileDialog.getOpenFileName(self, title, "", label)
+        return (path, fmt) if path else None
+
+    @_after_load
+    def import_prompts(self):
+        chosen = self._ask_pack_path("导入 Prompt", saving=False)
+        if not chosen:
+            return
+        label, ok = QInputDialog.getItem(self, "导入 Prompt", "别名冲突时:", list(IMPORT_POLICIES), 0, False)
+        if not ok:
+            return
+        path, fmt = chosen
+        try:
+            # 整个导入作为一次批处理：只保存一次、只刷新一次界面，失败则全部回滚
+            with self.batch():
+                res = packio.import_pack(self.model, path, fmt, IMPORT_POLICIES[label])
+        except (OSError, ValueError) as e:
+            QMessageBox.warning(self, "导入 Prompt", f"导入失败: {e}")
+            return
+        QMessageBox.information(
+            self, "导入 Prompt",
+            f"新增 {res.added}，覆盖 {res.overwritten}，重命名 {res.renamed}，跳过 {res.skipped}"
+        )
+
+    @_after_load
+    def export_prompts(self):
+        chosen = self._ask_pack_path("导出 Prompt", saving=True)
+        if not chosen:
+            return
+        path, fmt = chosen
+        try:
+            n = packio.export_pack(self.model, path, fmt)
+        except (OSError, ValueError) as e:
+            QMessageBox.warning(self, "导出 Prompt", f"导出失败: {e}")
+            return
+        QMessageBox.information(self, "导出 Prompt", f"已导出 {n} 条 Prompt")
+
     def configure_ssh_backup(self):
         dlg = SshConfigDialog(self, self._cfg.get("ssh", {}))
         if dlg.exec() == QDialog.DialogCode.Accepted:
-            self._cfg["ssh"] = dlg.get_config()
+            # 保留对话框中没有的高级选项（如 verify_retries）
+            self._cfg["ssh"] = {**self._cfg.get("ssh", {}), **dlg.get_config()}
             QMessageBox.information(self, "SSH 设置", "SSH 备份设置已保存")
 
-    def update_sync_status(self, timestamp, success: bool):
-        """供 SshBackupManager 调用，更新同步状态标签"""
+    def restore_backup(self):
+        """从 SSH 备份恢复：后台下载并校验，通过后才替换本地数据文件"""
+        if self.backup is None:
+            QMessageBox.information(self, "从备份恢复", "尚未配置 SSH 备份")
+            return
+        answer = QMessageBox.question(
+            self, "从备份恢复", "用远程备份替换当前的 Prompt 数据？\n当前数据会另存为 .bak 文件。"
+        )
+        if answer != QMessageBox.StandardButton.Yes:
+            return
+        self.sync_label.setText("正在下载备份…")
+        threading.Thread(target=self._fetch_backup, daemon=True, name="restore").start()
+
+    def _fetch_backup(self):
+        # 工作线程：只做网络与文件，结果通过信号回到界面线程
+        try:
+            self._backup_fetched.emit(self.backup.fetch(), None)
+        except Exception as e:
+            self._backup_fetched.emit(None, e)
+
+    @_after_load
+    def _on_backup_fetched(self, path: str | None, error: Exception | None):
+        if error is not None:
+            logger.error(f"restore failed: {error}")
+            self.sync_label.setText("恢复失败")
+            QMessageBox.warning(self, "从备份恢复", f"恢复失败: {error}")
+            return
+        model = self.model
+        bak = model.path + ".bak"
+        moved = False
+        try:
+            # 尚未写盘的修改（如延后写入的使用计数）先落盘，随当前数据一起存入 .bak
+            self._usage_timer.stop()
+            model.flush()
+            # pack 格式的 mmap 必须先释放才能替换文件
+            model.close()
+            os.replace(model.path, bak)
+            moved = True
+            os.replace(path, model.path)
+            model.load()
+        except Exception as e:
+            logger.error("restore failed, reopening the previous data", exc_info=True)
+            try:
+                if moved:
+                    os.replace(bak, model.path)
+                model.load()
+            except Exception:
+                logger.error(f"could not reopen {model.path}", exc_info=True)
+            self.reload_tabs()
+            self.sync_label.setText("恢复失败")
+            QMessageBox.warning(self, "从备份恢复", f"恢复失败，已保留原数据: {e}")
+            return
+        # 撤销记录针对的是被替换的数据
+        if self.controller.history is not None:
+            self.controller.history.clear()
+        if self.mirror is not None:
+            self.mirror.sync()
+        self.reload_tabs()
+        self.sync_label.setText("已从备份恢复")
+        QMessageBox.information(self, "从备份恢复", "已从备份恢复 Prompt 数据")
+
+    def update_sync_status(self, timestamp, success: bool, detail: str | None = None):
+        """供 SshBackupManager 调用，更新同步状态标签；detail 为校验失败原因"""
         ts_str = timestamp.strftime("%Y-%m-%d %H:%M:%S")
         result = "成功" if success else "失败"
+        if detail:
+            result += f": {detail}"
         self.sync_label.setText(f"上次同步: {ts_str} ({result})")
@@ -0,0 +1,258 @@
+"""Undo/redo for prompt library edits, stored as deltas.
+
+The model reports every edit to :class:`History` *before* making it.  The
+report covers the prior state of one prompt, the creation or deletion of
+a group, or a group rename.  A step is the list of those reports and is
+closed when the model saves.  Outside a batch every mutation is one step.
+A :meth:`PromptModel.batch` is one step as a whole, and a rolled-back
+batch leaves nothing behind.  Undo restores the recorded states in
+reverse order.  While it does so the model reports again, which yields
+the redo step for free.
+
+Only the prompts an edit touched are stored: a renamed group costs one
+entry, a deleted group its own prompts, never a copy of the library.
+Usage counts are not part of the history.  Counting a use is not an
+undoable edit, and restoring a prompt keeps its current count.
+
+The stacks are limited by an approximate byte size; the oldest steps are
+dropped first.  They are persisted as an append-only JSON Lines log next
+to the data file (``<data>.undo``).  The log is replayed on start and
+rewritten when it has grown well past its live content.
+"""
+import os
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = 8 * 2**20
+# 每个操作除文本外的大致开销（元组、列表、键）
+_OP_OVERHEAD = 100
+
+
+def _op_size(op: list) -> int:
+    size = _OP_OVERHEAD
+    for part in op:
+        if isinstance(part, str):
+            size += len(part)
+        elif isinstance(part, (list, tuple)):
+            size += _op_size(part)
+    return size
+
+
+class Step:
+    __slots__ = ("ops", "size")
+
+    def __init__(self, ops: list):
+        self.ops = ops
+        self.size = sum(_op_size(op) for op in ops)
+
+
+class History:
+    """Bounded undo/redo stacks fed by :class:`PromptModel` change reports.
+
+    Operations, each holding the state *before* an edit:
+
+    * ``["rec", group, alias, state]`` where ``state`` is
+      ``[text, count, meta]`` or ``None`` for "did not exist"
+    * ``["group", name, position, rows]`` where ``rows`` lists
+      ``[alias, text, count, meta]``, or ``position`` is ``None`` for
+      "did not exist"
+    * ``["rename", old, new]``
+    """
+    def __init__(self, path: str | None = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.model = None
+        self._undo: list[Step] = []
+        self._redo: list[Step] = []
+        self._size = 0
+        self._pending: list = []
+        self._seen: set = set()
+        self._applying = False
+        self._log_lines = 0
+
+    def attach(self, model):
+        """Start receiving change reports from ``model`` and load the saved log."""
+        self.model = model
+        model.history = self
+        if self.path:
+            self._load()
+
+    # ---------- reports from the model ----------
+    def note_record(self, group: str, alias: str):
+        key = (group, alias)
+        if key in self._seen:
+            return
+        self._seen.add(key)
+        rec = self.model.get_record(group, alias)
+        state = None if rec is None else [self.model.text_of(rec), rec.count, rec.meta]
+        self._pending.append(["rec", group, alias, state])
+
+    def note_group(self, name: str):
+        recs = self.model.records.get(name)
+        if recs is None:
+            self._pending.append(["group", name, None, None])
+            return
+        pos = list(self.model.records).index(name)
+        rows = [[a, self.model.text_of(r), r.count, r.meta] for a, r in recs.items()]
+        self._pending.append(["group", name, pos, rows])
+        # 分组内的条目已整体记下
+        self._seen.update((name, a) for a in recs)
+
+    def note_rename(self, old: str, new: str):
+        self._pending.append(["rename", old, new])
+        # 改名后的键对应另一套状态，需要重新记录
+        self._seen = {k for k in self._seen if k[0] not in (old, new)}
+
+    def commit(self):
+        """Close the current step (called by the model when it saves)."""
+        if self._applying:
+            return
+        ops = self._take()
+        if not ops:
+            return
+        if self._redo:
+            self._redo.clear()
+            self._log({"clear": "redo"})
+        self._push(self._undo, Step(ops))
+
+    def discard(self):
+        """Drop the reports of a rolled-back batch."""
+        self._take()
+
+    def _take(self) -> list:
+        ops, self._pending, self._seen = self._pending, [], set()
+        return ops
+
+    # ---------- undo / redo ----------
+    @property
+    def can_undo(self) -> bool:
+        return bool(self._undo)
+
+    @property
+    def can_redo(self) -> bool:
+        return bool(self._redo)
+
+    def undo(self) -> bool:
+        return self._step(self._undo, self._redo, "undo", "redo")
+
+    def redo(self) -> bool:
+        return self._step(self._redo, self._undo, "redo", "undo")
+
+    def _step(self, src: list, dst: list, src_name: str, dst_name: str) -> bool:
+        if not src:
+            return False
+        step = src[-1]
+        self._take()
+        self._applying = True
+        try:
+            with self.model.batch():
+                for op in reversed(step.ops):
+                    self._apply(op)
+        except BaseException:
+            self._take()
+            raise
+        finally:
+            self._applying = False
+        src.pop()
+        self._size -= step.size
+        self._log({"pop": src_name})
+        self._push(dst, Step(self._take()))
+        return True
+
+    def _apply(self, op: list):
+        model = self.model
+        kind = op[0]
+        if kind == "rec":
+            _, group, alias, state = op
+            if state is None:
+                model.delete_prompt(group, alias)
+            else:
+                model.restore_prompt(group, alias, *state)
+        elif kind == "group":
+            _, name, pos, rows = op
+            if pos is None:
+                model.delete_group(name)
+            else:
+                model.restore_group(name, pos, rows)
+        elif kind == "rename":
+            model.rename_group(op[2], op[1])
+
+    def _push(self, stack: list, step: Step, log: bool = True):
+        stack.append(step)
+        self._size += step.size
+        if log:
+            self._log({"push": "undo" if stack is self._undo else "redo", "ops": step.ops})
+        self._evict()
+
+    def _evict(self):
+        # 先丢最旧的撤销步骤，再丢最旧的重做步骤；保留最新的一步
+        for stack in (self._undo, self._redo):
+            while self._size > self.max_bytes and len(self._undo) + len(self._redo) > 1 and stack:
+                self._size -= stack.pop(0).size
+
+    def clear(self):
+        self._undo.clear()
+        self._redo.clear()
+        self._size = 0
+        self._take()
+        if self.path:
+            self._rewrite()
+
+    # ---------- persistence ----------
+    def _log(self, entry: dict):
+        if not self.path:
+            return
+        try:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self._log_lines += 1
+        except OSError:
+            logger.warning("could not write undo log", exc_info=True)
+            return
+        if self._log_lines > 4 * (len(self._undo) + len(self._redo)) + 64:
+            self._rewrite()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return
+        except OSError:
+            logger.warning("could not read undo log", exc_info=True)
+            return
+        stacks = {"undo": self._undo, "redo": self._redo}
+        for line in lines:
+            try:
+                entry = json.loads(line)
+                if "push" in entry:
+                    self._push(stacks[entry["push"]], Step(entry["ops"]), log=False)
+                elif "pop" in entry:
+                    stack = stacks[entry["pop"]]
+                    if stack:
+                        self._size -= stack.pop().size
+                elif "clear" in entry:
+                    stack = stacks[entry["clear"]]
+                    self._size -= sum(s.size for s in stack)
+                    stack.clear()
+            except (ValueError, KeyError, TypeError):
+                # 异常退出时最后一行可能不完整
+                logger.warning(f"skipping bad undo log entry in {self.path}")
+        self._log_lines = len(lines)
+        if self._log_lines > 2 * (len(self._undo) + len(self._redo)) + 16:
+            self._rewrite()
+
+    def _rewrite(self):
+        tmp = self.path + ".tmp"
+        try:
+            with open(tmp, 'w', encoding='utf-8') as f:
+                for name, stack in (("undo", self._undo), ("redo", self._redo)):
+                    for step in stack:
+                        f.write(json.dumps({"push": name, "ops": step.ops}, ensure_ascii=False) + "\n")
+            os.replace(tmp, self.path)
+        except OSError:
+            logger.warning("could not rewrite undo log", exc_info=True)
+            return
+        self._log_lines = len(self._undo) + len(self._redo)
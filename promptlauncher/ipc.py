@@ -0,0 +1,248 @@
+"""Framed request/response protocol spoken on the single-instance socket.
+
+Each message is a 4-byte big-endian length followed by a UTF-8 JSON
+object.  Requests look like ``{"id": 1, "cmd": "search", "args": {...}}``
+and responses like ``{"id": 1, "ok": true, "result": ...}`` or
+``{"id": 1, "ok": false, "error": "..."}``.
+
+For compatibility a bare ``activate`` payload (what older instances send)
+is still understood.  This module is pure Python so the command line
+client can talk to the running app without importing PyQt.
+"""
+import os
+import json
+import time
+import socket
+import struct
+import itertools
+
+INSTANCE_KEY = 'PromptLauncherSingleton'
+MAX_FRAME = 16 * 1024 * 1024
+LEGACY_ACTIVATE = b"activate"
+
+_LEN = struct.Struct(">I")
+# 所有命名管道实例都在忙（Windows 错误码）
+ERROR_PIPE_BUSY = 231
+
+
+class IpcError(Exception):
+    """Raised for protocol errors and for requests the server rejected."""
+
+
+def server_name(key: str = INSTANCE_KEY) -> str:
+    """Name passed to ``QLocalServer.listen`` for ``key``."""
+    return key + "_IPC" if os.name == "nt" else key
+
+
+def server_address(key: str = INSTANCE_KEY) -> str:
+    """Filesystem address of the server, the way QLocalServer resolves it."""
+    name = server_name(key)
+    if os.name == "nt":
+        return r"\\.\pipe" + "\\" + name
+    # QLocalServer 在 Unix 上把非绝对路径的名字放到 QDir::tempPath() 下
+    tmp = os.environ.get("TMPDIR", "/tmp").rstrip("/") or "/tmp"
+    return os.path.join(tmp, name)
+
+
+def encode_frame(obj) -> bytes:
+    payload = json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode('utf-8')
+    if len(payload) > MAX_FRAME:
+        raise IpcError(f"message of {len(payload)} bytes exceeds the frame limit")
+    return _LEN.pack(len(payload)) + payload
+
+
+class FrameDecoder:
+    """Incrementally split a byte stream into decoded messages."""
+    def __init__(self):
+        self._buf = bytearray()
+
+    def feed(self, data: bytes) -> list:
+        self._buf += data
+        out = []
+        while True:
+            if self._buf.startswith(LEGACY_ACTIVATE):
+                del self._buf[:len(LEGACY_ACTIVATE)]
+                out.append({"cmd": "activate", "legacy": True})
+                continue
+            if len(self._buf) < _LEN.size:
+                # 旧版本只发送 "activate"，前缀不完整时继续等待
+                return out
+            (size,) = _LEN.unpack_from(self._buf)
+            if size > MAX_FRAME:
+                if LEGACY_ACTIVATE.startswith(bytes(self._buf[:len(LEGACY_ACTIVATE)])):
+                    return out
+                raise IpcError(f"frame of {size} bytes exceeds the limit")
+            if len(self._buf) < _LEN.size + size:
+                return out
+            payload = bytes(self._buf[_LEN.size:_LEN.size + size])
+            del self._buf[:_LEN.size + size]
+            try:
+                out.append(json.loads(payload.decode('utf-8')))
+            except ValueError as e:
+                raise IpcError(f"invalid message: {e}") from e
+
+
+def make_response(request: dict, result=None, error: str | None = None) -> dict:
+    resp = {"id": request.get("id"), "ok": error is None}
+    if error is None:
+        resp["result"] = result
+    else:
+        resp["error"] = error
+    return resp
+
+
+class IpcClient:
+    """Blocking client for the running instance; no Qt required.
+
+    Usage::
+
+        with IpcClient.connect() as cli:
+            hits = cli.request("search", query="review")
+    """
+    def __init__(self, stream):
+        self._stream = stream
+        self._decoder = FrameDecoder()
+        self._ids = itertools.count(1)
+        self._pending: list = []
+
+    @classmethod
+    def connect(cls, key: str = INSTANCE_KEY, timeout: float = 2.0) -> "IpcClient":
+        """Connect to the instance; raises ``OSError`` if none is running.
+
+        ``timeout`` bounds the connect and every read on both platforms;
+        running out raises ``socket.timeout`` (an ``OSError``).
+        """
+        addr = server_address(key)
+        if os.name == "nt":
+            return cls(_PipeStream(_open_pipe(addr, timeout), timeout))
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(timeout)
+        try:
+            sock.connect(addr)
+        except OSError:
+            sock.close()
+            raise
+        return cls(_SocketStream(sock))
+
+    def send(self, obj):
+        self._stream.write(encode_frame(obj))
+
+    def request(self, cmd: str, **args):
+        req_id = next(self._ids)
+        self.send({"id": req_id, "cmd": cmd, "args": args})
+        while True:
+            for msg in self._pending:
+                if msg.get("id") == req_id:
+                    self._pending.remove(msg)
+                    if not msg.get("ok"):
+                        raise IpcError(msg.get("error") or "request failed")
+                    return msg.get("result")
+            data = self._stream.read()
+            if not data:
+                raise IpcError("connection closed by server")
+            self._pending.extend(self._decoder.feed(data))
+
+    def close(self):
+        self._stream.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class _SocketStream:
+    def __init__(self, sock):
+        self._sock = sock
+
+    def write(self, data: bytes):
+        self._sock.sendall(data)
+
+    def read(self) -> bytes:
+        return self._sock.recv(65536)
+
+    def close(self):
+        self._sock.close()
+
+
+def _open_pipe(addr: str, timeout: float):
+    # 命名管道可以像普通文件一样以字节模式读写
+    import ctypes
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return open(addr, 'r+b', buffering=0)
+        except OSError as e:
+            if getattr(e, "winerror", None) != ERROR_PIPE_BUSY:
+                raise
+            left = deadline - time.monotonic()
+            # 等到服务端有空闲实例，最多等到截止时间
+            if left <= 0 or not ctypes.windll.kernel32.WaitNamedPipeW(addr, max(1, int(left * 1000))):
+                raise socket.timeout(f"{addr} is busy") from e
+
+
+def _pipe_available(f) -> int:
+    """Bytes waiting in the pipe, or -1 once the server has closed it."""
+    import ctypes
+    import msvcrt
+    from ctypes import wintypes
+    avail = wintypes.DWORD()
+    handle = wintypes.HANDLE(msvcrt.get_osfhandle(f.fileno()))
+    if not ctypes.windll.kernel32.PeekNamedPipe(handle, None, 0, None, ctypes.byref(avail), None):
+        return -1
+    return avail.value
+
+
+class _PipeStream:
+    """Named pipe client end.
+
+    A plain ``read`` on a pipe cannot time out, so reads poll
+    ``PeekNamedPipe`` until data arrives or ``timeout`` runs out.
+    """
+    POLL_S = 0.002
+
+    def __init__(self, f, timeout: float | None = None, available=_pipe_available):
+        self._f = f
+        self._timeout = timeout
+        self._available = available
+
+    def write(self, data: bytes):
+        self._f.write(data)
+        self._f.flush()
+
+    def read(self) -> bytes:
+        if self._timeout is None:
+            return self._f.read(65536)
+        deadline = time.monotonic() + self._timeout
+        while True:
+            n = self._available(self._f)
+            if n < 0:
+                return b""
+            if n:
+                return self._f.read(min(n, 65536))
+            if time.monotonic() >= deadline:
+                raise socket.timeout("no reply from the running instance")
+            time.sleep(self.POLL_S)
+
+    def close(self):
+        self._f.close()
+
+
+def send_activate(key: str = INSTANCE_KEY, timeout: float = 0.5) -> bool:
+    """Ask a running instance to show its window; ``False`` if none is listening.
+
+    Raises :class:`IpcError` if the instance answers but cannot show a
+    window, e.g. one started with ``--daemon``.  An instance too busy to
+    answer within ``timeout`` is assumed to have taken the request.
+    """
+    try:
+        cli = IpcClient.connect(key, timeout)
+    except OSError:
+        return False
+    with cli:
+        try:
+            cli.request("activate")
+        except socket.timeout:
+            pass
+    return True
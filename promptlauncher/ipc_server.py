@@ -0,0 +1,96 @@
+import logging
+from concurrent.futures import Executor
+from PyQt6.QtCore import QObject, pyqtSignal
+from PyQt6.QtNetwork import QLocalServer, QLocalSocket
+from .ipc import FrameDecoder, IpcError, encode_frame, make_response
+from .service import PromptService
+
+logger = logging.getLogger(__name__)
+
+
+class IpcServer(QObject):
+    """在单例 QLocalServer 上处理分帧请求。
+
+    每个连接有自己的解码缓冲区，数据到达时（readyRead）才处理，
+    从不阻塞等待，所以多个客户端同时连接也不会卡住界面。
+
+    传入 executor 时请求在线程池中执行（service 需带读写锁），
+    结果通过信号回到本线程写回 socket；QLocalSocket 只能在所属线程使用。
+
+    hold() 期间（数据仍在后台加载）只有 ping/activate 立即处理，
+    其余请求排队，release() 后按到达顺序执行。
+    """
+    # 数据未加载完时也可以立即处理的命令
+    IMMEDIATE = frozenset(("ping", "activate"))
+
+    _finished = pyqtSignal(object, object, object)
+
+    def __init__(self, server: QLocalServer, service: PromptService, parent=None,
+                 executor: Executor | None = None):
+        super().__init__(parent)
+        self.server = server
+        self.service = service
+        self.executor = executor
+        self._finished.connect(self._reply)
+        self._clients: dict[QLocalSocket, FrameDecoder] = {}
+        self._held: list[tuple[QLocalSocket, dict]] | None = None
+        server.newConnection.connect(self._on_new_connection)
+
+    def _on_new_connection(self):
+        while self.server.hasPendingConnections():
+            sock = self.server.nextPendingConnection()
+            self._clients[sock] = FrameDecoder()
+            sock.readyRead.connect(lambda s=sock: self._on_ready_read(s))
+            sock.disconnected.connect(lambda s=sock: self._drop(s))
+            # 连接建立前可能已有数据到达
+            if sock.bytesAvailable():
+                self._on_ready_read(sock)
+
+    def _on_ready_read(self, sock: QLocalSocket):
+        decoder = self._clients.get(sock)
+        if decoder is None:
+            return
+        try:
+            messages = decoder.feed(bytes(sock.readAll()))
+        except IpcError as e:
+            logger.warning(f"dropping IPC client: {e}")
+            sock.write(encode_frame(make_response({}, error=str(e))))
+            sock.disconnectFromServer()
+            return
+        for msg in messages:
+            if self._held is not None and not (isinstance(msg, dict) and msg.get("cmd") in self.IMMEDIATE):
+                self._held.append((sock, msg))
+            else:
+                self._dispatch(sock, msg)
+
+    def hold(self):
+        """暂缓处理需要数据的请求（模型加载期间）"""
+        if self._held is None:
+            self._held = []
+
+    def release(self):
+        held, self._held = self._held or [], None
+        for sock, msg in held:
+            if sock in self._clients:
+                self._dispatch(sock, msg)
+
+    def _dispatch(self, sock: QLocalSocket, msg: dict):
+        if self.executor is None:
+            self._reply(sock, msg, self.service.handle(msg))
+        else:
+            self.executor.submit(self._handle_async, sock, msg)
+
+    def _handle_async(self, sock: QLocalSocket, msg: dict):
+        # 工作线程：只调用 service，不碰 socket
+        self._finished.emit(sock, msg, self.service.handle(msg))
+
+    def _reply(self, sock: QLocalSocket, msg: dict, resp: dict):
+        # 旧版本的 "activate" 不等待回复；客户端已断开时丢弃结果
+        if msg.get("legacy") or sock not in self._clients:
+            return
+        sock.write(encode_frame(resp))
+        sock.flush()
+
+    def _drop(self, sock: QLocalSocket):
+        self._clients.pop(sock, None)
+        sock.deleteLater()
@@ -1,23 +1,34 @@
 # main.py
-import os, sys, json, keyboard, ctypes
+import os, sys, json, ctypes, signal, time
+import argparse
 import logging
-from PyQt6.QtWidgets import QApplication
-from PyQt6.QtGui import QIcon
-from PyQt6.QtCore import QTimer
-from PyQt6.QtNetwork import QLocalServer, QLocalSocket
-from promptlauncher.gui import PromptWindow
-from promptlauncher.tray import create_tray
-from promptlauncher.hotkey import get_custom_hotkey
+from typing import TYPE_CHECKING
+from concurrent.futures import ThreadPoolExecutor
+from PyQt6.QtCore import QCoreApplication, QObject, QTimer, pyqtSignal
+from PyQt6.QtNetwork import QLocalServer
 from promptlauncher.ssh_backup import SshBackupManager
 from promptlauncher.logging_config import setup_logging
+from promptlauncher.paths import CONFIG_PATH, DATA_PATH, ICON_FILE
+from promptlauncher.ipc import INSTANCE_KEY, IpcError, send_activate, server_name
+from promptlauncher.ipc_server import IpcServer
+from promptlauncher.service import PromptService
+from promptlauncher import metrics
+from promptlauncher.chords import (
+    DEFAULT_HOTKEY, DEFAULT_TIMEOUT, KEY_NAMES, MODIFIERS, ChordDispatcher, ChordTrie,
+    normalize_stroke, parse_sequence, starts_with,
+)
+
+# 界面相关模块（QtWidgets、keyboard 等）在 run_gui 中才导入，
+# 守护进程模式在没有显示器的机器上也能运行
+if TYPE_CHECKING:
+    from promptlauncher.gui import PromptWindow
 
 logger = logging.getLogger(__name__)
 
-BASE = getattr(sys, "frozen", False) and os.path.dirname(sys.executable) or os.path.dirname(__file__)
-CONFIG_PATH = os.path.join(BASE, ".config")
-DATA_PATH   = os.path.join(BASE, "prompt.json")
-ICON_FILE   = os.path.join(BASE, "icon.png")
-INSTANCE_KEY = 'PromptLauncherSingleton'
+# 守护进程模式下未保存修改的写盘间隔（毫秒）与工作线程数
+DAEMON_FLUSH_MS = 1000
+DAEMON_WORKERS = 4
+
 
 class ConfigManager:
     def __init__(self, path):
@@ -40,66 +51,174 @@ class ConfigManager:
 
     @property
     def hotkey(self):
-        return self.cfg.get("hotkey", "ctrl+alt+p").lower()
+        return self.cfg.get("hotkey", DEFAULT_HOTKEY).lower()
 
     @hotkey.setter
     def hotkey(self, seq):
         self.cfg["hotkey"] = seq.lower()
 
-def init_single_instance(key: str):
+    @property
+    def hotkey_mode(self):
+        return self.cfg.get("hotkey_mode", "window")
+
+    @hotkey_mode.setter
+    def hotkey_mode(self, mode):
+        self.cfg["hotkey_mode"] = mode
+
+def init_single_instance(key: str, notify: bool = True):
     """Ensure only one instance of the app runs.
 
-    On Windows we keep the previous mutex based approach. On other
-    platforms, ``QLocalServer`` itself is enough to detect another
-    running instance.  If another instance is found we notify it via
-    ``QLocalSocket`` and exit.
+    ``python -m promptlauncher`` already tries to activate a running
+    instance before importing Qt; this is the fallback for other entry
+    points and for races between two launches.  On Windows we keep the
+    previous mutex based approach.  On other platforms, ``QLocalServer``
+    itself is enough to detect another running instance.  If another
+    instance is found we notify it (unless ``notify`` is false) and exit.
+    :class:`IpcError` propagates when that instance has no window to show.
     """
 
+    channel = server_name(key)
     if os.name == "nt":
         mutex = ctypes.windll.kernel32.CreateMutexW(None, False, key)
         is_primary = ctypes.windll.kernel32.GetLastError() != 183
-        channel = key + "_IPC"
         if not is_primary:
-            sock = QLocalSocket()
-            sock.connectToServer(channel)
-            if sock.waitForConnected(500):
-                sock.write(b"activate")
-                sock.flush()
-            sys.exit(0)
+            if notify:
+                send_activate(key)
+            else:
+                logger.error("another instance is already running")
+            sys.exit(0 if notify else 1)
         # Remove stale server and start listening
         QLocalServer.removeServer(channel)
         server = QLocalServer()
         server.listen(channel)
         return server
 
-    # Non-Windows: use QLocalServer alone
-    QLocalServer.removeServer(key)
+    # Non-Windows: use QLocalServer alone.  Only remove the socket file
+    # after checking nobody answers on it, otherwise we would unlink the
+    # socket of the running instance.
+    if _instance_running(key, notify):
+        sys.exit(0 if notify else 1)
+    QLocalServer.removeServer(channel)
     server = QLocalServer()
-    if not server.listen(key):
-        sock = QLocalSocket()
-        sock.connectToServer(key)
-        if sock.waitForConnected(500):
-            sock.write(b"activate")
-            sock.flush()
-        sys.exit(0)
+    if not server.listen(channel):
+        _instance_running(key, notify)
+        sys.exit(0 if notify else 1)
     return server
 
-class HotkeyManager:
-    def __init__(self, cfg: ConfigManager, window: PromptWindow):
+
+def _instance_running(key: str, notify: bool) -> bool:
+    if notify:
+        return send_activate(key)
+    from promptlauncher.ipc import IpcClient
+    try:
+        IpcClient.connect(key, 0.5).close()
+    except OSError:
+        return False
+    logger.error("another instance is already running")
+    return True
+
+class HotkeyManager(QObject):
+    """全局热键与每条 Prompt 的快捷键。
+
+    只安装一个 ``keyboard.hook``：按键在钩子线程里经 :class:`ChordDispatcher`
+    查前缀树，匹配后只发出信号，由 Qt 以排队连接交给界面线程执行，
+    钩子线程从不做复制、计数或写盘，不会拖慢系统输入。
+
+    主热键打开的是主窗口还是快速选择框由配置 ``hotkey_mode``
+    （"window" / "quick_pick"）决定；Prompt 快捷键保存在各条 Prompt 的
+    元数据 ``hotkey`` 中，如 ``"ctrl+alt+g, 3"``。以主热键开头的 Prompt 快捷键
+    会让每次按主热键都等到和弦超时才响应，重建时跳过。
+    """
+    TOGGLE = "toggle"
+
+    # perf_counter_ns() 超出 32 位，int 类型的信号参数会被截断
+    triggered = pyqtSignal(object)
+    prompt_triggered = pyqtSignal(str, str)
+
+    def __init__(self, cfg: ConfigManager, window: "PromptWindow", quick_pick=None):
+        super().__init__()
         self.cfg = cfg
         self.window = window
+        self.quick_pick = quick_pick
         self.handle = None
+        self._mods: set[str] = set()
+        self._down: set[str] = set()
+        self.dispatcher = ChordDispatcher(ChordTrie(), self._fire,
+                                          cfg.cfg.get("chord_timeout", DEFAULT_TIMEOUT))
+        self.triggered.connect(self._on_triggered)
+        self.prompt_triggered.connect(self._on_prompt)
+        window.hotkeys_changed.connect(self.rebuild)
         self.register(self.cfg.hotkey)
 
-    def _toggle(self):
-        QTimer.singleShot(0, self.window.toggle_window)
+    def _toggle(self, t0: int | None = None):
+        # 钩子线程：t0 为热键第一键按下的时刻，用于测量到首帧绘制的延迟
+        self.triggered.emit(t0 or time.perf_counter_ns())
+
+    def _on_triggered(self, t0: int):
+        if self.quick_pick is not None and self.cfg.hotkey_mode == "quick_pick":
+            self.quick_pick.toggle(t0)
+        else:
+            self.window.toggle_window(t0)
 
     def register(self, seq: str):
-        if self.handle:
-            keyboard.remove_hotkey(self.handle)
-        self.handle = keyboard.add_hotkey(seq, self._toggle)
+        """设置主热键并重建全部绑定；首次调用时安装键盘钩子"""
+        self.rebuild(seq)
+        if self.handle is None:
+            import keyboard
+            self.handle = keyboard.hook(self._on_key)
+
+    def rebuild(self, main_seq: str | None = None):
+        """按当前数据重建前缀树（Prompt 快捷键增删改后调用）"""
+        trie = ChordTrie()
+        main = parse_sequence(main_seq or self.cfg.hotkey)
+        trie.add(main, self.TOGGLE)
+        for seq, group, alias in self.window.controller.prompt_hotkeys():
+            try:
+                strokes = parse_sequence(seq)
+                if starts_with(strokes, main):
+                    raise ValueError(f"{seq} starts with the main hotkey")
+                trie.add(strokes, (group, alias))
+            except ValueError as e:
+                logger.warning(f"ignoring hotkey of {group}/{alias}: {e}")
+        # 整体替换，钩子线程下一次按键即使用新树
+        self.dispatcher.trie = trie
+        self.dispatcher.reset()
+
+    def _on_key(self, event):
+        # 钩子线程：只维护修饰键状态并查表
+        t0 = time.perf_counter_ns()
+        name = (event.name or "").lower()
+        mod = MODIFIERS.get(name)
+        if event.event_type == "up":
+            if mod:
+                self._mods.discard(mod)
+            self._down.discard(name)
+            return
+        if mod:
+            self._mods.add(mod)
+            return
+        if not name or name in self._down:
+            return  # 按住不放产生的重复按键
+        self._down.add(name)
+        key = KEY_NAMES.get(name, name)
+        self.dispatcher.feed(normalize_stroke("+".join([*self._mods, key])), t0)
+
+    def _fire(self, action, t0: int | None = None):
+        if action == self.TOGGLE:
+            self._toggle(t0)
+        else:
+            self.prompt_triggered.emit(*action)
+
+    def _on_prompt(self, group: str, alias: str):
+        if self.window.model.get_record(group, alias) is None:
+            # Prompt 已被改名或删除：重建绑定
+            logger.warning(f"hotkey target {group}/{alias} no longer exists")
+            self.rebuild()
+            return
+        self.window.copy_prompt(group, alias)
 
     def on_custom(self):
+        from promptlauncher.hotkey import get_custom_hotkey
         new_seq = get_custom_hotkey(self.window)
         if not new_seq:
             return
@@ -107,35 +226,201 @@ class HotkeyManager:
         self.cfg.hotkey = new_seq
         return new_seq
 
-def main():
+def start_metrics(cfg: dict, model) -> QTimer:
+    """按配置 ``metrics.log_interval``（秒）定期把统计写入日志"""
+    mcfg = cfg.get("metrics", {})
+    metrics.gauge("model.prompts", lambda: sum(len(recs) for recs in model.records.values()))
+    timer = QTimer()
+    # 统计可在诊断对话框中随时开关，定时器始终运行，未启用时跳过
+    timer.timeout.connect(
+        lambda: metrics.enabled() and logger.info("metrics\n" + metrics.format_report(metrics.snapshot()))
+    )
+    interval = int(mcfg.get("log_interval", 300))
+    if interval > 0:
+        timer.start(interval * 1000)
+    return timer
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="promptlauncher")
+    ap.add_argument("--daemon", action="store_true",
+                    help="run without GUI: serve the prompt library over local IPC only")
+    ap.add_argument("--data", default=DATA_PATH, help="prompt data file (default: %(default)s)")
+    # 其余参数（如 Qt 的 -platform）留给 QApplication
+    args, _ = ap.parse_known_args(sys.argv[1:] if argv is None else argv)
     setup_logging()
+    if args.daemon:
+        sys.exit(run_daemon(args.data))
+    run_gui(args.data)
+
+def run_daemon(data_path: str = DATA_PATH) -> int:
+    """Serve the prompt library, usage counting and SSH backup without any window."""
+    from promptlauncher.controller import PromptController
+    from promptlauncher.locks import RWLock
+    from promptlauncher.model import PromptModel
+    from promptlauncher.mirror import MarkdownMirror
+
+    logger.info("PromptLauncher daemon starting")
+    app = QCoreApplication(sys.argv)
+    cfg_mgr = ConfigManager(CONFIG_PATH)
+    # 在加载数据之前开启，以便统计首次加载耗时
+    if cfg_mgr.cfg.get("metrics", {}).get("enabled"):
+        metrics.enable()
+    server = init_single_instance(INSTANCE_KEY, notify=False)
+
+    model = PromptModel(data_path, cfg_mgr.cfg.get("data_format"))
+    # 计数等修改先只改内存，由定时器合并写盘，避免每个请求都重写整个文件
+    model.autosave = False
+    lock = RWLock()
+    # Markdown 镜像随合并写盘一起更新，外部修改按间隔导入
+    mirror_cfg = cfg_mgr.cfg.get("mirror", {})
+    mirror = None
+    if mirror_cfg.get("path"):
+        mirror = MarkdownMirror(mirror_cfg["path"], model.path + ".mirror.json")
+        mirror.attach(model)
+        mirror.start()
+    service = PromptService(PromptController(model), lock=lock)
+    pool = ThreadPoolExecutor(DAEMON_WORKERS, thread_name_prefix="ipc")
+    ipc_server = IpcServer(server, service, app, executor=pool)
+    metrics_timer = start_metrics(cfg_mgr.cfg, model)
+
+    def flush():
+        with lock.write_locked():
+            try:
+                model.flush()
+            except OSError:
+                logger.error("saving prompt data failed", exc_info=True)
+
+    flush_timer = QTimer()
+    flush_timer.timeout.connect(lambda: model.dirty and pool.submit(flush))
+    flush_timer.start(DAEMON_FLUSH_MS)
+
+    def scan_mirror():
+        with lock.write_locked():
+            try:
+                mirror.scan()
+                model.flush()
+            except OSError:
+                logger.error(f"could not scan mirror {mirror.root}", exc_info=True)
+
+    if mirror is not None:
+        mirror_timer = QTimer()
+        mirror_timer.timeout.connect(lambda: pool.submit(scan_mirror))
+        mirror_timer.start(int(mirror_cfg.get("scan_s", 30) * 1000))
+
+    ssh_cfg = cfg_mgr.cfg.get("ssh", {})
+    if ssh_cfg.get("host"):
+        backup_mgr = SshBackupManager(ssh_cfg, data_path)
+
+    # Qt 事件循环中 Python 无法及时处理信号，用空定时器定期让出控制权
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: app.quit())
+    wake = QTimer()
+    wake.timeout.connect(lambda: None)
+    wake.start(200)
+
+    logger.info(f"serving {data_path} on {server.fullServerName()}")
+    ret = app.exec()
+    server.close()
+    pool.shutdown(wait=True)
+    flush()
+    if mirror is not None:
+        mirror.close()
+    model.save_semantic_index()
+    model.close()
+    logger.info("PromptLauncher daemon exiting")
+    return ret
+
+def run_gui(data_path: str = DATA_PATH):
+    from PyQt6.QtWidgets import QApplication, QMessageBox
+    from PyQt6.QtGui import QIcon
+    from promptlauncher.gui import PromptWindow
+    from promptlauncher.tray import create_tray
+    from promptlauncher.widgets import QuickPickPopup
+    from promptlauncher.dialogs import DiagnosticsDialog
+
     logger.info("PromptLauncher starting")
     app = QApplication(sys.argv)
     app.setQuitOnLastWindowClosed(False)
     app.setWindowIcon(QIcon(ICON_FILE))
 
     cfg_mgr = ConfigManager(CONFIG_PATH)
-    window  = PromptWindow(cfg_mgr.cfg, DATA_PATH)
+    # 在加载数据之前开启，以便统计首次加载耗时
+    if cfg_mgr.cfg.get("metrics", {}).get("enabled"):
+        metrics.enable()
+    window  = PromptWindow(cfg_mgr.cfg, data_path)
+    # 记录交互轨迹，供 benchmarks/gui_harness.py 离线回放
+    trace_path = os.environ.get("PROMPTLAUNCHER_TRACE")
+    if trace_path:
+        from promptlauncher.trace import TraceRecorder
+        window.tracer = TraceRecorder(trace_path)
+        app.aboutToQuit.connect(window.tracer.close)
+        logger.info(f"recording interaction trace to {trace_path}")
 
     # 初始化定时 SSH 备份管理
     ssh_cfg = cfg_mgr.cfg.get("ssh", {})
     if ssh_cfg.get("host"):
         # 把 window 传给备份管理，以便更新同步状态
-        backup_mgr = SshBackupManager(ssh_cfg, DATA_PATH, window)
+        backup_mgr = SshBackupManager(ssh_cfg, data_path, window)
+        window.backup = backup_mgr
 
     # 单例检查并启动 IPC 服务，返回服务实例
-    server = init_single_instance(INSTANCE_KEY)
-    # 连接 IPC 唤醒（收到 activate 信号时显示主窗口）
-    server.newConnection.connect(lambda: window.show_window())
+    try:
+        server = init_single_instance(INSTANCE_KEY)
+    except IpcError as e:
+        # 守护进程占用了单例 socket 且没有窗口可显示，不能再启动一个界面实例
+        logger.error(f"a windowless instance is already running: {e}")
+        QMessageBox.critical(
+            None, "PromptLauncher",
+            "PromptLauncher 已以守护进程（--daemon）模式运行，无法显示窗口。\n"
+            "请先停止守护进程，再启动界面。"
+        )
+        sys.exit(1)
+    # IPC 服务：activate 唤醒主窗口，其余命令供命令行客户端查询/复制 Prompt
+    service = PromptService(
+        window.controller,
+        activate=window.show_window,
+        set_clipboard=lambda text: QApplication.clipboard().setText(text),
+        on_reload=window.reload_tabs,
+        on_usage=window.refresh_prompt,
+    )
+    ipc_server = IpcServer(server, service, app)
+    # 数据在后台加载：需要数据的 IPC 请求等加载完成后再处理
+    if not window.is_loaded:
+        ipc_server.hold()
+        window.loaded.connect(ipc_server.release)
+    metrics_timer = start_metrics(cfg_mgr.cfg, window.model)
+    metrics.gauge("ui.widgets", lambda: len(QApplication.allWidgets()))
+
+    # 快速选择框启动时就建好并保持隐藏，热键只负责显示
+    quick_pick = QuickPickPopup(window.model, window.copy_prompt)
+    quick_pick.setFont(window.font())
+    quick_pick.prewarm()
+    # 加载完成、删除或改名 Prompt/分组后都会发出：预先算好的结果随之重算
+    window.hotkeys_changed.connect(quick_pick.refresh)
 
-    hot_mgr = HotkeyManager(cfg_mgr, window)
+    hot_mgr = HotkeyManager(cfg_mgr, window, quick_pick)
     tray = create_tray(
         app,
         window.show_window,
         hot_mgr.cfg.hotkey.upper(),
         lambda: on_custom_wrapper(hot_mgr, tray, cfg_mgr),
+        import_cb=window.import_prompts,
+        export_cb=window.export_prompts,
+        quick_pick=cfg_mgr.hotkey_mode == "quick_pick",
+        quick_pick_cb=lambda on: setattr(cfg_mgr, "hotkey_mode", "quick_pick" if on else "window"),
+        diagnostics_cb=lambda: DiagnosticsDialog(window).exec(),
+        update_cfg=cfg_mgr.cfg.get("update", {}),
+        duplicates_cb=window.find_duplicates,
+        restore_cb=window.restore_backup,
     )
     app.aboutToQuit.connect(cfg_mgr.save)
+    # 写入尚未落盘的使用计数
+    app.aboutToQuit.connect(window.model.flush)
+    app.aboutToQuit.connect(window.model.save_semantic_index)
+    app.aboutToQuit.connect(window.preview.shutdown)
+    app.aboutToQuit.connect(window.stats.save)
+    if window.mirror is not None:
+        app.aboutToQuit.connect(window.mirror.close)
 
     window.show_window()
     ret = app.exec()
@@ -0,0 +1,170 @@
+"""Lightweight counters and latency histograms for the hot paths.
+
+Metrics are off by default.  While disabled, :func:`incr` and
+:func:`observe` return after one global check and :func:`timer` hands out
+a shared no-op context manager, so instrumented code pays next to nothing.
+Enable them with the ``metrics`` config section or the
+``PROMPTLAUNCHER_METRICS=1`` environment variable.
+
+Names are dotted strings (``model.save_ms``).  Histograms take
+milliseconds and keep fixed log-spaced buckets, so memory does not grow
+with the number of samples.  The data is exposed by :func:`snapshot`,
+which the diagnostics dialog, the periodic log dump and the IPC
+``metrics`` command all use.
+"""
+import os
+import bisect
+import threading
+import time
+from contextlib import nullcontext
+from typing import Callable
+
+# 桶上界（毫秒）：0.01ms 到约 80s，每档约 1.5 倍
+BUCKETS = tuple(0.01 * 1.5 ** i for i in range(40))
+
+_enabled = os.environ.get("PROMPTLAUNCHER_METRICS", "") not in ("", "0")
+_lock = threading.Lock()
+_started = time.monotonic()
+_counters: dict[str, int] = {}
+_histograms: dict[str, "Histogram"] = {}
+_gauges: dict[str, Callable[[], float]] = {}
+_NULL = nullcontext()
+
+
+class Histogram:
+    __slots__ = ("counts", "count", "total", "min", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+
+    def add(self, ms: float):
+        self.counts[bisect.bisect_left(BUCKETS, ms)] += 1
+        self.count += 1
+        self.total += ms
+        if ms < self.min:
+            self.min = ms
+        if ms > self.max:
+            self.max = ms
+
+    def percentile(self, q: float) -> float:
+        """Upper bound of the bucket holding the ``q`` quantile (clamped to the max)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank and n:
+                return min(BUCKETS[i] if i < len(BUCKETS) else self.max, self.max)
+        return self.max
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "p50": self.percentile(0.5),
+            "p95": self.percentile(0.95),
+            "p99": self.percentile(0.99),
+            "max": self.max,
+        }
+
+
+class _Timer:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.name, (time.perf_counter() - self.start) * 1000)
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def enable(on: bool = True):
+    global _enabled
+    _enabled = on
+
+
+def incr(name: str, n: int = 1):
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + n
+
+
+def observe(name: str, ms: float):
+    """Record one latency sample in milliseconds."""
+    if not _enabled:
+        return
+    with _lock:
+        hist = _histograms.get(name)
+        if hist is None:
+            hist = _histograms[name] = Histogram()
+        hist.add(ms)
+
+
+def timer(name: str):
+    """``with metrics.timer("model.save_ms"): ...`` records the block's duration."""
+    return _Timer(name) if _enabled else _NULL
+
+
+def gauge(name: str, fn: Callable[[], float]):
+    """Register a value that is read when a snapshot is taken (e.g. widget counts)."""
+    _gauges[name] = fn
+
+
+def reset():
+    global _started
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+        _started = time.monotonic()
+
+
+def snapshot() -> dict:
+    uptime = time.monotonic() - _started
+    with _lock:
+        counters = dict(_counters)
+        histograms = {name: h.summary() for name, h in _histograms.items()}
+    gauges = {}
+    for name, fn in list(_gauges.items()):
+        try:
+            gauges[name] = fn()
+        except Exception:  # 采样失败不影响其他指标
+            gauges[name] = None
+    return {
+        "enabled": _enabled,
+        "uptime_s": uptime,
+        "counters": counters,
+        "rates_per_min": {k: v * 60 / uptime for k, v in counters.items()} if uptime else {},
+        "histograms": histograms,
+        "gauges": gauges,
+    }
+
+
+def format_report(snap: dict) -> str:
+    """Plain text table of a snapshot, for the log and the diagnostics dialog."""
+    if not snap["enabled"]:
+        return "metrics disabled"
+    lines = [f"uptime {snap['uptime_s']:.0f}s"]
+    for name, value in sorted(snap["counters"].items()):
+        lines.append(f"{name:<28} {value:>10}  ({snap['rates_per_min'].get(name, 0):.2f}/min)")
+    for name, value in sorted(snap["gauges"].items()):
+        lines.append(f"{name:<28} {value!s:>10}")
+    if snap["histograms"]:
+        lines.append(f"{'latency (ms)':<28} {'count':>10} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}")
+        for name, h in sorted(snap["histograms"].items()):
+            lines.append(f"{name:<28} {h['count']:>10} {h['p50']:>8.2f} {h['p95']:>8.2f} "
+                         f"{h['p99']:>8.2f} {h['max']:>8.2f}")
+    return "\n".join(lines)
@@ -0,0 +1,313 @@
+"""Mirror the prompt library as a folder of Markdown files.
+
+The layout is the same as a ``md`` pack (see :mod:`packio`): one folder
+per group and one ``.md`` file per prompt.  Only the alias goes in the
+front matter.  Usage counts change on every copy and would make every use
+a diff, so they are left out.
+
+The mirror is attached to a :class:`PromptModel`.  The model marks the
+prompts whose text changed, was moved or was deleted, and each model save
+touches only those files.  A manifest remembers the path, the CRC32 of
+the text and the ``mtime``/size of every file.  An unchanged prompt is
+therefore never rewritten.  A rename or move whose text is unchanged
+becomes a file move (a group rename moves the whole folder's files), and
+a deleted prompt removes its file.
+
+Edits made to the files are imported back by :meth:`MarkdownMirror.scan`.
+It stats every file with ``os.scandir`` and only reads files whose
+``mtime`` or size differ from the manifest.  The manifest is kept next to
+the data file and is written on :meth:`close`.  A stale manifest (after a
+crash) only costs a few extra reads, because imported text is compared
+with the model before anything changes.
+"""
+import os
+import json
+import logging
+from typing import NamedTuple
+
+from .packio import format_markdown, parse_markdown, safe_filename
+from .semantic import text_crc
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+_GROUP, _ALIAS, _CRC, _MTIME, _SIZE = range(5)
+
+
+class MirrorScan(NamedTuple):
+    added: int
+    updated: int
+    deleted: int
+
+
+class MarkdownMirror:
+    """Markdown folder kept in step with a model (``model.mirror``)."""
+    def __init__(self, root: str, state_path: str | None = None):
+        self.root = os.path.abspath(root)
+        self.state_path = state_path
+        self.model = None
+        # 相对路径 -> [分组, 别名, 正文 CRC, mtime_ns, 大小]
+        self._files: dict[str, list] = {}
+        self._path_of: dict[tuple[str, str], str] = {}
+        self._names: dict[str, set[str]] = {}
+        self._dir_of: dict[str, str] = {}
+        self._group_of_dir: dict[str, str] = {}
+        self._dirty: set[tuple[str, str]] = set()
+        self.writes = 0
+
+    def attach(self, model):
+        """Receive change marks from ``model``; call :meth:`start` once it is loaded."""
+        self.model = model
+        model.mirror = self
+        self._load_state()
+
+    def start(self) -> MirrorScan:
+        """Import edits made to the files, then write whatever the files lack."""
+        result = self.scan()
+        self.sync()
+        self.save_state()
+        return result
+
+    def close(self):
+        self.flush()
+        self.save_state()
+
+    # ---------- model -> files ----------
+    def mark(self, group: str, alias: str):
+        self._dirty.add((group, alias))
+
+    def sync(self):
+        """Check every prompt and every mirrored file, not just the marked ones."""
+        self._dirty.update(self._path_of)
+        for group, recs in self.model.records.items():
+            self._dirty.update((group, alias) for alias in recs)
+        self.flush()
+
+    def flush(self):
+        """Write the marked prompts: changed files, moves and removals."""
+        if not self._dirty:
+            return
+        keys, self._dirty = self._dirty, set()
+        model = self.model
+        gone: dict[int, list] = {}
+        changed = []
+        with metrics.timer("mirror.flush_ms"):
+            for key in keys:
+                rec = model.get_record(*key)
+                rel = self._path_of.get(key)
+                if rec is None:
+                    if rel is not None:
+                        gone.setdefault(self._files[rel][_CRC], []).append((key, rel))
+                    continue
+                text = model.text_of(rec)
+                crc = text_crc(text)
+                if rel is None or self._files[rel][_CRC] != crc:
+                    changed.append((key, text, crc))
+            for key, text, crc in changed:
+                # 正文不变的改名/移动：移动文件而不是写新文件再删旧文件
+                if key not in self._path_of and gone.get(crc):
+                    self._move(*gone[crc].pop(), key, text, crc)
+                else:
+                    self._write(key, text, crc)
+            for entries in gone.values():
+                for _, rel in entries:
+                    self._remove(rel)
+
+    def _abs(self, rel: str) -> str:
+        return os.path.join(self.root, *rel.split("/"))
+
+    def _group_dir(self, group: str) -> str:
+        folder = self._dir_of.get(group)
+        if folder is None:
+            base = folder = safe_filename(group)
+            i = 2
+            while folder.lower() in (d.lower() for d in self._group_of_dir):
+                folder = f"{base} ({i})"
+                i += 1
+            self._dir_of[group] = folder
+            self._group_of_dir[folder] = group
+        return folder
+
+    def _new_path(self, group: str, alias: str) -> str:
+        folder = self._group_dir(group)
+        used = self._names.get(folder, ())
+        base = name = safe_filename(alias)
+        i = 2
+        while name.lower() in used:
+            name = f"{base} ({i})"
+            i += 1
+        return f"{folder}/{name}.md"
+
+    def _register(self, rel: str, entry: list):
+        folder, name = rel.split("/", 1)
+        self._files[rel] = entry
+        self._path_of[(entry[_GROUP], entry[_ALIAS])] = rel
+        self._names.setdefault(folder, set()).add(name[:-3].lower())
+        if folder not in self._group_of_dir:
+            self._group_of_dir[folder] = entry[_GROUP]
+            self._dir_of[entry[_GROUP]] = folder
+
+    def _unregister(self, rel: str) -> list:
+        entry = self._files.pop(rel)
+        key = (entry[_GROUP], entry[_ALIAS])
+        if self._path_of.get(key) == rel:
+            del self._path_of[key]
+        folder, name = rel.split("/", 1)
+        names = self._names.get(folder)
+        if names is not None:
+            names.discard(name[:-3].lower())
+            if not names:
+                # 文件夹空了：释放文件夹名，以后可分给其他分组
+                del self._names[folder]
+                group = self._group_of_dir.pop(folder, None)
+                if self._dir_of.get(group) == folder:
+                    del self._dir_of[group]
+        return entry
+
+    def _stat_entry(self, key: tuple[str, str], crc: int, rel: str) -> list:
+        st = os.stat(self._abs(rel))
+        return [key[0], key[1], crc, st.st_mtime_ns, st.st_size]
+
+    def _write(self, key: tuple[str, str], text: str, crc: int):
+        rel = self._path_of.get(key) or self._new_path(*key)
+        path = self._abs(rel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, 'w', encoding='utf-8', newline='') as f:
+            f.write(format_markdown(key[1], text))
+        os.replace(tmp, path)
+        self.writes += 1
+        self._register(rel, self._stat_entry(key, crc, rel))
+
+    def _move(self, old_key: tuple[str, str], old_rel: str, key: tuple[str, str], text: str, crc: int):
+        self._unregister(old_rel)
+        rel = self._new_path(*key)
+        path = self._abs(rel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            os.replace(self._abs(old_rel), path)
+        except FileNotFoundError:
+            pass
+        self._prune_dir(old_rel)
+        if old_key[1] != key[1] or not os.path.exists(path):
+            # 别名写在文件头里，改名后还要重写内容
+            self._path_of[key] = rel
+            self._write(key, text, crc)
+        else:
+            self._register(rel, self._stat_entry(key, crc, rel))
+
+    def _remove(self, rel: str):
+        self._unregister(rel)
+        try:
+            os.remove(self._abs(rel))
+        except FileNotFoundError:
+            pass
+        self._prune_dir(rel)
+
+    def _prune_dir(self, rel: str):
+        try:
+            os.rmdir(os.path.dirname(self._abs(rel)))
+        except OSError:
+            pass
+
+    # ---------- files -> model ----------
+    def scan(self) -> MirrorScan:
+        """Import files added, edited or deleted outside the app."""
+        added = updated = deleted = 0
+        model = self.model
+        seen = set()
+        os.makedirs(self.root, exist_ok=True)
+        with metrics.timer("mirror.scan_ms"), model.batch():
+            with os.scandir(self.root) as folders:
+                folder_entries = [e for e in folders if e.is_dir() and not e.name.startswith(".")]
+            for folder in folder_entries:
+                with os.scandir(folder.path) as files:
+                    for f in files:
+                        if not f.name.endswith(".md") or not f.is_file():
+                            continue
+                        rel = f"{folder.name}/{f.name}"
+                        seen.add(rel)
+                        st = f.stat()
+                        entry = self._files.get(rel)
+                        if entry is not None and entry[_MTIME] == st.st_mtime_ns and entry[_SIZE] == st.st_size:
+                            continue
+                        with open(f.path, 'r', encoding='utf-8', newline='') as fh:
+                            meta, text = parse_markdown(fh.read())
+                        group = entry[_GROUP] if entry else self._group_of_dir.get(folder.name, folder.name)
+                        alias = str(meta.get("alias") or "").strip() or f.name[:-3]
+                        old_alias = entry[_ALIAS] if entry else alias
+                        if entry is not None:
+                            self._unregister(rel)
+                        copied = self._taken(group, alias, rel)
+                        if copied:
+                            # 复制出来的文件：作为新条目导入，不接管原文件对应的 Prompt
+                            alias = self._free_alias(group, alias)
+                            if entry is None:
+                                old_alias = alias
+                        rec = model.get_record(group, old_alias)
+                        if rec is None:
+                            model.add_prompt(group, alias, text)
+                            added += 1
+                        elif old_alias != alias or model.text_of(rec) != text:
+                            model.update_prompt(group, old_alias, alias, text)
+                            updated += 1
+                        crc = text_crc(text)
+                        self._register(rel, [group, alias, crc, st.st_mtime_ns, st.st_size])
+                        if copied:
+                            # 文件头写上新别名，之后再编辑这个文件也不会与原文件冲突
+                            self._write((group, alias), text, crc)
+            for rel in [r for r in self._files if r not in seen]:
+                group, alias, crc = self._unregister(rel)[:3]
+                if (group, alias) in self._path_of:
+                    # 还有别的文件对应该条（文件只是在镜像里改了名）
+                    continue
+                rec = model.get_record(group, alias)
+                # 只在应用内没有改过该条时才删除，否则下次同步重新写出文件
+                if rec is not None and text_crc(model.text_of(rec)) == crc:
+                    model.delete_prompt(group, alias)
+                    deleted += 1
+        if added or updated or deleted:
+            logger.info(f"mirror import: {added} added, {updated} updated, {deleted} deleted")
+        return MirrorScan(added, updated, deleted)
+
+    def _taken(self, group: str, alias: str, rel: str) -> bool:
+        """别名是否已对应另一个仍存在的文件"""
+        other = self._path_of.get((group, alias))
+        return other is not None and other != rel and os.path.exists(self._abs(other))
+
+    def _free_alias(self, group: str, alias: str) -> str:
+        recs = self.model.records.get(group, {})
+        i = 2
+        while True:
+            name = f"{alias} ({i})"
+            if name not in recs and (group, name) not in self._path_of:
+                return name
+            i += 1
+
+    # ---------- manifest ----------
+    def _load_state(self):
+        if not self.state_path:
+            return
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError):
+            logger.warning("ignoring unreadable mirror manifest", exc_info=True)
+            return
+        if state.get("root") != self.root:
+            return
+        for rel, entry in state.get("files", {}).items():
+            self._register(rel, entry)
+
+    def save_state(self):
+        if not self.state_path:
+            return
+        tmp = self.state_path + ".tmp"
+        try:
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump({"root": self.root, "files": self._files}, f, ensure_ascii=False)
+            os.replace(tmp, self.state_path)
+        except OSError:
+            logger.warning("could not write mirror manifest", exc_info=True)
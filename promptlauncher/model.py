@@ -1,80 +1,748 @@
 import os
-import json
+import sys
+import heapq
+import threading
+from contextlib import contextmanager
+from .packfile import PackReader, MAGIC as PACK_MAGIC, write_pack
+from .records import PromptRecord, MetaRecord, TextView, CountView
+from .similarity import SimilarityIndex, sketch, THRESHOLD as SIMILARITY_THRESHOLD
+from .semantic import SemanticIndex
+from .templates import Template, TemplateCache
+from . import storage, metrics
+
+# 支持的存储格式：json 为默认的可读格式，其余为紧凑/压缩/二进制编码，
+# pack 为正文按需读取的二进制格式
+FORMATS = tuple(storage.CODECS) + ("pack",)
+
+_RECORD_KEYS = frozenset(("text", "count", "meta"))
+
+
+def _record_hook(obj: dict):
+    if isinstance(obj.get('text'), str) and obj.keys() <= _RECORD_KEYS:
+        return PromptRecord(obj['text'], obj.get('count', 0), obj.get('meta'))
+    return obj
+
+def detect_format(path: str) -> str:
+    """Return the storage format of ``path`` judged by its first bytes."""
+    with open(path, 'rb') as f:
+        head = f.read(16)
+    if head.startswith(PACK_MAGIC):
+        return "pack"
+    return storage.detect(head)
+
 
 class PromptModel:
-    """Model for loading and saving prompt data."""
-    def __init__(self, path: str):
+    """Model for loading and saving prompt data.
+
+    Prompts live in ``records[group][alias]`` as :class:`PromptRecord`
+    objects.  ``prompt_dict`` and ``usage_counts`` are views over the same
+    records for callers that expect the old nested dicts.
+
+    ``fmt`` selects the on-disk format used by :meth:`save` (one of
+    :data:`FORMATS`).  The format of an existing file is detected from its
+    magic bytes; by default it is kept, passing a different one migrates the
+    file on load.
+
+    With ``autosave`` switched off, mutations only mark the model dirty and
+    the caller decides when to :meth:`flush` (the daemon does so on a timer).
+
+    :meth:`similar_prompts` and :meth:`duplicate_clusters` use a MinHash
+    index over the prompt bodies, and :meth:`semantic_search` a TF-IDF index
+    that is saved next to the data file.  Both are built or loaded on first
+    use and then kept up to date by the mutating methods.
+
+    ``load=False`` leaves the model empty so the caller can load it in
+    steps (:meth:`begin_load`, :meth:`read_groups`, :meth:`finish_load`),
+    e.g. from a worker thread.  Until the load finishes, saves only mark
+    the model dirty.
+
+    When a :class:`~promptlauncher.history.History` is attached as
+    ``history``, every edit reports the prior state of what it touches and
+    each save closes one undo step.  An attached ``mirror`` or ``stats``
+    index is told which prompts changed.
+    """
+    def __init__(self, path: str, fmt: str | None = None, load: bool = True):
+        if fmt is not None and fmt != "pack":
+            storage.get_codec(fmt)
         self.path = path
-        self.prompt_dict: dict[str, dict[str, str]] = {}
-        self.usage_counts: dict[str, dict[str, int]] = {}
-        self.load()
+        self.format = fmt
+        self.records: dict[str, dict[str, PromptRecord]] = {}
+        self.prompt_dict = TextView(self)
+        self.usage_counts = CountView(self)
+        self._pack: PackReader | None = None
+        self._similar: SimilarityIndex | None = None
+        self._similar_build: list | None = None
+        self._semantic: SemanticIndex | None = None
+        self._semantic_build: list | None = None
+        self._semantic_lock = threading.Lock()
+        # 已解析的模板（LRU），正文变化时失效
+        self.templates = TemplateCache()
+        # 撤销记录（history.History），修改前接收变更报告
+        self.history = None
+        # Markdown 镜像（mirror.MarkdownMirror），保存时只写有变化的文件
+        self.mirror = None
+        # 字数/token 统计（stats.StatsIndex），按正文哈希缓存
+        self.stats = None
+        self.autosave = True
+        # 批处理状态：嵌套深度、是否有待写入的修改、被修改分组的原始数据
+        self._batch_depth = 0
+        self._dirty = False
+        self._journal: dict[str, dict[str, tuple] | None] = {}
+        self._journal_order: list[str] = []
+        # 正在读取的文件格式；为 None 表示没有进行中的加载
+        self._loading: str | None = None
+        if load:
+            self.load()
 
     def load(self):
+        if not self.begin_load():
+            return
+        with metrics.timer("model.load_ms"):
+            for grp, recs in self.read_groups():
+                self.records[grp] = recs
+        self.finish_load()
+
+    def begin_load(self) -> bool:
+        """Reset the model before reading the file.
+
+        Creates the data file and returns ``False`` when it does not exist
+        yet, in which case there is nothing to read.
+        """
         if not os.path.exists(self.path):
             os.makedirs(os.path.dirname(self.path), exist_ok=True)
-            with open(self.path, 'w', encoding='utf-8') as f:
-                json.dump({"default": {}}, f, ensure_ascii=False, indent=2)
+            self.records.clear()
+            self.records["default"] = {}
+            self.format = self.format or "json"
+            self._write()
+            return False
+
+        self.close()
+        self.records.clear()
+        self._similar = self._similar_build = None
+        self._semantic = self._semantic_build = None
+        self.templates.clear()
+        self._loading = detect_format(self.path)
+        return True
 
-        with open(self.path, 'r', encoding='utf-8') as f:
-            data = json.load(f) or {}
+    @property
+    def loading(self) -> bool:
+        return self._loading is not None
 
-        self.prompt_dict = {}
-        self.usage_counts = {}
-        for grp, amap in data.items():
-            self.prompt_dict[grp] = {}
-            self.usage_counts[grp] = {}
+    def read_groups(self):
+        """Yield ``(group, prompts)`` pairs from the data file one at a time.
+
+        Does not touch :attr:`records`, so it can run on a worker thread
+        while the caller inserts the groups as they arrive.  Call
+        :meth:`begin_load` first and :meth:`finish_load` afterwards.
+        """
+        if self._loading == "pack":
+            yield from self._read_pack()
+        else:
+            yield from self._read_doc(self._loading)
+
+    def finish_load(self):
+        file_fmt, self._loading = self._loading, None
+        # 加载期间建立的索引只覆盖了部分分组
+        self._similar = self._similar_build = None
+        self._semantic = self._semantic_build = None
+        if self.stats is not None:
+            self.stats.reset()
+        if self.format is None:
+            self.format = file_fmt
+        elif not storage.same_encoding(self.format, file_fmt):
+            # 配置要求的格式与文件不同：立即迁移
+            self._write()
+            self._dirty = False
+            return
+        # 加载期间积压的修改
+        if self._dirty and not self._batch_depth and self.autosave:
+            self.flush()
+
+    def _read_doc(self, fmt: str):
+        with open(self.path, 'rb') as f:
+            raw = f.read()
+        # 解析时直接把每条 prompt 的对象转成 PromptRecord，避免中间字典
+        groups = storage.iter_groups(fmt, raw, object_hook=_record_hook)
+        del raw
+        for grp, amap in groups:
             for alias, val in amap.items():
-                self.prompt_dict[grp][alias] = val.get('text', '')
-                self.usage_counts[grp][alias] = val.get('count', 0)
+                if not isinstance(val, PromptRecord):
+                    # 缺少 text 等不完整条目按旧逻辑补默认值
+                    amap[alias] = PromptRecord(val.get('text', ''), val.get('count', 0), val.get('meta'))
+            yield sys.intern(grp), amap
+
+    def _read_pack(self):
+        # 只解析索引：别名与计数常驻内存，正文留在 mmap 中按需读取
+        self._pack = PackReader(self.path)
+        for grp, rows in self._pack.index:
+            yield sys.intern(grp), {
+                row[0]: PromptRecord(row[2], row[1], row[3] if len(row) > 3 else None)
+                for row in rows
+            }
+        self._pack.index = None
+
+    def close(self):
+        """Release the memory map of a pack file, if any."""
+        if self._pack is not None:
+            self._pack.close()
+            self._pack = None
 
     def save(self):
-        out: dict[str, dict[str, dict[str, int | str]]] = {}
-        for grp, amap in self.prompt_dict.items():
+        self._dirty = True
+        if self.history is not None and not self._batch_depth:
+            self.history.commit()
+        # 批处理中只标记，退出最外层 batch 时统一写入；
+        # 加载未完成时写盘会丢掉尚未读入的分组，留到 finish_load
+        if not self._batch_depth and self.autosave and self._loading is None:
+            self.flush()
+
+    @property
+    def dirty(self) -> bool:
+        return self._dirty
+
+    def flush(self):
+        """Write pending changes to disk, if there are any."""
+        if not self._dirty or self._loading is not None:
+            return
+        self._write()
+        self._dirty = False
+        if self.mirror is not None:
+            self.mirror.flush()
+
+    def _write(self):
+        with metrics.timer("model.save_ms"):
+            if self.format == "pack":
+                self._write_pack()
+            else:
+                self._write_doc()
+        metrics.incr("model.saves")
+
+    def _write_doc(self):
+        if self._pack is not None:
+            # 从 pack 迁移回 json：正文全部读入内存后再覆盖文件
+            for recs in self.records.values():
+                for rec in recs.values():
+                    rec.body = self.text_of(rec)
+            self.close()
+        out: dict[str, dict[str, dict]] = {}
+        for grp, recs in self.records.items():
             out[grp] = {}
-            for alias, text in amap.items():
-                cnt = self.usage_counts.get(grp, {}).get(alias, 0)
-                out[grp][alias] = {'text': text, 'count': cnt}
-        with open(self.path, 'w', encoding='utf-8') as f:
-            json.dump(out, f, ensure_ascii=False, indent=2)
+            for alias, rec in recs.items():
+                out[grp][alias] = {'text': rec.body, 'count': rec.count}
+                if rec.meta:
+                    out[grp][alias]['meta'] = rec.meta
+        data = storage.get_codec(self.format).dumps(out)
+        del out
+        # 先写临时文件再替换，压缩格式写到一半中断也不会损坏原文件
+        tmp = self.path + ".tmp"
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, self.path)
+        metrics.incr("model.bytes_written", len(data))
+
+    def _write_pack(self):
+        def entries(recs):
+            for alias, rec in recs.items():
+                body = rec.body
+                raw = self._pack.raw(body) if isinstance(body, int) else body.encode('utf-8')
+                yield alias, rec.count, raw, rec.meta
+
+        tmp = self.path + ".tmp"
+        index = write_pack(tmp, ((grp, entries(recs)) for grp, recs in self.records.items()))
+        if metrics.enabled():
+            metrics.incr("model.bytes_written", os.path.getsize(tmp))
+        # 先释放旧映射再替换文件（Windows 下被映射的文件无法覆盖）
+        old = self._pack
+        if old is not None:
+            old.close()
+        try:
+            os.replace(tmp, self.path)
+        except OSError:
+            if old is not None:
+                old.reopen()
+            raise
+        self._pack = PackReader(self.path)
+        self._pack.index = None
+        # 正文改为指向新文件中的位置，已读入内存的文本随之释放
+        for grp, rows in index:
+            recs = self.records[grp]
+            for row in rows:
+                recs[row[0]].body = row[2]
+
+    # ---------- record access ----------
+    def text_of(self, rec: PromptRecord) -> str:
+        body = rec.body
+        return self._pack.text(body) if isinstance(body, int) else body
+
+    def get_record(self, group: str, alias: str) -> PromptRecord | None:
+        return self.records.get(group, {}).get(alias)
+
+    def get_text(self, group: str, alias: str, default: str = "") -> str:
+        rec = self.get_record(group, alias)
+        return default if rec is None else self.text_of(rec)
+
+    def iter_prompts(self, groups=None):
+        """Yield ``(group, alias, text, count)`` for every prompt without copying the data."""
+        for grp in (self.records if groups is None else groups):
+            for alias, rec in self.records.get(grp, {}).items():
+                yield grp, alias, self.text_of(rec), rec.count
+
+    def search(self, query: str = "", group: str | None = None, limit: int = 20) -> list[tuple[str, str, int]]:
+        """Case-insensitive alias search; returns ``(group, alias, count)``, most used first."""
+        key = query.lower()
+        groups = [group] if group is not None else list(self.records)
+        hits = (
+            (rec.count, grp, alias)
+            for grp in groups
+            for alias, rec in self.records.get(grp, {}).items()
+            if key in alias.lower()
+        )
+        # 只取前 limit 个，避免对全部结果排序
+        top = heapq.nlargest(max(0, int(limit)), hits, key=lambda h: h[0])
+        return [(grp, alias, count) for count, grp, alias in top]
+
+    def is_template(self, group: str, alias: str) -> bool:
+        rec = self.get_record(group, alias)
+        return rec is not None and bool((rec.meta or {}).get("template"))
+
+    def template(self, group: str, alias: str) -> Template:
+        """Compiled template of a prompt marked as one (cached).
+
+        Any other prompt yields an empty template that renders its text unchanged.
+        """
+        if not self.is_template(group, alias):
+            return Template((self.get_text(group, alias),), ())
+        return self.templates.get((group, alias), lambda: self.get_text(group, alias))
+
+    # ---------- near duplicates ----------
+    def _similarity_index(self) -> SimilarityIndex:
+        self.build_similarity_step(None)
+        return self._similar
+
+    def build_similarity_step(self, n: int | None = 2000) -> bool:
+        """Sketch the next ``n`` prompts (all when ``None``) of the similarity index.
+
+        Returns ``True`` once the index is ready.  The GUI calls this from
+        idle time so the first duplicate check does not pay for the whole
+        build; any text change during the build restarts it.
+        """
+        if self._similar is not None:
+            return True
+        if self._similar_build is None:
+            keys = [(grp, alias) for grp, recs in self.records.items() for alias in recs]
+            # 待处理的键、已算好的草图、进度
+            self._similar_build = [keys, [], 0]
+        keys, sketches, start = self._similar_build
+        with metrics.timer("similarity.build_ms"):
+            end = len(keys) if n is None else min(len(keys), start + n)
+            for key in keys[start:end]:
+                rec = self.get_record(*key)
+                if rec is not None:
+                    sketches.append((key, sketch(self.text_of(rec))))
+            self._similar_build[2] = end
+            if end < len(keys):
+                return False
+            index = SimilarityIndex()
+            index.extend(sketches)
+        self._similar = index
+        self._similar_build = None
+        return True
+
+    def _key_text(self, key: tuple[str, str]) -> str:
+        return self.get_text(*key)
+
+    def similar_prompts(self, text: str, threshold: float = SIMILARITY_THRESHOLD,
+                        exclude: tuple[str, str] | None = None, limit: int = 5) -> list[tuple[str, str, float]]:
+        """Prompts whose body is nearly the same as ``text``: ``(group, alias, similarity)``."""
+        index = self._similarity_index()
+        with metrics.timer("similarity.query_ms"):
+            hits = index.query(text, self._key_text, threshold, exclude)
+        return [(grp, alias, score) for (grp, alias), score in hits[:limit]]
+
+    def duplicate_clusters(self, threshold: float = SIMILARITY_THRESHOLD) -> list[list[tuple[str, str]]]:
+        """Groups of near-identical prompts across all groups, largest first."""
+        return self._similarity_index().clusters(self._key_text, threshold)
+
+    # ---------- semantic search ----------
+    @property
+    def semantic_path(self) -> str:
+        return self.path + ".semantic"
+
+    def semantic_index(self) -> SemanticIndex:
+        """Load the saved TF-IDF index (or build it) and re-index changed prompts."""
+        if self._semantic is not None:
+            return self._semantic
+        # 守护进程中查询在读锁下并发执行，只允许一个线程建立索引
+        with self._semantic_lock:
+            self.build_semantic_step(None)
+        return self._semantic
+
+    @property
+    def semantic_ready(self) -> bool:
+        return self._semantic is not None
+
+    def build_semantic_step(self, n: int | None = 2000) -> bool:
+        """Check or index the next ``n`` prompts (all when ``None``) of the semantic index.
+
+        The first step only loads the saved index.  Returns ``True`` once the
+        index is ready; like :meth:`build_similarity_step`, any text change
+        during the build restarts it.
+        """
+        if self._semantic is not None:
+            return True
+        if self._semantic_build is None:
+            index = None
+            with metrics.timer("semantic.load_ms"):
+                if os.path.exists(self.semantic_path):
+                    try:
+                        index = SemanticIndex.load(self.semantic_path)
+                    except (OSError, ValueError, EOFError):
+                        index = None
+            keys = [(grp, alias) for grp, recs in self.records.items() for alias in recs]
+            # 索引、待核对的键、进度、重新索引的条数
+            self._semantic_build = [index or SemanticIndex(), keys, 0, 0]
+            if n is not None:
+                return False
+        index, keys, start, changed = self._semantic_build
+        with metrics.timer("semantic.build_ms"):
+            end = len(keys) if n is None else min(len(keys), start + n)
+            for key in keys[start:end]:
+                rec = self.get_record(*key)
+                if rec is not None:
+                    changed += index.update(key, self.text_of(rec))
+            self._semantic_build[2:] = [end, changed]
+            if end < len(keys):
+                return False
+            changed += index.prune(keys)
+        metrics.incr("semantic.reindexed", changed)
+        self._semantic = index
+        self._semantic_build = None
+        return True
+
+    def semantic_search(self, query: str, group: str | None = None,
+                        limit: int = 20) -> list[tuple[str, str, float]]:
+        """Prompts whose body matches what ``query`` describes: ``(group, alias, score)``."""
+        index = self.semantic_index()
+        allow = None if group is None else (lambda key: key[0] == group)
+        with metrics.timer("semantic.query_ms"):
+            hits = index.query(query, limit, allow)
+        return [(grp, alias, score) for (grp, alias), score in hits]
+
+    def save_semantic_index(self):
+        """Write the semantic index next to the data file if it changed."""
+        if self._semantic is not None and self._semantic.dirty:
+            self._semantic.save(self.semantic_path)
+
+    def _index_text(self, group: str, alias: str, text: str):
+        self.templates.invalidate((group, alias))
+        if self.mirror is not None:
+            self.mirror.mark(group, alias)
+        if self.stats is not None:
+            self.stats.mark(group, alias)
+        self._similar_build = self._semantic_build = None
+        if self._similar is not None:
+            self._similar.add((group, alias), text)
+        if self._semantic is not None:
+            self._semantic.add((group, alias), text)
+
+    def _unindex(self, group: str, aliases):
+        for alias in aliases:
+            self.templates.invalidate((group, alias))
+            if self.mirror is not None:
+                self.mirror.mark(group, alias)
+            if self.stats is not None:
+                self.stats.mark(group, alias)
+        self._similar_build = self._semantic_build = None
+        for index in (self._similar, self._semantic):
+            if index is not None:
+                for alias in aliases:
+                    index.remove((group, alias))
+
+    def _rekey(self, old: tuple[str, str], new: tuple[str, str]):
+        self.templates.invalidate(old)
+        if self.mirror is not None:
+            self.mirror.mark(*old)
+            self.mirror.mark(*new)
+        if self.stats is not None:
+            self.stats.rekey(old, new)
+        for index in (self._similar, self._semantic):
+            if index is not None:
+                index.rekey(old, new)
+
+    # ---------- batch / transaction ----------
+    @contextmanager
+    def batch(self):
+        """Apply several mutations and persist them with a single save.
+
+        Inside the block every operation only changes memory.  On normal
+        exit the touched groups are validated and the file is written once;
+        if anything raises (including validation or the write itself) all
+        changes made in the block are rolled back.  Nested batches join the
+        outermost one.
+        """
+        if self._batch_depth:
+            self._batch_depth += 1
+            try:
+                yield self
+            finally:
+                self._batch_depth -= 1
+            return
+
+        self._batch_depth = 1
+        was_dirty, self._dirty = self._dirty, False
+        self._journal = {}
+        self._journal_order = list(self.records)
+        try:
+            yield self
+            self.validate(self._journal)
+            self._batch_depth = 0
+            changed = self._dirty
+            self._dirty = changed or was_dirty
+            if changed:
+                self.save()
+        except BaseException:
+            self._rollback()
+            self._dirty = was_dirty
+            raise
+        finally:
+            self._batch_depth = 0
+            self._journal = {}
+            self._journal_order = []
+
+    @property
+    def in_batch(self) -> bool:
+        return self._batch_depth > 0
+
+    def _touch(self, group: str):
+        """Remember the original state of ``group`` before the first change in a batch."""
+        if not self._batch_depth or group in self._journal:
+            return
+        recs = self.records.get(group)
+        # 记录字段值而非对象本身：记录会被原地修改
+        self._journal[group] = None if recs is None else {a: r.state() for a, r in recs.items()}
+
+    def _rollback(self):
+        # 回滚后的记录无法逐条对应，下次使用时重建索引（语义索引从磁盘按 CRC 校正）
+        self._similar = self._similar_build = None
+        self._semantic = self._semantic_build = None
+        self.templates.clear()
+        if self.history is not None:
+            self.history.discard()
+        for grp, saved in self._journal.items():
+            if saved is None:
+                self.records.pop(grp, None)
+                continue
+            restored = {a: PromptRecord(*state) for a, state in saved.items()}
+            recs = self.records.get(grp)
+            if recs is None:
+                self.records[grp] = restored
+            else:
+                # 原地恢复，外部持有的字典引用仍然有效
+                recs.clear()
+                recs.update(restored)
+        # 恢复分组顺序（重命名/删除会改变顺序）
+        order = [g for g in self._journal_order if g in self.records]
+        if order != list(self.records):
+            reordered = {g: self.records[g] for g in order}
+            self.records.clear()
+            self.records.update(reordered)
+        # 记录对象已替换，统计按内容缓存重新对应
+        if self.stats is not None:
+            self.stats.reset()
+
+    def validate(self, groups=None):
+        """Raise ``ValueError`` if the data of ``groups`` (default: all) is inconsistent."""
+        names = self.records.keys() if groups is None else groups
+        for grp in names:
+            if grp not in self.records:
+                continue
+            if not isinstance(grp, str) or not grp.strip():
+                raise ValueError(f"invalid group name: {grp!r}")
+            for alias, rec in self.records[grp].items():
+                if not isinstance(alias, str) or not alias.strip():
+                    raise ValueError(f"invalid alias in group {grp!r}: {alias!r}")
+                if not isinstance(rec.body, (str, int)):
+                    raise ValueError(f"prompt {grp!r}/{alias!r} text must be str")
+                if not isinstance(rec.count, int) or rec.count < 0:
+                    raise ValueError(f"prompt {grp!r}/{alias!r} has invalid count {rec.count!r}")
 
     # ---------- prompt/group operations ----------
     def add_group(self, name: str):
-        if name not in self.prompt_dict:
-            self.prompt_dict[name] = {}
-            self.usage_counts[name] = {}
+        if name not in self.records:
+            self._touch(name)
+            self._note_group(name)
+            self.records[sys.intern(name)] = {}
             self.save()
 
     def delete_group(self, name: str):
-        if name in self.prompt_dict:
-            self.prompt_dict.pop(name, None)
-            self.usage_counts.pop(name, None)
+        if name in self.records:
+            self._touch(name)
+            self._note_group(name)
+            self._unindex(name, self.records.pop(name, {}))
             self.save()
 
     def rename_group(self, old: str, new: str):
-        if old in self.prompt_dict and new not in self.prompt_dict:
-            self.prompt_dict[new] = self.prompt_dict.pop(old)
-            self.usage_counts[new] = self.usage_counts.pop(old)
+        if old in self.records and new not in self.records:
+            self._touch(old)
+            self._touch(new)
+            if self.history is not None:
+                self.history.note_rename(old, new)
+            self.records[sys.intern(new)] = self.records.pop(old)
+            self._similar_build = self._semantic_build = None
+            for alias in self.records[new]:
+                self._rekey((old, alias), (new, alias))
             self.save()
 
-    def add_prompt(self, group: str, alias: str, text: str):
-        self.prompt_dict.setdefault(group, {})[alias] = text
-        self.usage_counts.setdefault(group, {}).setdefault(alias, 0)
+    def _group(self, name: str) -> dict[str, PromptRecord]:
+        recs = self.records.get(name)
+        if recs is None:
+            self._note_group(name)
+            recs = self.records[sys.intern(name)] = {}
+        return recs
+
+    def _note(self, group: str, alias: str):
+        if self.history is not None:
+            self.history.note_record(group, alias)
+
+    def _note_group(self, name: str):
+        if self.history is not None:
+            self.history.note_group(name)
+
+    def add_prompt(self, group: str, alias: str, text: str, count: int | None = None):
+        self._touch(group)
+        self._note(group, alias)
+        recs = self._group(group)
+        rec = recs.get(alias)
+        if rec is None:
+            recs[alias] = PromptRecord(text, count or 0)
+        else:
+            rec.body = text
+            if count is not None:
+                rec.count = count
+        self._index_text(group, alias, text)
         self.save()
 
     def update_prompt(self, group: str, old_alias: str, new_alias: str, text: str):
+        self._touch(group)
+        self._note(group, old_alias)
+        self._note(group, new_alias)
+        recs = self._group(group)
+        rec = recs.get(new_alias)
         if new_alias != old_alias:
-            self.prompt_dict[group].pop(old_alias, None)
-            self.usage_counts[group].pop(old_alias, None)
-        self.prompt_dict.setdefault(group, {})[new_alias] = text
-        self.usage_counts.setdefault(group, {}).setdefault(new_alias, 0)
+            moved = recs.pop(old_alias, None)
+            self._unindex(group, (old_alias,))
+            if rec is None:
+                # 改名时保留原记录（计数与元数据）
+                rec = moved
+        if rec is None:
+            recs[new_alias] = PromptRecord(text)
+        else:
+            rec.body = text
+            recs[new_alias] = rec
+        self._index_text(group, new_alias, text)
         self.save()
 
     def delete_prompt(self, group: str, alias: str):
-        self.prompt_dict.get(group, {}).pop(alias, None)
-        self.usage_counts.get(group, {}).pop(alias, None)
+        self._touch(group)
+        self._note(group, alias)
+        self.records.get(group, {}).pop(alias, None)
+        self._unindex(group, (alias,))
+        self.save()
+
+    def move_prompt(self, src: str, dst: str, alias: str):
+        """Move ``alias`` with its usage count from group ``src`` to ``dst``."""
+        if alias not in self.records.get(src, {}):
+            raise KeyError(f"{src}/{alias}")
+        if alias in self.records.get(dst, {}):
+            raise ValueError(f"alias {alias!r} already exists in group {dst!r}")
+        self._touch(src)
+        self._touch(dst)
+        self._note(src, alias)
+        self._note(dst, alias)
+        self._group(dst)[alias] = self.records[src].pop(alias)
+        self._similar_build = self._semantic_build = None
+        self._rekey((src, alias), (dst, alias))
+        self.save()
+
+    def restore_prompt(self, group: str, alias: str, text: str, count: int = 0, meta: dict | None = None):
+        """Put back a prompt's text and metadata (undo); an existing prompt keeps its count."""
+        self._touch(group)
+        self._note(group, alias)
+        rec = self._group(group).get(alias)
+        if rec is None:
+            self.records[group][alias] = PromptRecord(text, count, meta)
+        else:
+            rec.body = text
+            self._set_record_meta(group, alias, rec, meta)
+        self._index_text(group, alias, text)
+        self.save()
+
+    def restore_group(self, name: str, pos: int, rows):
+        """Recreate a deleted group at position ``pos`` from ``(alias, text, count, meta)`` rows."""
+        if name in self.records:
+            raise ValueError(f"group {name!r} already exists")
+        self._touch(name)
+        self._note_group(name)
+        recs = {alias: PromptRecord(text, count, meta) for alias, text, count, meta in rows}
+        order = list(self.records)
+        order.insert(min(pos, len(order)), sys.intern(name))
+        groups = {g: self.records.get(g) for g in order}
+        groups[name] = recs
+        # 原地重排，外部持有的字典引用仍然有效
+        self.records.clear()
+        self.records.update(groups)
+        for alias, text, *_ in rows:
+            self._index_text(name, alias, text)
         self.save()
 
     def increment_usage(self, group: str, alias: str):
-        self.usage_counts.setdefault(group, {}).setdefault(alias, 0)
-        self.usage_counts[group][alias] += 1
+        """Count one use of ``alias``; unknown prompts are ignored."""
+        rec = self.get_record(group, alias)
+        if rec is None:
+            # 旧版的计数从不写入未知条目，这里也不凭空建立空 Prompt
+            return
+        self._touch(group)
+        rec.count += 1
+        metrics.incr("usage.increments")
         self.save()
+
+    def set_count(self, group: str, alias: str, count: int):
+        """Set the usage count of an existing prompt."""
+        rec = self.records[group][alias]
+        self._touch(group)
+        rec.count = count
+        self.save()
+
+    def reset_usage(self, group: str | None = None):
+        """Clear usage counts of ``group`` or of every group when omitted."""
+        groups = [group] if group is not None else list(self.records)
+        for grp in groups:
+            if grp not in self.records:
+                continue
+            self._touch(grp)
+            for rec in self.records[grp].values():
+                rec.count = 0
+        self.save()
+
+    def set_meta(self, group: str, alias: str, **meta):
+        """Merge ``meta`` into a prompt's metadata; ``None`` values remove keys."""
+        rec = self.records[group][alias]
+        self._touch(group)
+        self._note(group, alias)
+        merged = dict(rec.meta or {})
+        for key, val in meta.items():
+            if val is None:
+                merged.pop(key, None)
+            else:
+                merged[key] = val
+        self._set_record_meta(group, alias, rec, merged)
+        self.save()
+
+    def _set_record_meta(self, group: str, alias: str, rec: PromptRecord, meta: dict | None):
+        if isinstance(rec, MetaRecord):
+            rec.meta = meta or None
+        elif meta:
+            # 普通记录没有 meta 槽位：换成 MetaRecord，按记录查找的统计随之重算
+            self.records[group][alias] = PromptRecord(rec.body, rec.count, meta)
+            if self.stats is not None:
+                self.stats.mark(group, alias)
@@ -0,0 +1,87 @@
+"""Read-optimized binary storage with lazily loaded prompt bodies.
+
+Layout of a pack file::
+
+    header   MAGIC (8 bytes) | index offset (u64) | index length (u64)
+    bodies   UTF-8 prompt bodies, back to back
+    index    compact JSON: [[group, [[alias, count, span(, meta)], ...]], ...]
+
+``span`` packs a body's offset and byte length into one integer
+(``offset << 32 | length``).  Only the index is parsed on load; bodies stay
+in the file and are sliced out of an ``mmap`` on request, so resident
+memory grows with the number of prompts instead of the amount of text.
+"""
+import json
+import mmap
+import struct
+from typing import Iterable
+
+MAGIC = b"PLPACK\x01\n"
+_HEADER = struct.Struct("<8sQQ")
+_LEN_MASK = 0xFFFFFFFF
+
+
+def make_span(offset: int, length: int) -> int:
+    return offset << 32 | length
+
+
+class PackReader:
+    """Memory-mapped read access to a pack file."""
+    def __init__(self, path: str):
+        self.path = path
+        idx_off, idx_len = self.reopen()
+        self.index = json.loads(self._mm[idx_off:idx_off + idx_len])
+
+    def reopen(self) -> tuple[int, int]:
+        """(Re)map ``path`` and return the index offset and length."""
+        self._file = open(self.path, 'rb')
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, idx_off, idx_len = _HEADER.unpack_from(self._mm, 0)
+            if magic != MAGIC:
+                raise ValueError(f"{self.path} is not a prompt pack file")
+        except Exception:
+            self.close()
+            raise
+        return idx_off, idx_len
+
+    def raw(self, span: int) -> bytes:
+        off = span >> 32
+        return self._mm[off:off + (span & _LEN_MASK)]
+
+    def text(self, span: int) -> str:
+        return self.raw(span).decode('utf-8')
+
+    def close(self):
+        mm = getattr(self, "_mm", None)
+        if mm is not None:
+            mm.close()
+            self._mm = None
+        self._file.close()
+
+
+def write_pack(path: str, groups: Iterable[tuple[str, Iterable[tuple]]]) -> list:
+    """Write ``(group, [(alias, count, body_bytes, meta), ...])`` entries to ``path``.
+
+    Bodies are streamed to disk one by one.  Returns the written index so
+    callers can re-point lazy records at the new offsets.
+    """
+    index = []
+    with open(path, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, 0, 0))
+        offset = _HEADER.size
+        for grp, entries in groups:
+            rows = []
+            for alias, count, body, meta in entries:
+                f.write(body)
+                row = [alias, count, make_span(offset, len(body))]
+                if meta:
+                    row.append(meta)
+                rows.append(row)
+                offset += len(body)
+            index.append([grp, rows])
+        idx = json.dumps(index, ensure_ascii=False, separators=(",", ":")).encode('utf-8')
+        f.write(idx)
+        f.seek(0)
+        f.write(_HEADER.pack(MAGIC, offset, len(idx)))
+    return index
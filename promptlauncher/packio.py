@@ -0,0 +1,236 @@
+"""Streaming import/export of prompt packs.
+
+Supported formats:
+
+``jsonl``
+    One JSON object per line: ``{"group", "alias", "text", "count"}``.
+``csv``
+    Header ``group,alias,text,count`` followed by one row per prompt.
+``md``
+    A folder with one sub folder per group and one ``.md`` file per prompt.
+    The alias and usage count are kept in a small front matter block.
+
+Readers yield one :class:`PackRecord` at a time and writers consume any
+iterable, so neither side ever holds a whole pack in memory.
+"""
+import os
+import csv
+import sys
+import json
+import logging
+from typing import Iterable, Iterator, NamedTuple
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ("jsonl", "csv", "md")
+POLICIES = ("skip", "overwrite", "rename")
+
+_EXTENSIONS = {".jsonl": "jsonl", ".ndjson": "jsonl", ".csv": "csv"}
+_CSV_FIELDS = ["group", "alias", "text", "count"]
+_UNSAFE_CHARS = '<>:"/\\|?*'
+
+# 单条 prompt 可能很长，放宽 csv 字段长度限制
+csv.field_size_limit(min(sys.maxsize, 2**31 - 1))
+
+
+class PackRecord(NamedTuple):
+    group: str
+    alias: str
+    text: str
+    count: int = 0
+
+
+class ImportResult(NamedTuple):
+    added: int
+    overwritten: int
+    renamed: int
+    skipped: int
+
+
+def detect_format(path: str) -> str:
+    """Guess the pack format from ``path``; directories are Markdown folders."""
+    if os.path.isdir(path):
+        return "md"
+    ext = os.path.splitext(path)[1].lower()
+    if ext in _EXTENSIONS:
+        return _EXTENSIONS[ext]
+    if ext in ("", ".md") and not os.path.exists(path):
+        return "md"
+    raise ValueError(f"cannot detect pack format of {path!r}")
+
+
+# ---------- readers ----------
+def iter_records(path: str, fmt: str | None = None) -> Iterator[PackRecord]:
+    fmt = fmt or detect_format(path)
+    if fmt == "jsonl":
+        return _iter_jsonl(path)
+    if fmt == "csv":
+        return _iter_csv(path)
+    if fmt == "md":
+        return _iter_md(path)
+    raise ValueError(f"unknown pack format: {fmt!r}")
+
+
+def _record(group, alias, text, count) -> PackRecord:
+    try:
+        count = int(count or 0)
+    except (TypeError, ValueError):
+        count = 0
+    return PackRecord(str(group or "default"), str(alias), str(text or ""), max(count, 0))
+
+
+def _iter_jsonl(path: str) -> Iterator[PackRecord]:
+    with open(path, 'r', encoding='utf-8') as f:
+        for lineno, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                obj = json.loads(line)
+            except json.JSONDecodeError:
+                logger.warning(f"{path}:{lineno}: invalid JSON line skipped")
+                continue
+            if not isinstance(obj, dict) or not obj.get("alias"):
+                logger.warning(f"{path}:{lineno}: record without alias skipped")
+                continue
+            yield _record(obj.get("group"), obj["alias"], obj.get("text"), obj.get("count"))
+
+
+def _iter_csv(path: str) -> Iterator[PackRecord]:
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        for row in csv.DictReader(f):
+            if not row.get("alias"):
+                continue
+            yield _record(row.get("group"), row["alias"], row.get("text"), row.get("count"))
+
+
+def _iter_md(root: str) -> Iterator[PackRecord]:
+    with os.scandir(root) as groups:
+        group_dirs = sorted((e for e in groups if e.is_dir()), key=lambda e: e.name)
+    for gdir in group_dirs:
+        with os.scandir(gdir.path) as files:
+            names = sorted(e.name for e in files if e.is_file() and e.name.endswith(".md"))
+        for name in names:
+            with open(os.path.join(gdir.path, name), 'r', encoding='utf-8') as f:
+                meta, text = parse_markdown(f.read())
+            yield _record(gdir.name, meta.get("alias") or name[:-3], text, meta.get("count"))
+
+
+def parse_markdown(content: str) -> tuple[dict, str]:
+    """Split an optional ``---`` front matter block from a prompt file."""
+    if content.startswith("---\n"):
+        end = content.find("\n---\n", 4)
+        if end >= 0:
+            meta = {}
+            for line in content[4:end].splitlines():
+                key, sep, value = line.partition(":")
+                if sep:
+                    meta[key.strip()] = json.loads(value) if value.strip()[:1] == '"' else value.strip()
+            return meta, content[end + 5:]
+    return {}, content
+
+
+def format_markdown(alias: str, text: str, count: int | None = None) -> str:
+    head = f"alias: {json.dumps(alias, ensure_ascii=False)}\n"
+    if count is not None:
+        head += f"count: {count}\n"
+    return f"---\n{head}---\n{text}"
+
+
+def safe_filename(name: str) -> str:
+    cleaned = "".join("_" if c in _UNSAFE_CHARS or ord(c) < 32 else c for c in name).strip(" .")
+    return cleaned or "_"
+
+
+# ---------- writers ----------
+def write_records(path: str, records: Iterable[PackRecord], fmt: str | None = None) -> int:
+    """Stream ``records`` into ``path`` and return how many were written."""
+    fmt = fmt or detect_format(path)
+    if fmt == "md":
+        return _write_md(path, records)
+    if fmt not in ("jsonl", "csv"):
+        raise ValueError(f"unknown pack format: {fmt!r}")
+    tmp = path + ".tmp"
+    n = 0
+    with open(tmp, 'w', encoding='utf-8', newline='') as f:
+        if fmt == "jsonl":
+            for rec in records:
+                f.write(json.dumps(rec._asdict(), ensure_ascii=False))
+                f.write("\n")
+                n += 1
+        else:
+            writer = csv.writer(f)
+            writer.writerow(_CSV_FIELDS)
+            for rec in records:
+                writer.writerow(rec)
+                n += 1
+    os.replace(tmp, path)
+    return n
+
+
+def _write_md(root: str, records: Iterable[PackRecord]) -> int:
+    n = 0
+    used: dict[str, set[str]] = {}
+    for rec in records:
+        gdir = os.path.join(root, safe_filename(rec.group))
+        names = used.get(gdir)
+        if names is None:
+            os.makedirs(gdir, exist_ok=True)
+            names = used[gdir] = set()
+        base = safe_filename(rec.alias)
+        name, i = base, 2
+        while name.lower() in names:
+            name = f"{base} ({i})"
+            i += 1
+        names.add(name.lower())
+        with open(os.path.join(gdir, name + ".md"), 'w', encoding='utf-8') as f:
+            f.write(format_markdown(rec.alias, rec.text, rec.count))
+        n += 1
+    return n
+
+
+# ---------- model integration ----------
+def export_pack(model, path: str, fmt: str | None = None, groups=None) -> int:
+    """Write the prompts of ``model`` straight from memory into a pack."""
+    records = (PackRecord(*row) for row in model.iter_prompts(groups))
+    n = write_records(path, records, fmt)
+    logger.info(f"exported {n} prompts to {path}")
+    return n
+
+
+def _free_alias(existing, alias: str) -> str:
+    i = 2
+    while f"{alias} ({i})" in existing:
+        i += 1
+    return f"{alias} ({i})"
+
+
+def import_pack(model, path: str, fmt: str | None = None, policy: str = "skip") -> ImportResult:
+    """Feed the records of a pack into ``model`` inside a single batch.
+
+    ``policy`` decides what happens when an alias already exists in its
+    group: ``skip`` keeps the existing prompt, ``overwrite`` replaces text
+    and count, ``rename`` adds the imported prompt under a free alias.
+    """
+    if policy not in POLICIES:
+        raise ValueError(f"unknown collision policy: {policy!r}")
+    added = overwritten = renamed = skipped = 0
+    with model.batch():
+        for rec in iter_records(path, fmt):
+            existing = model.prompt_dict.get(rec.group, {})
+            alias = rec.alias
+            if alias in existing:
+                if policy == "skip":
+                    skipped += 1
+                    continue
+                if policy == "rename":
+                    alias = _free_alias(existing, alias)
+                    renamed += 1
+                else:
+                    overwritten += 1
+            else:
+                added += 1
+            model.add_prompt(rec.group, alias, rec.text, rec.count)
+    result = ImportResult(added, overwritten, renamed, skipped)
+    logger.info(f"imported {path}: {result}")
+    return result
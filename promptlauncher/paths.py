@@ -0,0 +1,12 @@
+"""Default locations of the runtime files.
+
+Kept free of Qt imports so command line tools can share them with the GUI.
+"""
+import os
+import sys
+
+BASE = getattr(sys, "frozen", False) and os.path.dirname(sys.executable) or os.path.dirname(__file__)
+CONFIG_PATH = os.path.join(BASE, ".config")
+DATA_PATH   = os.path.join(BASE, "prompt.json")
+ICON_FILE   = os.path.join(BASE, "icon.png")
+UPDATE_CACHE_PATH = os.path.join(BASE, ".update_cache.json")
@@ -0,0 +1,153 @@
+"""HTML previews of prompt bodies for the preview pane.
+
+:func:`render_html` turns a body into a small HTML document that
+``QTextBrowser`` can show.  It handles the Markdown most prompts use:
+headings, fenced code blocks, inline code, bold and italics, and bullet
+or numbered lists.  Everything else is escaped and shown as written, so
+XML-style tags in a prompt stay visible.  Fenced code is coloured with
+Pygments when it is installed.  Very long bodies are cut at
+:data:`PREVIEW_CHARS`; the full text is still one double-click away in
+the editor.
+
+Rendering is pure and may run on a worker thread.  The results are kept
+in :class:`PreviewCache`, an LRU keyed by :func:`preview_key` (a CRC32 of
+the body plus its length) and bounded by the total size of the HTML.  An
+edited prompt simply gets a new key, so nothing has to be invalidated.
+"""
+import re
+import html
+from collections import OrderedDict
+
+from .semantic import text_crc
+
+try:
+    from pygments import highlight
+    from pygments.formatters import HtmlFormatter
+    from pygments.lexers import get_lexer_by_name
+    from pygments.util import ClassNotFound
+except ImportError:  # optional dependency
+    highlight = None
+
+# 预览只渲染前这么多字符
+PREVIEW_CHARS = 20_000
+DEFAULT_MAX_CHARS = 4_000_000
+
+_FENCE = re.compile(r"^\s*(```|~~~)\s*([\w+#.-]*)")
+_HEADING = re.compile(r"^(#{1,6})\s+(.*)")
+_LIST = re.compile(r"^(\s*)([-*+]|\d+[.)])\s+(.*)")
+_INLINE = re.compile(r"`([^`]+)`|\*\*(.+?)\*\*|(?<![\w*])\*(?!\s)(.+?)(?<!\s)\*(?![\w*])")
+_CODE_STYLE = "background-color:#f4f4f4;"
+
+
+def preview_key(text: str) -> tuple[int, int]:
+    return text_crc(text), len(text)
+
+
+def _inline(line: str) -> str:
+    out = []
+    pos = 0
+    for m in _INLINE.finditer(line):
+        out.append(html.escape(line[pos:m.start()], quote=False))
+        code, bold, italic = m.groups()
+        if code is not None:
+            out.append(f"<code style='{_CODE_STYLE}'>{html.escape(code, quote=False)}</code>")
+        elif bold is not None:
+            out.append(f"<b>{html.escape(bold, quote=False)}</b>")
+        else:
+            out.append(f"<i>{html.escape(italic, quote=False)}</i>")
+        pos = m.end()
+    out.append(html.escape(line[pos:], quote=False))
+    return "".join(out)
+
+
+def _code_block(lines: list[str], lang: str) -> str:
+    code = "\n".join(lines)
+    if highlight is not None and lang:
+        try:
+            lexer = get_lexer_by_name(lang)
+        except ClassNotFound:
+            lexer = None
+        if lexer is not None:
+            # 内联样式，不依赖文档的样式表
+            return highlight(code, lexer, HtmlFormatter(noclasses=True))
+    return f"<pre style='{_CODE_STYLE}'>{html.escape(code, quote=False)}</pre>"
+
+
+def render_html(text: str, limit: int = PREVIEW_CHARS) -> str:
+    """Render a prompt body as HTML for the preview pane."""
+    total = len(text)
+    if total > limit:
+        text = text[:limit]
+    parts = []
+    fence = None
+    code: list[str] = []
+    lang = ""
+    for line in text.splitlines():
+        m = _FENCE.match(line)
+        if fence is not None:
+            if m and m.group(1) == fence and not m.group(2):
+                parts.append(_code_block(code, lang))
+                fence = None
+            else:
+                code.append(line)
+            continue
+        if m:
+            fence, lang, code = m.group(1), m.group(2).lower(), []
+            continue
+        m = _HEADING.match(line)
+        if m:
+            level = len(m.group(1))
+            parts.append(f"<h{level}>{_inline(m.group(2))}</h{level}>")
+            continue
+        m = _LIST.match(line)
+        if m:
+            indent = len(m.group(1).expandtabs(4)) // 2
+            bullet = "•" if m.group(2) in "-*+" else html.escape(m.group(2))
+            parts.append(f"<div style='margin-left:{12 * indent}px'>{bullet} {_inline(m.group(3))}</div>")
+            continue
+        parts.append(f"<div>{_inline(line) or '&nbsp;'}</div>")
+    if fence is not None:
+        # 没有闭合的代码块按代码显示到结尾
+        parts.append(_code_block(code, lang))
+    if total > limit:
+        parts.append(f"<p><i>…仅预览前 {limit} 字，共 {total} 字</i></p>")
+    return "\n".join(parts)
+
+
+class PreviewCache:
+    """LRU of rendered HTML keyed by :func:`preview_key`, bounded by total size."""
+    def __init__(self, max_chars: int = DEFAULT_MAX_CHARS):
+        self.max_chars = max_chars
+        self._items: OrderedDict[tuple[int, int], str] = OrderedDict()
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def get(self, key: tuple[int, int]) -> str | None:
+        html_ = self._items.get(key)
+        if html_ is None:
+            self.misses += 1
+            return None
+        self._items.move_to_end(key)
+        self.hits += 1
+        return html_
+
+    def put(self, key: tuple[int, int], html_: str):
+        old = self._items.pop(key, None)
+        if old is not None:
+            self._size -= len(old)
+        self._items[key] = html_
+        self._size += len(html_)
+        # 至少保留刚放入的一项
+        while self._size > self.max_chars and len(self._items) > 1:
+            self._size -= len(self._items.popitem(last=False)[1])
+
+    def clear(self):
+        self._items.clear()
+        self._size = 0
@@ -0,0 +1,155 @@
+"""Compact in-memory representation of prompts.
+
+Every prompt is a single :class:`PromptRecord` stored in
+``PromptModel.records[group][alias]``.  The dict-of-dicts attributes that
+older code uses (``prompt_dict`` and ``usage_counts``) are provided as thin
+views over those records, so nothing is stored twice.  Writes through the
+views go through the model's mutating methods, so indexes, undo history
+and the mirror see them like any other edit.
+"""
+from collections.abc import Mapping, MutableMapping
+
+
+# 常见的计数值共用同一批 int 对象，十万条记录不必各持一份
+_COUNTS = tuple(range(1024))
+
+
+class PromptRecord:
+    """A single prompt: body and usage count in one object.
+
+    ``body`` is the prompt text, or an ``int`` span into the pack file while
+    the text has not been needed yet.  Only prompts that carry metadata get
+    a ``meta`` slot: passing a non-empty ``meta`` creates a
+    :class:`MetaRecord`, and ``meta`` reads as ``None`` on the others.
+    """
+    __slots__ = ("body", "count")
+    meta = None
+
+    def __new__(cls, body: str | int = "", count: int = 0, meta: dict | None = None):
+        return object.__new__(MetaRecord if meta and cls is PromptRecord else cls)
+
+    def __init__(self, body: str | int = "", count: int = 0, meta: dict | None = None):
+        self.body = body
+        self.count = _COUNTS[count] if type(count) is int and 0 <= count < len(_COUNTS) else count
+
+    def __repr__(self):
+        body = f"<span {self.body:#x}>" if isinstance(self.body, int) else repr(self.body[:20])
+        return f"PromptRecord({body}, count={self.count})"
+
+    def state(self) -> tuple:
+        return self.body, self.count, self.meta
+
+
+class MetaRecord(PromptRecord):
+    """A :class:`PromptRecord` with metadata (hotkey, template flag, ...)."""
+    __slots__ = ("meta",)
+
+    def __init__(self, body: str | int = "", count: int = 0, meta: dict | None = None):
+        super().__init__(body, count)
+        self.meta = meta or None
+
+
+class _GroupView(MutableMapping):
+    """Base for the per-group compatibility views.
+
+    The view keeps the group's record dict itself rather than the group
+    name, so it stays valid when the group is renamed.
+    """
+    __slots__ = ("_model", "_recs")
+
+    def __init__(self, model, recs: dict):
+        self._model = model
+        self._recs = recs
+
+    def __iter__(self):
+        return iter(self._recs)
+
+    def __len__(self):
+        return len(self._recs)
+
+    def __contains__(self, alias):
+        return alias in self._recs
+
+    def __delitem__(self, alias):
+        if alias not in self._recs:
+            raise KeyError(alias)
+        self._model.delete_prompt(self._group(), alias)
+
+    def _group(self) -> str:
+        # 按字典本身查分组名：改名后仍能找到
+        for name, recs in self._model.records.items():
+            if recs is self._recs:
+                return name
+        raise KeyError("group no longer exists")
+
+    def keys(self):
+        return self._recs.keys()
+
+    def copy(self) -> dict:
+        return dict(self.items())
+
+
+class GroupTextView(_GroupView):
+    """``alias -> text`` view of one group."""
+    __slots__ = ()
+
+    def __getitem__(self, alias):
+        return self._model.text_of(self._recs[alias])
+
+    def __setitem__(self, alias, text):
+        self._model.add_prompt(self._group(), alias, text)
+
+    def __repr__(self):
+        return f"GroupTextView({len(self._recs)} prompts)"
+
+
+class GroupCountView(_GroupView):
+    """``alias -> usage count`` view of one group."""
+    __slots__ = ()
+
+    def __getitem__(self, alias):
+        return self._recs[alias].count
+
+    def __setitem__(self, alias, count):
+        self._model.set_count(self._group(), alias, count)
+
+    def __repr__(self):
+        return f"GroupCountView({dict(self.items())!r})"
+
+
+class _ModelView(Mapping):
+    __slots__ = ("_model",)
+    _group_view: type
+
+    def __init__(self, model):
+        self._model = model
+
+    def __getitem__(self, group):
+        return self._group_view(self._model, self._model.records[group])
+
+    def __iter__(self):
+        return iter(self._model.records)
+
+    def __len__(self):
+        return len(self._model.records)
+
+    def __contains__(self, group):
+        return group in self._model.records
+
+    def keys(self):
+        return self._model.records.keys()
+
+    def __repr__(self):
+        return f"{type(self).__name__}({list(self._model.records)!r})"
+
+
+class TextView(_ModelView):
+    """Read-only ``group -> alias -> text`` view (the old ``prompt_dict``)."""
+    __slots__ = ()
+    _group_view = GroupTextView
+
+
+class CountView(_ModelView):
+    """Read-only ``group -> alias -> count`` view (the old ``usage_counts``)."""
+    __slots__ = ()
+    _group_view = GroupCountView
@@ -0,0 +1,317 @@
+"""Offline "what does it do" search over prompt bodies (TF-IDF).
+
+Bodies are turned into hashed term vectors.  Terms are lower-cased words,
+plus single characters and character bigrams for CJK text.  Each term is
+hashed with CRC32 into :data:`DIM` columns, so no vocabulary has to be
+stored and the hashes are the same in every process.  The rows form a CSR
+matrix: ``indptr`` / ``indices`` / ``data`` arrays holding the sublinear
+term frequency ``1 + log(tf)``.  Document frequencies are kept per column.
+
+IDF changes whenever a prompt changes, so it is not baked into the rows.
+It is applied at query time from a cached weighted copy of ``data`` and
+the row norms.  Any change drops that copy, and the next query rebuilds it
+with a few vector passes.  With NumPy a query is one gather-multiply over
+the non-zeros, a ``reduceat`` per row and an ``argpartition`` for the
+top K.  Without NumPy the same arithmetic runs in pure Python, which is
+fine for small libraries.
+
+Changing or deleting a prompt marks its row dead and appends a new one.
+Dead rows are compacted away once they make up half of the matrix.  The
+index is saved next to the data file (``<data>.semantic``) together with
+a CRC32 of every body, so the next start only re-indexes prompts whose
+text has changed.
+"""
+import io
+import os
+import re
+import sys
+import json
+import math
+import zlib
+import heapq
+import threading
+from array import array
+from typing import Callable, Hashable, Iterable
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency
+    np = None
+
+DIM = 1 << 18
+MAGIC = b"PLSEM\x01\n"
+
+_WORD = re.compile(r"[぀-ヿ㐀-鿿가-힯]+|[^\W_]+")
+_CJK = re.compile(r"[぀-ヿ㐀-鿿가-힯]")
+
+
+def terms(text: str) -> dict[int, int]:
+    """Hashed term counts of ``text``."""
+    counts: dict[int, int] = {}
+    for tok in _WORD.findall(text.lower()):
+        if _CJK.match(tok):
+            # 中日韩文本没有空格：单字 + 相邻两字
+            grams = list(tok) + [tok[i:i + 2] for i in range(len(tok) - 1)]
+        else:
+            grams = (tok,)
+        for g in grams:
+            col = zlib.crc32(g.encode('utf-8')) & (DIM - 1)
+            counts[col] = counts.get(col, 0) + 1
+    return counts
+
+
+def text_crc(text: str) -> int:
+    return zlib.crc32(text.encode('utf-8'))
+
+
+class SemanticIndex:
+    """Hashed TF-IDF rows keyed by ``(group, alias)``."""
+    def __init__(self):
+        self.keys: list[Hashable | None] = []
+        self.row_of: dict[Hashable, int] = {}
+        self.indptr = array('q', [0])
+        self.indices = array('I')
+        self.data = array('f')
+        self.crc = array('I')
+        self.df = array('I', bytes(4 * DIM))
+        self.dirty = False
+        self._weights = None
+        # 查询可在读锁下并发执行，惰性计算的权重缓存需要单独加锁
+        self._prepare_lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.row_of)
+
+    def __contains__(self, key):
+        return key in self.row_of
+
+    # ---------- updates ----------
+    def add(self, key: Hashable, text: str):
+        # 缓存里有数组的 NumPy 视图，扩容前必须先释放
+        self._weights = None
+        self.remove(key)
+        counts = terms(text)
+        cols = sorted(counts)
+        self.row_of[key] = len(self.keys)
+        self.keys.append(key)
+        self.indices.extend(cols)
+        self.data.extend(1.0 + math.log(counts[c]) for c in cols)
+        self.indptr.append(len(self.indices))
+        self.crc.append(text_crc(text))
+        df = self.df
+        for c in cols:
+            df[c] += 1
+        self._changed()
+
+    def remove(self, key: Hashable):
+        row = self.row_of.pop(key, None)
+        if row is None:
+            return
+        self.keys[row] = None
+        df = self.df
+        for c in self.indices[self.indptr[row]:self.indptr[row + 1]]:
+            df[c] -= 1
+        self._changed()
+        if len(self.keys) > 1000 and len(self.row_of) * 2 < len(self.keys):
+            self.compact()
+
+    def rekey(self, old: Hashable, new: Hashable):
+        row = self.row_of.pop(old, None)
+        if row is None:
+            return
+        self.row_of[new] = row
+        self.keys[row] = new
+        self.dirty = True
+
+    def compact(self):
+        """Drop dead rows."""
+        self._weights = None
+        keys, indptr, indices, data, crc = [], array('q', [0]), array('I'), array('f'), array('I')
+        for row, key in enumerate(self.keys):
+            if key is None:
+                continue
+            lo, hi = self.indptr[row], self.indptr[row + 1]
+            indices.extend(self.indices[lo:hi])
+            data.extend(self.data[lo:hi])
+            indptr.append(len(indices))
+            crc.append(self.crc[row])
+            keys.append(key)
+        self.keys, self.indptr, self.indices, self.data, self.crc = keys, indptr, indices, data, crc
+        self.row_of = {k: i for i, k in enumerate(keys)}
+        self._changed()
+
+    def sync(self, items: Iterable[tuple[Hashable, str]]):
+        """Bring the index in line with ``(key, text)`` pairs; returns the number re-indexed."""
+        seen = set()
+        changed = 0
+        for key, text in items:
+            seen.add(key)
+            changed += self.update(key, text)
+        return changed + self.prune(seen)
+
+    def update(self, key: Hashable, text: str) -> bool:
+        """Re-index ``key`` unless its row already holds ``text``."""
+        row = self.row_of.get(key)
+        if row is not None and self.crc[row] == text_crc(text):
+            return False
+        self.add(key, text)
+        return True
+
+    def prune(self, keys) -> int:
+        """Remove every key not in ``keys``; returns how many were removed."""
+        live = keys if isinstance(keys, (set, frozenset, dict)) else set(keys)
+        dead = [k for k in self.row_of if k not in live]
+        for key in dead:
+            self.remove(key)
+        return len(dead)
+
+    def _changed(self):
+        self.dirty = True
+        self._weights = None
+
+    # ---------- query ----------
+    def _idf(self, cols):
+        n = len(self.row_of)
+        return [math.log((1 + n) / (1 + self.df[c])) + 1.0 for c in cols]
+
+    def _prepare(self):
+        """idf-weighted ``data`` and row norms, cached until the next change."""
+        weights = self._weights
+        if weights is not None:
+            return weights
+        with self._prepare_lock:
+            if self._weights is None:
+                self._compute_weights()
+            return self._weights
+
+    def _compute_weights(self):
+        n = len(self.row_of)
+        if np is not None:
+            indptr = np.frombuffer(self.indptr, dtype=np.int64)
+            indices = np.frombuffer(self.indices, dtype=np.uint32)
+            data = np.frombuffer(self.data, dtype=np.float32)
+            idf = np.log((1 + n) / (1.0 + np.frombuffer(self.df, dtype=np.uint32))).astype(np.float32) + 1
+            wdata = data * idf[indices]
+            norms = np.sqrt(_row_sums(wdata * wdata, indptr))
+            dead = np.array([k is None for k in self.keys], dtype=bool)
+            norms[dead | (norms == 0)] = np.inf
+            self._weights = (idf, wdata, norms, indptr, indices)
+        else:
+            idf = {}
+            norms = []
+            for row in range(len(self.keys)):
+                lo, hi = self.indptr[row], self.indptr[row + 1]
+                total = 0.0
+                for c, v in zip(self.indices[lo:hi], self.data[lo:hi]):
+                    w = idf.get(c)
+                    if w is None:
+                        w = idf[c] = self._idf((c,))[0]
+                    total += (v * w) ** 2
+                norms.append(math.sqrt(total) if total and self.keys[row] is not None else math.inf)
+            self._weights = (idf, None, norms, None, None)
+
+    def query(self, text: str, limit: int = 20,
+              allow: Callable[[Hashable], bool] | None = None) -> list[tuple[Hashable, float]]:
+        """Top ``limit`` keys by cosine similarity to ``text``, best first."""
+        counts = terms(text)
+        if not counts or not self.row_of:
+            return []
+        cols = list(counts)
+        q = {c: (1.0 + math.log(counts[c])) * w for c, w in zip(cols, self._idf(cols))}
+        qnorm = math.sqrt(sum(w * w for w in q.values()))
+        q = {c: w / qnorm for c, w in q.items()}
+        if np is not None:
+            ranked = self._query_np(q, limit, allow)
+        else:
+            ranked = self._query_py(q, limit, allow)
+        return [(self.keys[row], score) for row, score in ranked if score > 0]
+
+    def _query_np(self, q: dict[int, float], k: int, allow):
+        idf, wdata, norms, indptr, indices = self._prepare()
+        qvec = np.zeros(DIM, dtype=np.float32)
+        qvec[list(q)] = list(q.values())
+        scores = _row_sums(wdata * qvec[indices], indptr) / norms
+        if allow is not None:
+            keep = np.fromiter((key is not None and allow(key) for key in self.keys), bool, len(self.keys))
+            scores[~keep] = 0
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(r), float(scores[r])) for r in top]
+
+    def _query_py(self, q: dict[int, float], k: int, allow):
+        idf, _, norms, _, _ = self._prepare()
+        scored = []
+        for row, key in enumerate(self.keys):
+            if key is None or (allow is not None and not allow(key)):
+                continue
+            lo, hi = self.indptr[row], self.indptr[row + 1]
+            dot = 0.0
+            for c, v in zip(self.indices[lo:hi], self.data[lo:hi]):
+                qw = q.get(c)
+                if qw is not None:
+                    dot += qw * v * idf[c]
+            if dot:
+                scored.append((dot / norms[row], row))
+        return [(row, score) for score, row in heapq.nlargest(k, scored)]
+
+    # ---------- persistence ----------
+    def save(self, path: str):
+        if len(self.row_of) * 2 < len(self.keys):
+            self.compact()
+        header = json.dumps({
+            "dim": DIM,
+            "byteorder": sys.byteorder,
+            "keys": self.keys,
+            "nnz": len(self.indices),
+        }, ensure_ascii=False).encode('utf-8')
+        tmp = path + ".tmp"
+        with open(tmp, 'wb') as f:
+            f.write(MAGIC)
+            f.write(len(header).to_bytes(4, 'big'))
+            f.write(header)
+            for arr in (self.indptr, self.indices, self.data, self.crc, self.df):
+                arr.tofile(f)
+        os.replace(tmp, path)
+        self.dirty = False
+
+    @classmethod
+    def load(cls, path: str) -> "SemanticIndex":
+        with open(path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path}: not a semantic index")
+            size = int.from_bytes(f.read(4), 'big')
+            header = json.loads(f.read(size).decode('utf-8'))
+            if header.get("dim") != DIM:
+                raise ValueError(f"{path}: index dimension {header.get('dim')} != {DIM}")
+            index = cls()
+            keys = [tuple(k) if k is not None else None for k in header["keys"]]
+            nnz = header["nnz"]
+            index.indptr = _read(f, 'q', len(keys) + 1)
+            index.indices = _read(f, 'I', nnz)
+            index.data = _read(f, 'f', nnz)
+            index.crc = _read(f, 'I', len(keys))
+            index.df = _read(f, 'I', DIM)
+        if header.get("byteorder") != sys.byteorder:
+            for arr in (index.indptr, index.indices, index.data, index.crc, index.df):
+                arr.byteswap()
+        index.keys = keys
+        index.row_of = {k: i for i, k in enumerate(keys) if k is not None}
+        return index
+
+
+def _read(f: io.BufferedReader, code: str, n: int) -> array:
+    arr = array(code)
+    arr.fromfile(f, n)
+    return arr
+
+
+def _row_sums(values, indptr):
+    """Per-row sums of CSR ``values``; empty rows give 0."""
+    starts = indptr[:-1]
+    if not len(values):
+        return np.zeros(len(starts), dtype=np.float32)
+    # reduceat 对空行返回下一个元素，且起点不能越界：先截断，再把空行置零
+    sums = np.add.reduceat(values, np.minimum(starts, len(values) - 1))
+    sums[starts == indptr[1:]] = 0
+    return sums
@@ -0,0 +1,144 @@
+"""Command handlers behind the IPC protocol.
+
+:class:`PromptService` answers requests against a :class:`PromptController`
+and is shared by every host of the local server.  Host specific actions
+(showing the window, setting the clipboard, refreshing the UI after a
+reload) are injected as callbacks so the service itself stays free of Qt.
+
+When requests are handled on several threads, pass a :class:`RWLock`:
+read-only commands then run concurrently and the others exclusively.
+"""
+import logging
+from contextlib import nullcontext
+from typing import Callable
+
+from .controller import PromptController
+from .ipc import make_response
+from . import metrics
+from .locks import RWLock
+
+logger = logging.getLogger(__name__)
+
+# 只读命令，可在读锁下并发执行
+READ_COMMANDS = frozenset(("ping", "groups", "search", "get", "metrics"))
+
+
+class PromptService:
+    def __init__(self, controller: PromptController,
+                 activate: Callable[[], None] | None = None,
+                 set_clipboard: Callable[[str], None] | None = None,
+                 on_reload: Callable[[], None] | None = None,
+                 on_usage: Callable[[str, str], None] | None = None,
+                 lock: RWLock | None = None):
+        self.controller = controller
+        self.lock = lock
+        self._activate = activate
+        self._set_clipboard = set_clipboard
+        self._on_reload = on_reload
+        self._on_usage = on_usage
+        self._handlers = {
+            "ping": self.ping,
+            "activate": self.activate,
+            "groups": self.groups,
+            "search": self.search,
+            "get": self.get,
+            "copy": self.copy,
+            "increment": self.increment,
+            "reload": self.reload,
+            "metrics": self.metrics,
+        }
+
+    @property
+    def commands(self) -> list[str]:
+        return list(self._handlers)
+
+    def handle(self, request: dict) -> dict:
+        """Run one request and build its response; never raises."""
+        if not isinstance(request, dict):
+            return make_response({}, error="request must be an object")
+        handler = self._handlers.get(request.get("cmd"))
+        if handler is None:
+            return make_response(request, error=f"unknown command: {request.get('cmd')!r}")
+        args = request.get("args") or {}
+        metrics.incr("ipc.requests")
+        try:
+            with metrics.timer("ipc.request_ms"), self._locked(request.get("cmd")):
+                return make_response(request, handler(**args))
+        except (KeyError, TypeError, ValueError) as e:
+            return make_response(request, error=f"{type(e).__name__}: {e}")
+        except Exception as e:
+            logger.error(f"IPC command {request.get('cmd')} failed", exc_info=True)
+            return make_response(request, error=str(e))
+
+    def _locked(self, cmd: str):
+        if self.lock is None:
+            return nullcontext()
+        return self.lock.read_locked() if cmd in READ_COMMANDS else self.lock.write_locked()
+
+    # ---------- commands ----------
+    def ping(self):
+        from .version import __version__
+        return {"version": __version__}
+
+    def activate(self):
+        if self._activate is None:
+            raise ValueError("this instance has no window")
+        self._activate()
+        return True
+
+    def groups(self):
+        return [{"group": g, "prompts": len(recs)} for g, recs in self.controller.model.records.items()]
+
+    def search(self, query: str = "", group: str | None = None, limit: int = 20,
+               semantic: bool = False):
+        """Case-insensitive alias search, most used prompts first.
+
+        With ``semantic`` the prompt bodies are ranked by TF-IDF similarity
+        to ``query`` instead, and each hit carries a ``score``.
+        """
+        if semantic:
+            hits = self.controller.model.semantic_search(query, group, limit)
+            return [{"group": g, "alias": a, "score": round(sc, 4)} for g, a, sc in hits]
+        hits = self.controller.model.search(query, group, limit)
+        return [{"group": g, "alias": a, "count": c} for g, a, c in hits]
+
+    def _require(self, group: str, alias: str):
+        rec = self.controller.model.get_record(group, alias)
+        if rec is None:
+            raise KeyError(f"no prompt {group}/{alias}")
+        return rec
+
+    def _text(self, group: str, alias: str, values: dict | None) -> str:
+        # 传入 values 时按模板填充，否则返回原文
+        if values is None:
+            return self.controller.get_prompt_text(group, alias)
+        return self.controller.render_prompt(group, alias, values)
+
+    def get(self, group: str, alias: str, values: dict | None = None):
+        rec = self._require(group, alias)
+        return {"group": group, "alias": alias, "text": self._text(group, alias, values),
+                "count": rec.count,
+                "fields": [f._asdict() for f in self.controller.template_fields(group, alias)]}
+
+    def copy(self, group: str, alias: str, values: dict | None = None):
+        if self._set_clipboard is None:
+            raise ValueError("this instance has no clipboard")
+        self._require(group, alias)
+        self._set_clipboard(self._text(group, alias, values))
+        return self.increment(group, alias)
+
+    def increment(self, group: str, alias: str):
+        rec = self._require(group, alias)
+        self.controller.increment_usage(group, alias)
+        if self._on_usage:
+            self._on_usage(group, alias)
+        return rec.count
+
+    def metrics(self):
+        return metrics.snapshot()
+
+    def reload(self):
+        self.controller.model.load()
+        if self._on_reload:
+            self._on_reload()
+        return sum(len(recs) for recs in self.controller.model.records.values())
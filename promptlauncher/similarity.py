@@ -0,0 +1,251 @@
+"""Near-duplicate detection for prompt bodies (MinHash with LSH banding).
+
+Each body is reduced to a set of token 3-shingles.  A single hash is
+computed per shingle and the hashes are split into :data:`NUM_BINS` bins,
+keeping the minimum of each bin.  This is one-permutation MinHash, with
+empty bins filled from their right neighbour, so the cost is linear in the
+text length and not ``shingles x permutations``.
+
+The signature is cut into :data:`BANDS` bands of :data:`ROWS` values.
+Prompts that share a band become candidates.  With 8 x 4 the candidate
+curve is centred near a Jaccard similarity of 0.6, well below the default
+warning threshold of 0.8.  Candidates are then confirmed with the exact
+Jaccard similarity of their shingle sets, so a lookup only compares
+against a handful of prompts instead of all of them.
+
+Shingle hashes use Python's ``hash`` and are only stable within one
+process.  The index is built in memory and never saved.
+"""
+import re
+from array import array
+from bisect import bisect_left
+from typing import Callable, Hashable, Iterable
+
+NUM_BINS = 32
+BANDS = 8
+ROWS = NUM_BINS // BANDS
+SHINGLE = 3
+THRESHOLD = 0.8
+
+_BIN_BITS = NUM_BINS.bit_length() - 1
+_MASK = (1 << 64) - 1
+_EMPTY = _MASK
+# 桶表的每一项把 40 位分段哈希与 24 位槽号拼成一个 64 位整数
+_SLOT_BITS = 24
+_BAND_MASK = (1 << (64 - _SLOT_BITS)) - 1
+MAX_SLOTS = 1 << _SLOT_BITS
+# 中日韩文字逐字切分，其他文字按单词切分
+_TOKEN = re.compile(r"[぀-ヿ㐀-鿿가-힯]|[^\W_]+")
+
+
+def shingles(text: str) -> set[int]:
+    """Hashes of the token 3-shingles of ``text`` (case-insensitive)."""
+    tokens = _TOKEN.findall(text.lower())
+    if len(tokens) < SHINGLE:
+        return {hash(tuple(tokens))} if tokens else set()
+    return set(map(hash, zip(tokens, tokens[1:], tokens[2:])))
+
+
+def jaccard(a: set, b: set) -> float:
+    if not a or not b:
+        return 0.0
+    inter = len(a & b)
+    return inter / (len(a) + len(b) - inter)
+
+
+def signature(sh: Iterable[int]) -> list[int] | None:
+    """One-permutation MinHash signature, or ``None`` for an empty set."""
+    sig = [_EMPTY] * NUM_BINS
+    for h in sh:
+        h &= _MASK
+        b = h & (NUM_BINS - 1)
+        v = h >> _BIN_BITS
+        if v < sig[b]:
+            sig[b] = v
+    if _EMPTY not in sig:
+        return sig
+    if sig.count(_EMPTY) == NUM_BINS:
+        return None
+    # 空桶向右借最近的非空桶，并按距离加偏移以区分来源
+    filled = list(sig)
+    for i in range(NUM_BINS):
+        if sig[i] == _EMPTY:
+            d = 1
+            while sig[(i + d) % NUM_BINS] == _EMPTY:
+                d += 1
+            filled[i] = (sig[(i + d) % NUM_BINS] + d * 0x9E3779B97F4A7C15) & _MASK
+    return filled
+
+
+def band_keys(sig: list[int]) -> tuple[int, ...]:
+    return tuple(hash((b, *sig[b * ROWS:(b + 1) * ROWS])) & _BAND_MASK for b in range(BANDS))
+
+
+def sketch(text: str) -> tuple[int, ...] | None:
+    """Band keys of ``text``, or ``None`` when it has no tokens."""
+    sig = signature(shingles(text))
+    return None if sig is None else band_keys(sig)
+
+
+class SimilarityIndex:
+    """LSH buckets over prompt keys (``(group, alias)`` in the model).
+
+    Every key gets a slot number.  Each band is a sorted ``array`` of
+    ``band_key << 24 | slot``, so a bucket is a contiguous range found by
+    bisection.  With the band keys of every slot kept for removal, this is
+    about 150 bytes per prompt and no text is copied.  A single
+    :meth:`add` is a memmove per band.  :meth:`extend` appends and sorts
+    once, which is what the initial build uses.
+    """
+    def __init__(self):
+        self._slots: list[Hashable | None] = []
+        self._slot_of: dict[Hashable, int] = {}
+        self._free: list[int] = []
+        self._keys = array('Q')  # 槽号 * BANDS 起的各段哈希，删除时使用
+        self._bands = [array('Q') for _ in range(BANDS)]
+
+    def __len__(self):
+        return len(self._slot_of)
+
+    def __contains__(self, key):
+        return key in self._slot_of
+
+    def _alloc(self, key: Hashable, bands: tuple[int, ...]) -> int:
+        if self._free:
+            slot = self._free.pop()
+            self._slots[slot] = key
+            self._keys[slot * BANDS:(slot + 1) * BANDS] = array('Q', bands)
+        else:
+            slot = len(self._slots)
+            if slot >= MAX_SLOTS:
+                raise OverflowError("similarity index is full")
+            self._slots.append(key)
+            self._keys.extend(bands)
+        self._slot_of[key] = slot
+        return slot
+
+    def add(self, key: Hashable, text: str):
+        self.remove(key)
+        bands = sketch(text)
+        if bands is None:
+            return
+        slot = self._alloc(key, bands)
+        for arr, bk in zip(self._bands, bands):
+            entry = bk << _SLOT_BITS | slot
+            arr.insert(bisect_left(arr, entry), entry)
+
+    def extend(self, entries: Iterable[tuple[Hashable, tuple[int, ...] | None]]):
+        """Add many ``(key, sketch)`` pairs; keys must not be indexed yet."""
+        for key, bands in entries:
+            if bands is None:
+                continue
+            slot = self._alloc(key, bands)
+            for arr, bk in zip(self._bands, bands):
+                arr.append(bk << _SLOT_BITS | slot)
+        for i, arr in enumerate(self._bands):
+            self._bands[i] = array('Q', sorted(arr))
+
+    def remove(self, key: Hashable):
+        slot = self._slot_of.pop(key, None)
+        if slot is None:
+            return
+        for arr, bk in zip(self._bands, self._keys[slot * BANDS:(slot + 1) * BANDS]):
+            entry = bk << _SLOT_BITS | slot
+            i = bisect_left(arr, entry)
+            if i < len(arr) and arr[i] == entry:
+                del arr[i]
+        self._slots[slot] = None
+        self._free.append(slot)
+
+    def rekey(self, old: Hashable, new: Hashable):
+        """Rename a key (group rename, move) without rehashing its text."""
+        slot = self._slot_of.pop(old, None)
+        if slot is None:
+            return
+        self._slot_of[new] = slot
+        self._slots[slot] = new
+
+    def _bucket(self, band: int, bk: int) -> list[int]:
+        arr = self._bands[band]
+        lo = bisect_left(arr, bk << _SLOT_BITS)
+        hi = bisect_left(arr, (bk + 1) << _SLOT_BITS, lo)
+        return [e & (MAX_SLOTS - 1) for e in arr[lo:hi]]
+
+    def candidates(self, bands: tuple[int, ...]) -> set:
+        found = set()
+        for band, bk in enumerate(bands):
+            found.update(self._slots[s] for s in self._bucket(band, bk))
+        return found
+
+    def query(self, text: str, text_of: Callable[[Hashable], str],
+              threshold: float = THRESHOLD, exclude: Hashable | None = None) -> list[tuple[Hashable, float]]:
+        """Keys whose text has a Jaccard similarity >= ``threshold``, best first."""
+        sh = shingles(text)
+        sig = signature(sh)
+        if sig is None:
+            return []
+        hits = []
+        for key in self.candidates(band_keys(sig)):
+            if key == exclude:
+                continue
+            score = jaccard(sh, shingles(text_of(key)))
+            if score >= threshold:
+                hits.append((key, score))
+        hits.sort(key=lambda h: -h[1])
+        return hits
+
+    def _shared_buckets(self):
+        """Yield the slots of every bucket with more than one member."""
+        for arr in self._bands:
+            run: list[int] = []
+            prev = None
+            for e in arr:
+                bk = e >> _SLOT_BITS
+                if bk != prev:
+                    if len(run) > 1:
+                        yield run
+                    run = []
+                    prev = bk
+                run.append(e & (MAX_SLOTS - 1))
+            if len(run) > 1:
+                yield run
+
+    def clusters(self, text_of: Callable[[Hashable], str],
+                 threshold: float = THRESHOLD) -> list[list[Hashable]]:
+        """Groups of near-duplicate keys, largest first.
+
+        Each shared bucket is checked against its first member only, so a
+        bucket of ``m`` identical prompts costs ``m`` comparisons, not ``m²``.
+        """
+        parent: dict[int, int] = {}
+
+        def find(s):
+            while parent.get(s, s) != s:
+                parent[s] = parent.get(parent[s], parent[s])
+                s = parent[s]
+            return s
+
+        cache: dict[int, set] = {}
+
+        def sh_of(s):
+            sh = cache.get(s)
+            if sh is None:
+                sh = cache[s] = shingles(text_of(self._slots[s]))
+            return sh
+
+        for run in self._shared_buckets():
+            anchor = run[0]
+            for other in run[1:]:
+                if find(anchor) == find(other):
+                    continue
+                if jaccard(sh_of(anchor), sh_of(other)) >= threshold:
+                    parent[find(other)] = find(anchor)
+
+        groups: dict[int, list] = {}
+        for s in list(parent):
+            groups.setdefault(find(s), []).append(s)
+        for root, members in groups.items():
+            if root not in members:
+                members.append(root)
+        return sorted((sorted(self._slots[s] for s in m) for m in groups.values()),
+                      key=lambda m: (-len(m), m))
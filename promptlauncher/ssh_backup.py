@@ -1,15 +1,47 @@
 import os
+import json
+import shlex
+import hashlib
 import paramiko
 import logging
+from contextlib import contextmanager
 from .logging_config import setup_logging
+from . import metrics
 import posixpath
 import threading
+import time
 from PyQt6.QtCore import QTimer
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 setup_logging(logging.DEBUG)
 
+# 远程哈希旁路文件：没有 shell 权限的服务器上记录上传内容的哈希与大小
+SIDECAR_SUFFIX = ".sha256.json"
+# 传输中的临时文件，校验通过后才改名为正式文件
+PART_SUFFIX = ".part"
+# 临时文件对应内容的哈希与大小，续传前核对
+RESUME_SUFFIX = ".resume.json"
+# 恢复时下载到本地的临时文件
+RESTORE_SUFFIX = ".restore"
+# 每块写完后，断线重连可从已传长度继续
+CHUNK = 1 << 20
+# 远程计算哈希：优先 sha256sum，其次 shasum（macOS/BSD）
+_REMOTE_HASH_CMD = "sha256sum -- {0} 2>/dev/null || shasum -a 256 {0}"
+_EXEC_TIMEOUT = 60
+
+
+def file_sha256(path: str) -> tuple[int, str]:
+    """Return ``(size, hex sha256)`` of a local file, read in blocks."""
+    h = hashlib.sha256()
+    size = 0
+    with open(path, 'rb') as f:
+        while block := f.read(1 << 20):
+            h.update(block)
+            size += len(block)
+    return size, h.hexdigest()
+
+
 class SshBackupManager:
     """
     定时通过 SSH/SFTP 备份本地文件到远程服务器。
@@ -19,13 +51,28 @@ class SshBackupManager:
         "user": "username",
         "remote_path": "/remote/dir",
         "key_path": "C:/path/to/key.pem",
-        "interval": 60  # 备份间隔(秒)
+        "interval": 60,  # 备份间隔(秒)
+        "verify_retries": 2,  # 上传后校验不一致时重传次数
+        "audit_interval": 86400  # 定期审计远程备份(秒)，0 表示关闭
     }
+
+    上传后不回读文件，而是比较远程文件大小和服务器上计算的 SHA-256
+    （通过 exec 通道运行 sha256sum）。服务器不允许执行命令时退回到
+    旁路文件 ``<文件>.sha256.json``：只核对大小，并记下上传内容的哈希，
+    供以后审计和跳过未变化的上传。
+
+    上传先分块流水线写入 ``<文件>.part``，连接中断后下次从已写入的长度
+    续传；校验通过后再改名为正式文件，远程始终保留一份完整的备份。
+    :meth:`fetch` 以同样方式下载备份用于恢复。
     """
     def __init__(self, cfg: dict, local_file: str, window=None):
         self.cfg = cfg
         self.local_file = local_file
         self.window = window
+        # 服务器是否支持 exec 通道；None 表示尚未尝试
+        self._exec_ok: bool | None = None
+        # 备份与审计共用连接配置，不允许并发
+        self._lock = threading.Lock()
         interval = int(cfg.get("interval", 10))
         logger.debug(f"SSHBackupManager init: interval={interval} minutes, local_file={local_file}, cfg={cfg}")
         self.timer = QTimer()
@@ -35,22 +82,31 @@ class SshBackupManager:
         self.timer.start(interval * 1000)
         # 立即异步执行一次备份
         self._start_backup_thread()
+        audit_interval = int(cfg.get("audit_interval", 0))
+        self.audit_timer = QTimer()
+        self.audit_timer.timeout.connect(
+            lambda: threading.Thread(target=self.audit, daemon=True).start()
+        )
+        if audit_interval > 0:
+            self.audit_timer.start(audit_interval * 1000)
 
-    def backup(self):
-        timestamp = datetime.now()
-        logger.debug(f"Starting SSH backup at {timestamp}")
+    def _settings(self):
         host = self.cfg.get("host")
-        port = int(self.cfg.get("port", 22))
         user = self.cfg.get("user")
         remote_path = self.cfg.get("remote_path")
         key_path = self.cfg.get("key_path")
         if not all([host, user, remote_path, key_path]):
-            logger.warning("SSH backup skipped: incomplete configuration")
-            return  # 配置不全时跳过
+            return None
+        return host, int(self.cfg.get("port", 22)), user, remote_path, key_path
+
+    @contextmanager
+    def _connect(self):
+        """建立 SFTP 连接，产出 (transport, sftp, 远程文件路径)"""
+        host, port, user, remote_path, key_path = self._settings()
         logger.debug(f"Connecting to {host}:{port} as {user}, remote_path={remote_path}")
-        success = False
         transport = None
         sftp = None
+        started = time.perf_counter()
         try:
             logger.debug(f"Loading private key from {key_path}")
             key = paramiko.RSAKey.from_private_key_file(key_path)
@@ -58,16 +114,9 @@ class SshBackupManager:
             transport = paramiko.Transport((host, port))
             transport.connect(username=user, pkey=key)
             sftp = paramiko.SFTPClient.from_transport(transport)
-            logger.debug("Ensuring remote directory exists")
-            self._ensure_remote_dir(sftp, remote_path)
-            filename = os.path.basename(self.local_file)
-            remote_file = posixpath.join(remote_path, filename)
-            logger.debug(f"Uploading {self.local_file} to {remote_file}")
-            sftp.put(self.local_file, remote_file)
-            logger.info("SSH backup successful")
-            success = True
-        except Exception as e:
-            logger.error(f"SSH backup error: {e}", exc_info=True)
+            metrics.observe("backup.connect_ms", (time.perf_counter() - started) * 1000)
+            remote_file = posixpath.join(remote_path, os.path.basename(self.local_file))
+            yield transport, sftp, remote_file
         finally:
             if sftp:
                 try:
@@ -79,10 +128,258 @@ class SshBackupManager:
                     transport.close()
                 except Exception:
                     logger.debug("Error closing transport", exc_info=True)
+
+    def backup(self):
+        timestamp = datetime.now()
+        logger.debug(f"Starting SSH backup at {timestamp}")
+        if self._settings() is None:
+            logger.warning("SSH backup skipped: incomplete configuration")
+            return  # 配置不全时跳过
+        success = False
+        detail = None
+        started = time.perf_counter()
+        try:
+            with self._lock, self._connect() as (transport, sftp, remote_file):
+                logger.debug("Ensuring remote directory exists")
+                self._ensure_remote_dir(sftp, posixpath.dirname(remote_file))
+                connected = time.perf_counter()
+                detail = self._upload(transport, sftp, remote_file)
+                metrics.observe("backup.transfer_ms", (time.perf_counter() - connected) * 1000)
+            success = detail is None
+            if success:
+                logger.info("SSH backup successful")
+            else:
+                logger.error(f"SSH backup verification failed: {detail}")
+                metrics.incr("backup.failures")
+        except Exception as e:
+            logger.error(f"SSH backup error: {e}", exc_info=True)
+            metrics.incr("backup.failures")
+        finally:
+            metrics.observe("backup.total_ms", (time.perf_counter() - started) * 1000)
+            metrics.incr("backup.runs")
             # 通知 GUI 同步状态
             if self.window:
-                self.window.update_sync_status(timestamp, success)
-    
+                self.window.update_sync_status(timestamp, success, detail)
+
+    def _upload(self, transport, sftp, remote_file: str) -> str | None:
+        """上传并校验，不一致时重传；返回 None 表示成功，否则为失败原因"""
+        retries = int(self.cfg.get("verify_retries", 2))
+        detail = None
+        for attempt in range(retries + 1):
+            size, digest = file_sha256(self.local_file)
+            sidecar = self._read_sidecar(sftp, remote_file + SIDECAR_SUFFIX)
+            if attempt == 0 and sidecar == {"size": size, "sha256": digest} \
+                    and self._remote_size(sftp, remote_file) == size:
+                # 远程已是同一内容，不必重传
+                logger.debug("Remote copy is up to date, skipping upload")
+                metrics.incr("backup.skipped")
+                return None
+            logger.debug(f"Uploading {self.local_file} to {remote_file} (attempt {attempt + 1})")
+            part = remote_file + PART_SUFFIX
+            self._put_resumable(sftp, part, size, digest)
+            detail = self._verify(transport, sftp, part, size, digest)
+            if detail is None:
+                self._replace(sftp, part, remote_file)
+                self._write_sidecar(sftp, remote_file + SIDECAR_SUFFIX, size, digest)
+                self._remove(sftp, part + RESUME_SUFFIX)
+                return None
+            logger.warning(f"Verification of {part} failed: {detail}")
+            metrics.incr("backup.verify_failures")
+            # 内容有误：丢弃临时文件，下次从头传
+            self._remove(sftp, part)
+            self._remove(sftp, part + RESUME_SUFFIX)
+        return detail
+
+    def _put_resumable(self, sftp, part: str, size: int, digest: str):
+        """分块写入远程临时文件；临时文件属于同一内容时从其长度续传"""
+        marker = part + RESUME_SUFFIX
+        offset = 0
+        if self._read_sidecar(sftp, marker) == {"size": size, "sha256": digest}:
+            offset = min(self._remote_size(sftp, part) or 0, size)
+        else:
+            self._write_sidecar(sftp, marker, size, digest)
+        if offset:
+            logger.info(f"Resuming upload of {part} at {offset}/{size} bytes")
+            metrics.incr("backup.resumed")
+        with open(self.local_file, 'rb') as src, sftp.open(part, 'r+' if offset else 'w') as dst:
+            # 流水线写：不逐块等待服务器确认，高延迟链路上吞吐高得多
+            dst.set_pipelined(True)
+            src.seek(offset)
+            dst.seek(offset)
+            while block := src.read(CHUNK):
+                dst.write(block)
+            if (self._remote_size(sftp, part) or 0) > size:
+                dst.truncate(size)
+
+    def fetch(self) -> str:
+        """下载远程备份到 ``<本地文件>.restore`` 并校验，返回该路径。
+
+        断线后再次调用从已下载的长度续传。无法校验或内容不一致时抛出
+        ``IOError``；本地数据文件不受影响，由调用方决定何时替换。
+        """
+        dest = self.local_file + RESTORE_SUFFIX
+        with self._lock, self._connect() as (transport, sftp, remote_file):
+            size = self._remote_size(sftp, remote_file)
+            if size is None:
+                raise IOError("远程没有备份")
+            expected = self._read_sidecar(sftp, remote_file + SIDECAR_SUFFIX)
+            if expected is not None and expected["size"] == size:
+                digest = expected["sha256"]
+            else:
+                digest = self._remote_sha256(transport, remote_file)
+                if digest is None:
+                    raise IOError("无法取得远程备份的哈希，不能校验")
+            with metrics.timer("backup.restore_ms"):
+                self._get_resumable(sftp, remote_file, dest, size, digest)
+        if file_sha256(dest) != (size, digest):
+            self._discard_local(dest)
+            raise IOError("下载的备份校验不一致")
+        self._discard_local(dest + RESUME_SUFFIX)
+        return dest
+
+    def _get_resumable(self, sftp, remote_file: str, dest: str, size: int, digest: str):
+        marker = dest + RESUME_SUFFIX
+        offset = 0
+        try:
+            with open(marker, 'r', encoding='utf-8') as f:
+                if json.load(f) == {"size": size, "sha256": digest}:
+                    offset = min(os.path.getsize(dest), size)
+        except (OSError, ValueError):
+            pass
+        if not offset:
+            with open(marker, 'w', encoding='utf-8') as f:
+                json.dump({"size": size, "sha256": digest}, f)
+        else:
+            logger.info(f"Resuming download of {remote_file} at {offset}/{size} bytes")
+        with sftp.open(remote_file, 'r') as src, open(dest, 'r+b' if offset else 'wb') as dst:
+            src.seek(offset)
+            dst.seek(offset)
+            # 预取：一次发出多个读请求，而不是每块一个往返
+            src.prefetch(size)
+            while block := src.read(CHUNK):
+                dst.write(block)
+            dst.truncate(size)
+
+    @staticmethod
+    def _discard_local(path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    def _replace(sftp, src: str, dst: str):
+        try:
+            # OpenSSH 扩展：原子替换已有文件
+            sftp.posix_rename(src, dst)
+        except IOError:
+            # 不支持该扩展的服务器上 rename 不能覆盖，只能先删除
+            SshBackupManager._remove(sftp, dst)
+            sftp.rename(src, dst)
+
+    @staticmethod
+    def _remove(sftp, path: str):
+        try:
+            sftp.remove(path)
+        except IOError:
+            pass
+
+    def _verify(self, transport, sftp, remote_file: str, size: int, digest: str) -> str | None:
+        """比较远程大小与服务器端哈希，不下载文件；返回 None 表示一致"""
+        with metrics.timer("backup.verify_ms"):
+            remote_size = self._remote_size(sftp, remote_file)
+            if remote_size != size:
+                return f"大小不一致 ({remote_size} != {size})"
+            remote_digest = self._remote_sha256(transport, remote_file)
+            if remote_digest is not None and remote_digest != digest:
+                return "哈希不一致"
+        return None
+
+    def audit(self) -> bool:
+        """定期审计：检查远程备份仍与上传时记录的哈希一致，损坏时重新备份"""
+        if self._settings() is None:
+            return False
+        timestamp = datetime.now()
+        detail = None
+        try:
+            with self._lock, self._connect() as (transport, sftp, remote_file):
+                sidecar = self._read_sidecar(sftp, remote_file + SIDECAR_SUFFIX)
+                if sidecar is None:
+                    detail = "缺少哈希记录"
+                else:
+                    detail = self._verify(transport, sftp, remote_file, sidecar["size"], sidecar["sha256"])
+        except Exception as e:
+            logger.error(f"SSH backup audit error: {e}", exc_info=True)
+            return False
+        metrics.incr("backup.audits")
+        if detail is None:
+            logger.info("SSH backup audit passed")
+            return True
+        logger.warning(f"SSH backup audit failed: {detail}; uploading again")
+        metrics.incr("backup.audit_failures")
+        if self.window:
+            self.window.update_sync_status(timestamp, False, f"审计: {detail}")
+        self.backup()
+        return False
+
+    @staticmethod
+    def _remote_size(sftp, remote_file: str) -> int | None:
+        try:
+            return sftp.stat(remote_file).st_size
+        except IOError:
+            return None
+
+    def _remote_sha256(self, transport, remote_file: str) -> str | None:
+        """在服务器上计算 SHA-256；服务器不支持执行命令时返回 None。
+
+        只有服务器明确拒绝（不开通道、拒绝执行或命令失败）才不再尝试；
+        超时和连接错误照常抛出，本次备份或审计算作失败，下次再试。
+        """
+        if self._exec_ok is False:
+            return None
+        try:
+            channel = transport.open_session()
+        except paramiko.ChannelException:
+            return self._exec_unavailable("session channel refused")
+        try:
+            channel.settimeout(_EXEC_TIMEOUT)
+            try:
+                channel.exec_command(_REMOTE_HASH_CMD.format(shlex.quote(remote_file)))
+            except paramiko.SSHException:
+                if not transport.is_active():
+                    raise
+                return self._exec_unavailable("exec request refused")
+            out = b""
+            while chunk := channel.recv(4096):
+                out += chunk
+            status = channel.recv_exit_status()
+        finally:
+            channel.close()
+        digest = out.split(maxsplit=1)[0].decode("ascii", "replace").lower() if out.strip() else ""
+        if status != 0 or len(digest) != 64:
+            return self._exec_unavailable(f"exit {status}")
+        self._exec_ok = True
+        return digest
+
+    def _exec_unavailable(self, reason: str) -> None:
+        logger.info(f"Remote hashing unavailable ({reason}), falling back to the hash sidecar")
+        self._exec_ok = False
+        return None
+
+    @staticmethod
+    def _read_sidecar(sftp, path: str) -> dict | None:
+        try:
+            with sftp.open(path, 'r') as f:
+                data = json.loads(f.read())
+            return {"size": int(data["size"]), "sha256": str(data["sha256"])}
+        except (IOError, ValueError, KeyError, TypeError):
+            return None
+
+    @staticmethod
+    def _write_sidecar(sftp, path: str, size: int, digest: str):
+        with sftp.open(path, 'w') as f:
+            f.write(json.dumps({"size": size, "sha256": digest}))
+
     def _start_backup_thread(self):
         """在后台线程中执行备份，避免阻塞 UI 线程"""
         threading.Thread(target=self.backup, daemon=True).start()
@@ -0,0 +1,212 @@
+"""Per-prompt size statistics: characters, words and estimated tokens.
+
+Counting tokens for a long prompt is far slower than hashing it, so the
+counts are memoized by content in a cache file next to the data file
+(``<data>.stats``).  Each entry is keyed by the CRC32 and length of a
+body.  On start, and after any change, :meth:`StatsIndex.step` works
+through the queued prompts a few hundred at a time.  It only hashes each
+body and looks the hash up, so a prompt is recounted only when its text
+is new.  Switching to another tokenizer starts a new cache.
+
+The default tokenizer is a local estimate (about four Latin characters
+or one CJK character per token).  With ``tiktoken`` installed,
+``"tiktoken:<encoding>"`` counts exactly for OpenAI models, and
+:func:`register_tokenizer` plugs in any other counter.
+
+The index is attached to a :class:`PromptModel` as ``model.stats``.  The
+model reports edits the same way it does to the other indexes.  Lookups
+for painting go by record object, which stays the same across alias and
+group renames.
+"""
+import os
+import re
+import json
+import logging
+from typing import Callable, NamedTuple
+
+from .semantic import text_crc
+
+try:
+    import tiktoken
+except ImportError:  # optional dependency
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TOKENIZER = "estimate"
+
+_CJK = re.compile(r"[぀-ヿ㐀-鿿가-힯]")
+# 词：连续的字母数字；CJK 每个字算一个词
+_WORD = re.compile(r"[぀-ヿ㐀-鿿가-힯]|[^\W_]+")
+
+
+class PromptStats(NamedTuple):
+    chars: int
+    words: int
+    tokens: int
+
+
+def estimate_tokens(text: str) -> int:
+    """About four Latin characters per token, one per CJK character."""
+    latin = len(_CJK.sub("", text))
+    return len(text) - latin + (latin + 3) // 4
+
+
+_TOKENIZERS: dict[str, Callable[[str], int]] = {DEFAULT_TOKENIZER: estimate_tokens}
+
+
+def register_tokenizer(name: str, count: Callable[[str], int]):
+    """Make ``count(text) -> tokens`` available under ``name``."""
+    _TOKENIZERS[name] = count
+
+
+def get_tokenizer(name: str) -> Callable[[str], int]:
+    count = _TOKENIZERS.get(name)
+    if count is not None:
+        return count
+    if name.startswith("tiktoken:"):
+        if tiktoken is None:
+            raise RuntimeError(f"tokenizer {name!r} needs the optional tiktoken package")
+        enc = tiktoken.get_encoding(name.split(":", 1)[1])
+        count = _TOKENIZERS[name] = lambda text: len(enc.encode(text, disallowed_special=()))
+        return count
+    raise ValueError(f"unknown tokenizer: {name!r}")
+
+
+def count_stats(text: str, tokens: Callable[[str], int] = estimate_tokens) -> PromptStats:
+    return PromptStats(len(text), sum(1 for _ in _WORD.finditer(text)), tokens(text))
+
+
+class StatsIndex:
+    """Statistics of every prompt, computed incrementally and memoized by content."""
+    def __init__(self, path: str | None = None, tokenizer: str = DEFAULT_TOKENIZER):
+        self.path = path
+        self.tokenizer = tokenizer
+        try:
+            self._count = get_tokenizer(tokenizer)
+        except (RuntimeError, ValueError) as e:
+            logger.warning(f"{e}; using the estimate instead")
+            self.tokenizer = DEFAULT_TOKENIZER
+            self._count = estimate_tokens
+        self.model = None
+        # (正文 CRC, 长度) -> PromptStats，持久化到磁盘
+        self._memo: dict[tuple[int, int], PromptStats] = {}
+        # (分组, 别名) -> (记录, 内容键, 统计)
+        self._by_key: dict[tuple[str, str], tuple] = {}
+        # id(记录) -> 统计，供绘制时按记录查找
+        self._by_rec: dict[int, PromptStats] = {}
+        self._todo: dict[tuple[str, str], None] = {}
+        self._dirty = False
+        self.counted = 0
+
+    def attach(self, model):
+        """Receive change reports from ``model`` and queue all of its prompts."""
+        self.model = model
+        model.stats = self
+        self._load()
+        self.reset()
+
+    def reset(self):
+        """Queue every prompt again (after a load or a rollback); the memo is kept."""
+        self._by_key.clear()
+        self._by_rec.clear()
+        self._todo = {(g, a): None for g, recs in self.model.records.items() for a in recs}
+
+    # ---------- reports from the model ----------
+    def mark(self, group: str, alias: str):
+        key = (group, alias)
+        entry = self._by_key.pop(key, None)
+        if entry is not None:
+            self._by_rec.pop(id(entry[0]), None)
+        self._todo[key] = None
+
+    def rekey(self, old: tuple[str, str], new: tuple[str, str]):
+        entry = self._by_key.pop(old, None)
+        if entry is not None:
+            self._by_key[new] = entry
+        if old in self._todo:
+            del self._todo[old]
+            self._todo[new] = None
+
+    # ---------- computing ----------
+    @property
+    def pending(self) -> int:
+        return len(self._todo)
+
+    def step(self, n: int | None = 500) -> bool:
+        """Fill in up to ``n`` queued prompts; return ``True`` when none are left."""
+        model = self.model
+        while self._todo and (n is None or n > 0):
+            key = next(iter(self._todo))
+            del self._todo[key]
+            rec = model.get_record(*key)
+            if rec is None:
+                continue
+            text = model.text_of(rec)
+            h = (text_crc(text), len(text))
+            stats = self._memo.get(h)
+            if stats is None:
+                stats = self._memo[h] = count_stats(text, self._count)
+                self._dirty = True
+                self.counted += 1
+            self._by_key[key] = (rec, h, stats)
+            self._by_rec[id(rec)] = stats
+            if n is not None:
+                n -= 1
+        return not self._todo
+
+    def get(self, group: str, alias: str) -> PromptStats | None:
+        entry = self._by_key.get((group, alias))
+        return entry[2] if entry is not None else None
+
+    def of_record(self, rec) -> PromptStats | None:
+        return self._by_rec.get(id(rec))
+
+    def totals(self) -> PromptStats:
+        """Sums over the prompts counted so far (see :attr:`pending`)."""
+        chars = words = tokens = 0
+        for _, _, s in self._by_key.values():
+            chars += s.chars
+            words += s.words
+            tokens += s.tokens
+        return PromptStats(chars, words, tokens)
+
+    # ---------- persistence ----------
+    def _load(self):
+        if not self.path:
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError):
+            logger.warning(f"ignoring unreadable stats cache {self.path}", exc_info=True)
+            return
+        if data.get("tokenizer") != self.tokenizer:
+            return
+        for key, (words, tokens) in data.get("stats", {}).items():
+            crc, length = map(int, key.split(":"))
+            self._memo[(crc, length)] = PromptStats(length, words, tokens)
+
+    def save(self):
+        """Write the memo, keeping only the entries of current prompts."""
+        if not self.path or not self._dirty:
+            return
+        if not self._todo:
+            # 仍有未处理的条目时无法判断哪些缓存已失效，只在处理完后清理
+            live = {h for _, h, _ in self._by_key.values()}
+            self._memo = {h: s for h, s in self._memo.items() if h in live}
+        data = {
+            "tokenizer": self.tokenizer,
+            "stats": {f"{crc}:{length}": [s.words, s.tokens] for (crc, length), s in self._memo.items()},
+        }
+        tmp = self.path + ".tmp"
+        try:
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(data, f, separators=(",", ":"))
+            os.replace(tmp, self.path)
+        except OSError:
+            logger.warning("could not write stats cache", exc_info=True)
+            return
+        self._dirty = False
@@ -0,0 +1,157 @@
+"""Encodings for the prompt data file.
+
+Every encoding turns the plain document ``{group: {alias: {"text", "count"}}}``
+into bytes and back.  Binary encodings start with magic bytes so
+:func:`detect` can tell them apart from JSON without relying on the file
+extension.  Indented and compact JSON are both detected as ``json``.  ``zstd`` and ``msgpack`` are optional and only available when
+the ``zstandard`` / ``msgpack`` packages are installed.
+"""
+import re
+import gzip
+import json
+from typing import Callable, Iterator, NamedTuple
+
+try:
+    import zstandard
+except ImportError:  # optional dependency
+    zstandard = None
+
+try:
+    import msgpack
+except ImportError:  # optional dependency
+    msgpack = None
+
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+# msgpack 本身没有文件头，加一个自定义头以便自动识别
+MSGPACK_MAGIC = b"PLMSGP\x01\n"
+
+
+class Codec(NamedTuple):
+    name: str
+    magic: bytes
+    dumps: Callable[[dict], bytes]
+    loads: Callable[..., dict]
+    available: bool = True
+
+
+def _json_dumps(doc: dict) -> bytes:
+    return json.dumps(doc, ensure_ascii=False, indent=2).encode('utf-8')
+
+
+def _compact_dumps(doc: dict) -> bytes:
+    return json.dumps(doc, ensure_ascii=False, separators=(",", ":")).encode('utf-8')
+
+
+def _json_loads(data: bytes, object_hook=None) -> dict:
+    return json.loads(data.decode('utf-8-sig'), object_hook=object_hook) if data.strip() else {}
+
+
+def _gzip_dumps(doc: dict) -> bytes:
+    # mtime=0 让相同内容得到相同字节，避免无意义的备份上传
+    return gzip.compress(_compact_dumps(doc), compresslevel=3, mtime=0)
+
+
+def _gzip_loads(data: bytes, object_hook=None) -> dict:
+    return _json_loads(gzip.decompress(data), object_hook)
+
+
+def _zstd_dumps(doc: dict) -> bytes:
+    return zstandard.ZstdCompressor(level=3).compress(_compact_dumps(doc))
+
+
+def _zstd_loads(data: bytes, object_hook=None) -> dict:
+    return _json_loads(zstandard.ZstdDecompressor().decompress(data), object_hook)
+
+
+def _msgpack_dumps(doc: dict) -> bytes:
+    return MSGPACK_MAGIC + msgpack.packb(doc, use_bin_type=True)
+
+
+def _msgpack_loads(data: bytes, object_hook=None) -> dict:
+    return msgpack.unpackb(data[len(MSGPACK_MAGIC):], raw=False, object_hook=object_hook) or {}
+
+
+CODECS: dict[str, Codec] = {
+    "json": Codec("json", b"", _json_dumps, _json_loads),
+    "json-compact": Codec("json-compact", b"", _compact_dumps, _json_loads),
+    "json-gz": Codec("json-gz", GZIP_MAGIC, _gzip_dumps, _gzip_loads),
+    "json-zst": Codec("json-zst", ZSTD_MAGIC, _zstd_dumps, _zstd_loads, zstandard is not None),
+    "msgpack": Codec("msgpack", MSGPACK_MAGIC, _msgpack_dumps, _msgpack_loads, msgpack is not None),
+}
+
+
+def get_codec(name: str) -> Codec:
+    codec = CODECS.get(name)
+    if codec is None:
+        raise ValueError(f"unknown data format: {name!r}")
+    if not codec.available:
+        raise RuntimeError(f"data format {name!r} needs an optional package that is not installed")
+    return codec
+
+
+# 逐组解析时把正文解码成文本的函数；没有列出的编码只能整体解析
+_TEXT_DECODERS: dict[str, Callable[[bytes], str]] = {
+    "json": lambda data: data.decode('utf-8-sig'),
+    "json-compact": lambda data: data.decode('utf-8-sig'),
+    "json-gz": lambda data: gzip.decompress(data).decode('utf-8'),
+    "json-zst": lambda data: zstandard.ZstdDecompressor().decompress(data).decode('utf-8'),
+}
+_WS = re.compile(r"[ \t\n\r]*")
+
+
+def iter_groups(name: str, data: bytes, object_hook=None) -> Iterator[tuple[str, dict]]:
+    """Decode ``data`` one top-level ``(group, prompts)`` pair at a time.
+
+    JSON encodings are decompressed and decoded up front, then each group
+    is parsed only when the iterator reaches it, so the caller can show
+    the first groups before the rest of the document is parsed.  Other
+    encodings are decoded in one go.  ``data`` itself is not retained.
+    """
+    decode = _TEXT_DECODERS.get(name)
+    codec = get_codec(name)
+    if decode is None:
+        return iter((codec.loads(data, object_hook=object_hook) or {}).items())
+    return _iter_object(decode(data), json.JSONDecoder(object_hook=object_hook))
+
+
+def _iter_object(text: str, decoder: json.JSONDecoder) -> Iterator[tuple[str, dict]]:
+    pos = _WS.match(text).end()
+    if pos == len(text):
+        return
+    if text[pos] != "{":
+        raise ValueError(f"expected a JSON object at offset {pos}")
+    pos = _WS.match(text, pos + 1).end()
+    if text.startswith("}", pos):
+        return
+    while True:
+        key, pos = decoder.raw_decode(text, pos)
+        if not isinstance(key, str):
+            raise ValueError(f"expected a group name at offset {pos}")
+        pos = _WS.match(text, pos).end()
+        if not text.startswith(":", pos):
+            raise ValueError(f"expected ':' at offset {pos}")
+        value, pos = decoder.raw_decode(text, _WS.match(text, pos + 1).end())
+        yield key, value
+        pos = _WS.match(text, pos).end()
+        if text.startswith(",", pos):
+            pos = _WS.match(text, pos + 1).end()
+        elif text.startswith("}", pos):
+            return
+        else:
+            raise ValueError(f"expected ',' or '}}' at offset {pos}")
+
+
+def detect(head: bytes) -> str:
+    """Name the encoding of a file from its first bytes."""
+    for codec in CODECS.values():
+        if codec.magic and head.startswith(codec.magic):
+            return codec.name
+    # 文件头分不出缩进与紧凑 json，两者都按 json 读取；
+    # 写回时用哪种由配置决定（见 same_encoding）
+    return "json"
+
+
+def same_encoding(a: str, b: str) -> bool:
+    """Whether files written as ``a`` and ``b`` read the same way (no migration needed)."""
+    return a == b or {a, b} == {"json", "json-compact"}
@@ -0,0 +1,135 @@
+"""Prompt templates: ``{name}`` / ``{name=default}`` placeholders.
+
+Templating is opt-in: only a prompt marked as a template (metadata
+``template``) is parsed, every other prompt is copied exactly as written.
+Before copying a template, the user fills in the values; a placeholder
+without a value falls back to its default.  ``{{`` and ``}}`` are literal braces.  Only ``{identifier}``
+and ``{identifier=default}`` are treated as placeholders, so JSON snippets
+and most code in prompts are left alone.
+
+Parsing happens once per prompt.  :func:`compile_template` turns the text
+into a tuple of literal strings and :class:`Field` objects, and
+:class:`TemplateCache` keeps the results in an LRU cache.  The model drops
+an entry whenever the prompt text changes, so rendering on every copy does
+not parse the text again.
+"""
+import re
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable, NamedTuple
+
+_PLACEHOLDER = re.compile(r"\{\{|\}\}|\{([^\W\d]\w*)(?:=([^{}\n]*))?\}")
+
+# 每个变量记住的最近取值个数
+RECENT_LIMIT = 8
+
+
+class Field(NamedTuple):
+    name: str
+    default: str | None
+
+
+class Template:
+    """Compiled template: literal chunks interleaved with fields."""
+    __slots__ = ("parts", "fields")
+
+    def __init__(self, parts: tuple, fields: tuple[Field, ...]):
+        self.parts = parts
+        self.fields = fields
+
+    def __bool__(self):
+        return bool(self.fields)
+
+    def render(self, values: dict[str, str] | None = None) -> str:
+        values = values or {}
+        out = []
+        for part in self.parts:
+            if isinstance(part, Field):
+                val = values.get(part.name)
+                if val is None or val == "":
+                    # 没有默认值的空变量保留原样，便于发现漏填
+                    val = part.default if part.default is not None else f"{{{part.name}}}"
+                out.append(val)
+            else:
+                out.append(part)
+        return "".join(out)
+
+
+def compile_template(text: str) -> Template:
+    parts: list = []
+    fields: dict[str, Field] = {}
+    literal: list[str] = []
+    pos = 0
+    for m in _PLACEHOLDER.finditer(text):
+        literal.append(text[pos:m.start()])
+        pos = m.end()
+        tok = m.group(0)
+        if tok in ("{{", "}}"):
+            literal.append(tok[0])
+            continue
+        if literal:
+            parts.append("".join(literal))
+            literal = []
+        name, default = m.group(1), m.group(2)
+        # 同名变量只收集一次，第一个出现的默认值生效
+        field = fields.setdefault(name, Field(name, default))
+        parts.append(Field(name, default if default is not None else field.default))
+    literal.append(text[pos:])
+    tail = "".join(literal)
+    if tail:
+        parts.append(tail)
+    return Template(tuple(parts), tuple(fields.values()))
+
+
+class TemplateCache:
+    """LRU cache of compiled templates keyed by ``(group, alias)``.
+
+    Thread-safe: the daemon serves ``get`` requests concurrently under a
+    read lock.
+    """
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self._items: OrderedDict[Hashable, Template] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def get(self, key: Hashable, load_text: Callable[[], str]) -> Template:
+        with self._lock:
+            tpl = self._items.get(key)
+            if tpl is not None:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return tpl
+            self.misses += 1
+        # 解析在锁外进行；并发解析同一条时结果相同，后写入的覆盖即可
+        tpl = compile_template(load_text())
+        with self._lock:
+            self._items[key] = tpl
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+        return tpl
+
+    def invalidate(self, key: Hashable):
+        with self._lock:
+            self._items.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+def remember(recent: dict[str, list[str]], values: dict[str, str], limit: int = RECENT_LIMIT):
+    """Move the used ``values`` to the front of each variable's recent list."""
+    for name, val in values.items():
+        if not val:
+            continue
+        seen = [v for v in recent.get(name, []) if v != val]
+        recent[name] = [val] + seen[:limit - 1]
@@ -0,0 +1,141 @@
+"""Record and replay user interaction traces of :class:`PromptWindow`.
+
+A trace is a JSON Lines file of semantic events, not raw input::
+
+    {"t": 0.00, "op": "toggle", "args": {}}
+    {"t": 1.25, "op": "search", "args": {"text": "rev"}}
+    {"t": 2.10, "op": "copy", "args": {"group": "default", "alias": "review"}}
+
+Operations: ``toggle``, ``search``, ``tab``, ``copy``, ``edit`` and
+``rename_group``.  Recording is enabled in the app with the
+``PROMPTLAUNCHER_TRACE=<path>`` environment variable.  Replaying drives the
+window through the same methods the UI uses, while skipping the dialogs.
+This lets a slow session from production be reproduced in the offscreen
+harness (``benchmarks/gui_harness.py``).
+
+This module does not import Qt.  :func:`replay` is given the
+``QApplication`` so that it can process events.
+"""
+import json
+import time
+from typing import Callable, Iterable, NamedTuple
+
+OPS = ("toggle", "search", "tab", "copy", "edit", "rename_group")
+
+
+class TraceEvent(NamedTuple):
+    t: float
+    op: str
+    args: dict
+
+
+class TraceRecorder:
+    """Append events to a JSON Lines file as they happen."""
+    def __init__(self, path: str):
+        self.path = path
+        self._f = open(path, 'a', encoding='utf-8')
+        self._start = time.monotonic()
+
+    def record(self, op: str, **args):
+        line = {"t": round(time.monotonic() - self._start, 4), "op": op, "args": args}
+        self._f.write(json.dumps(line, ensure_ascii=False) + "\n")
+        self._f.flush()
+
+    def close(self):
+        self._f.close()
+
+
+def load_trace(path: str) -> list[TraceEvent]:
+    events = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for lineno, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            obj = json.loads(line)
+            if obj.get("op") not in OPS:
+                raise ValueError(f"{path}:{lineno}: unknown op {obj.get('op')!r}")
+            events.append(TraceEvent(float(obj.get("t", 0)), obj["op"], obj.get("args") or {}))
+    return events
+
+
+def save_trace(path: str, events: Iterable[TraceEvent]):
+    with open(path, 'w', encoding='utf-8') as f:
+        for ev in events:
+            f.write(json.dumps({"t": ev.t, "op": ev.op, "args": ev.args}, ensure_ascii=False) + "\n")
+
+
+def apply_event(window, ev: TraceEvent):
+    """Perform one event on ``window`` the way the UI would, minus dialogs."""
+    a = ev.args
+    if ev.op == "toggle":
+        window.toggle_window()
+    elif ev.op == "search":
+        window.search.setText(a["text"])
+    elif ev.op == "tab":
+        window.nav.set_current_group(a["group"])
+    elif ev.op == "copy":
+        if window.model.get_record(a["group"], a["alias"]) is not None:
+            # 模板按记录的取值填充，不弹出填写框
+            window.copy_prompt(a["group"], a["alias"], a.get("values") or {})
+    elif ev.op == "edit":
+        if window.model.get_record(a["group"], a["old_alias"]) is not None:
+            window.save_prompt_edit(a["group"], a["old_alias"], a["new_alias"], a["text"])
+    elif ev.op == "rename_group":
+        if a["old"] in window.model.records and a["new"] not in window.model.records:
+            window.apply_group_rename(a["old"], a["new"])
+
+
+def replay(window, events: Iterable[TraceEvent], app, realtime: bool = False,
+           on_event: Callable[[TraceEvent], None] | None = None) -> dict[str, list[float]]:
+    """Replay ``events`` and return the latency samples (ms) of each op.
+
+    Each sample covers the action itself plus processing every event it
+    posted, including the repaint, so it is what the user waits for.
+    ``realtime`` keeps the recorded pauses between events.
+    """
+    samples: dict[str, list[float]] = {}
+    start = time.monotonic()
+    for ev in events:
+        if realtime:
+            delay = ev.t - (time.monotonic() - start)
+            if delay > 0:
+                time.sleep(delay)
+        t0 = time.perf_counter()
+        apply_event(window, ev)
+        app.processEvents()
+        ms = (time.perf_counter() - t0) * 1000
+        samples.setdefault(ev.op, []).append(ms)
+        if on_event:
+            on_event(ev)
+    return samples
+
+
+def summarize(samples: list[float]) -> dict:
+    """Exact percentiles of a list of samples."""
+    data = sorted(samples)
+    if not data:
+        return {"count": 0, "p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+
+    def pct(q):
+        return data[min(len(data) - 1, int(q * len(data)))]
+    return {"count": len(data), "p50": pct(0.5), "p95": pct(0.95), "p99": pct(0.99), "max": data[-1]}
+
+
+def check_budgets(report: dict, budgets: dict) -> list[str]:
+    """Compare a harness report with budgets; return the violations.
+
+    ``budgets`` looks like ``{"ops": {"search": {"p95": 16}}, "peak_rss_mb": 300,
+    "qobjects": 5000}``.  Every key is optional.
+    """
+    failures = []
+    for op, limits in budgets.get("ops", {}).items():
+        stats = report["ops"].get(op)
+        if stats is None:
+            continue
+        for key, limit in limits.items():
+            if stats[key] > limit:
+                failures.append(f"{op} {key} {stats[key]:.2f} ms > {limit} ms")
+    for key in ("peak_rss_mb", "qobjects"):
+        if key in budgets and report.get(key) is not None and report[key] > budgets[key]:
+            failures.append(f"{key} {report[key]} > {budgets[key]}")
+    return failures
@@ -1,7 +1,6 @@
 import os, sys
 import logging
-import json
-import urllib.request
+import threading
 import webbrowser
 from .logging_config import setup_logging
 from PyQt6.QtWidgets import (
@@ -9,61 +8,109 @@ from PyQt6.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QMessageBox
 )
 from PyQt6.QtGui import QIcon, QPixmap
-from PyQt6.QtCore import Qt
-from .version import __version__
+from PyQt6.QtCore import Qt, QObject, QTimer, pyqtSignal
+from .paths import UPDATE_CACHE_PATH
+from .updates import DEFAULT_TTL, UpdateInfo, check_latest, endpoint
 
-
-def _parse_version(ver: str) -> tuple:
-    try:
-        return tuple(int(p) for p in ver.strip("v").split("."))
-    except Exception:
-        return (0,)
+logger = logging.getLogger(__name__)
 
 
-def check_update(parent=None):
-    """Check GitHub releases and prompt to open the download page if newer."""
+def _message(parent, text, icon, buttons=QMessageBox.StandardButton.Ok):
     # 统一对话框图标路径
     icon_path = os.path.join(getattr(sys, "_MEIPASS", os.path.dirname(__file__)), "icon.png")
-    url = "https://api.github.com/repos/jiachenwei/PromptLauncher/releases/latest"
-    try:
-        with urllib.request.urlopen(url, timeout=5) as resp:
-            data = json.load(resp)
-        latest = data.get("tag_name", "")
-        if latest and _parse_version(latest) > _parse_version(__version__):
-            dlg = QMessageBox(parent)
-            dlg.setWindowTitle("检查更新")
-            dlg.setText(f"发现新版本 {latest}，是否前往下载？")
-            dlg.setIcon(QMessageBox.Icon.Question)
-            dlg.setStandardButtons(QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
-            dlg.setWindowFlags(dlg.windowFlags() | Qt.WindowType.WindowStaysOnTopHint)
-            dlg.setWindowIcon(QIcon(icon_path))
-            ret = dlg.exec()
+    dlg = QMessageBox(parent)
+    dlg.setWindowTitle("检查更新")
+    dlg.setText(text)
+    dlg.setIcon(icon)
+    dlg.setStandardButtons(buttons)
+    dlg.setWindowFlags(dlg.windowFlags() | Qt.WindowType.WindowStaysOnTopHint)
+    dlg.setWindowIcon(QIcon(icon_path))
+    return dlg.exec()
+
+
+class UpdateChecker(QObject):
+    """在后台线程检查新版本，结果通过信号回到界面线程。
+
+    配置项 ``update``：``url`` 检查地址，``ttl_hours`` 缓存有效期，
+    ``check_interval_hours`` 大于 0 时按间隔静默检查（有新版本才弹托盘通知）。
+    静默检查与手动检查共用磁盘缓存。
+    """
+    _finished = pyqtSignal(object, object, bool)
+
+    def __init__(self, cfg: dict | None = None, tray: QSystemTrayIcon | None = None,
+                 cache_path: str = UPDATE_CACHE_PATH, parent=None):
+        super().__init__(parent)
+        cfg = cfg or {}
+        self.url = endpoint(cfg)
+        self.ttl = float(cfg.get("ttl_hours", DEFAULT_TTL / 3600)) * 3600
+        self.cache_path = cache_path
+        self.tray = tray
+        self._running = False
+        # 静默检查进行中时用户手动点了“检查更新”：结束后再做一次手动检查
+        self._want_report = False
+        self._page = None
+        self._finished.connect(self._on_finished)
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(lambda: self.check(silent=True))
+        interval = float(cfg.get("check_interval_hours", 0))
+        if interval > 0:
+            self.timer.start(int(interval * 3600 * 1000))
+            # 启动后稍等再查，不与首屏加载抢资源
+            QTimer.singleShot(30_000, lambda: self.check(silent=True))
+        if tray is not None:
+            tray.messageClicked.connect(lambda: self._page and webbrowser.open(self._page))
+
+    def check(self, silent: bool = False):
+        """手动检查跳过 TTL（仍带 ETag 条件请求），静默检查优先用缓存"""
+        if self._running:
+            if not silent:
+                self._want_report = True
+            return
+        self._running = True
+        threading.Thread(target=self._work, args=(silent,), daemon=True,
+                         name="update-check").start()
+
+    def _work(self, silent: bool):
+        # 工作线程：只做网络与缓存，不碰界面
+        try:
+            info = check_latest(self.url, self.cache_path, self.ttl, force=not silent)
+            self._finished.emit(info, None, silent)
+        except Exception as e:
+            self._finished.emit(None, e, silent)
+
+    def _on_finished(self, info: UpdateInfo | None, error: Exception | None, silent: bool):
+        self._running = False
+        if self._want_report:
+            self._want_report = False
+            if silent:
+                # 静默结果可能来自缓存，按手动检查重新请求并显示结果
+                self.check(silent=False)
+                return
+        if error is not None:
+            logger.warning(f"update check failed: {error}")
+            if not silent:
+                _message(None, f"检查更新失败: {error}", QMessageBox.Icon.Warning)
+            return
+        logger.info(f"latest release {info.latest} (cached={info.cached})")
+        if silent:
+            if info.newer and self.tray is not None:
+                self._page = info.page
+                self.tray.showMessage("Prompt Launcher", f"发现新版本 {info.latest}，点击前往下载")
+            return
+        if info.newer:
+            ret = _message(None, f"发现新版本 {info.latest}，是否前往下载？", QMessageBox.Icon.Question,
+                           QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
             if ret == QMessageBox.StandardButton.Yes:
-                webbrowser.open("https://github.com/jiachenwei/PromptLauncher/releases/latest")
+                webbrowser.open(info.page)
         else:
-            dlg = QMessageBox(parent)
-            dlg.setWindowTitle("检查更新")
-            dlg.setText("当前已是最新版本")
-            dlg.setIcon(QMessageBox.Icon.Information)
-            dlg.setStandardButtons(QMessageBox.StandardButton.Ok)
-            dlg.setWindowFlags(dlg.windowFlags() | Qt.WindowType.WindowStaysOnTopHint)
-            dlg.setWindowIcon(QIcon(icon_path))
-            dlg.exec()
-    except Exception as e:
-        logger.error("update check failed", exc_info=True)
-        dlg = QMessageBox(parent)
-        dlg.setWindowTitle("检查更新")
-        dlg.setText(f"检查更新失败: {e}")
-        dlg.setIcon(QMessageBox.Icon.Warning)
-        dlg.setStandardButtons(QMessageBox.StandardButton.Ok)
-        dlg.setWindowFlags(dlg.windowFlags() | Qt.WindowType.WindowStaysOnTopHint)
-        dlg.setWindowIcon(QIcon(icon_path))
-        dlg.exec()
+            _message(None, "当前已是最新版本", QMessageBox.Icon.Information)
 
-logger = logging.getLogger(__name__)
 setup_logging()
 
-def create_tray(app, show_cb, hotkey="Ctrl+Alt+P", custom_cb=None):
+def create_tray(app, show_cb, hotkey="Ctrl+Alt+P", custom_cb=None,
+                import_cb=None, export_cb=None, quick_pick=False, quick_pick_cb=None,
+                diagnostics_cb=None, update_cfg=None, duplicates_cb=None, restore_cb=None):
     """Create and return the system tray icon.
 
     If the current platform does not support a system tray, ``None`` is
@@ -89,6 +136,22 @@ def create_tray(app, show_cb, hotkey="Ctrl+Alt+P", custom_cb=None):
 
     action_show = menu.addAction("打开 Prompt 工具")
     action_custom = menu.addAction("自定义热键")
+    if quick_pick_cb:
+        # 勾选后热键打开快速选择框而不是主窗口
+        action_quick = menu.addAction("热键打开快速选择")
+        action_quick.setCheckable(True)
+        action_quick.setChecked(quick_pick)
+        action_quick.toggled.connect(quick_pick_cb)
+    if import_cb:
+        menu.addAction("导入 Prompt…").triggered.connect(import_cb)
+    if export_cb:
+        menu.addAction("导出 Prompt…").triggered.connect(export_cb)
+    if duplicates_cb:
+        menu.addAction("查找重复 Prompt…").triggered.connect(duplicates_cb)
+    if restore_cb:
+        menu.addAction("从 SSH 备份恢复…").triggered.connect(restore_cb)
+    if diagnostics_cb:
+        menu.addAction("诊断信息…").triggered.connect(diagnostics_cb)
     action_update = menu.addAction("检查更新")
     action_about = menu.addAction("关于")            # ← 新增“关于”菜单项
     menu.addSeparator()                            # ← 分隔线
@@ -97,7 +160,9 @@ def create_tray(app, show_cb, hotkey="Ctrl+Alt+P", custom_cb=None):
     action_show.triggered.connect(show_cb)
     if custom_cb:
         action_custom.triggered.connect(custom_cb)
-    action_update.triggered.connect(lambda: check_update())
+    # 检查更新在后台线程进行，不阻塞托盘和主窗口
+    tray.update_checker = UpdateChecker(update_cfg, tray, parent=tray)
+    action_update.triggered.connect(lambda: tray.update_checker.check())
 
     # 把“关于”改为自定义弹窗，使用自定义 icon
     def _show_about():
@@ -0,0 +1,127 @@
+"""Release check against the GitHub API with an on-disk HTTP cache.
+
+The latest release is cached in a small JSON file together with the
+``ETag`` and ``Last-Modified`` headers of the response.  Within ``ttl``
+seconds the cache is used without any request.  After that the request is
+conditional, so an unchanged release costs a ``304`` with no body (and
+does not count against the GitHub rate limit).
+
+This module does not import Qt.  The tray runs :func:`check_latest` on a
+worker thread.  The endpoint is configurable, so the check can be tested
+against a local HTTP server.
+"""
+import os
+import json
+import time
+import logging
+import urllib.error
+import urllib.request
+from typing import NamedTuple
+
+from . import metrics
+from .version import __version__
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_URL = "https://api.github.com/repos/jiachenwei/PromptLauncher/releases/latest"
+RELEASES_PAGE = "https://github.com/jiachenwei/PromptLauncher/releases/latest"
+DEFAULT_TTL = 6 * 3600
+TIMEOUT = 5
+
+
+class UpdateInfo(NamedTuple):
+    latest: str
+    page: str
+    newer: bool
+    cached: bool
+
+
+def parse_version(ver: str) -> tuple:
+    try:
+        return tuple(int(p) for p in ver.strip("v").split("."))
+    except Exception:
+        return (0,)
+
+
+def is_newer(latest: str, current: str = __version__) -> bool:
+    return bool(latest) and parse_version(latest) > parse_version(current)
+
+
+def endpoint(cfg: dict | None = None) -> str:
+    """``PROMPTLAUNCHER_UPDATE_URL`` wins over the ``update.url`` config key."""
+    return os.environ.get("PROMPTLAUNCHER_UPDATE_URL") or (cfg or {}).get("url") or DEFAULT_URL
+
+
+def _load_cache(path: str, url: str) -> dict | None:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return None
+    # 换了地址的缓存作废
+    return cache if cache.get("url") == url and isinstance(cache.get("release"), dict) else None
+
+
+def _save_cache(path: str, cache: dict):
+    tmp = path + ".tmp"
+    try:
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(cache, f)
+        os.replace(tmp, path)
+    except OSError:
+        logger.warning("could not write update cache", exc_info=True)
+
+
+def _info(release: dict, cached: bool) -> UpdateInfo:
+    latest = release.get("tag_name", "")
+    return UpdateInfo(latest, release.get("html_url") or RELEASES_PAGE, is_newer(latest), cached)
+
+
+def check_latest(url: str = DEFAULT_URL, cache_path: str | None = None,
+                 ttl: float = DEFAULT_TTL, force: bool = False,
+                 timeout: float = TIMEOUT) -> UpdateInfo:
+    """Return the latest release, from the cache while it is fresh.
+
+    ``force`` skips the TTL but still revalidates with the cached
+    validators.  Network errors are raised; the cache is left untouched.
+    """
+    now = time.time()
+    cache = _load_cache(cache_path, url) if cache_path else None
+    if cache and not force and now - cache.get("checked_at", 0) < ttl:
+        metrics.incr("update.cache_hits")
+        return _info(cache["release"], cached=True)
+
+    req = urllib.request.Request(url, headers={
+        "Accept": "application/vnd.github+json",
+        "User-Agent": f"PromptLauncher/{__version__}",
+    })
+    if cache:
+        if cache.get("etag"):
+            req.add_header("If-None-Match", cache["etag"])
+        if cache.get("last_modified"):
+            req.add_header("If-Modified-Since", cache["last_modified"])
+
+    with metrics.timer("update.check_ms"):
+        try:
+            with urllib.request.urlopen(req, timeout=timeout) as resp:
+                release = json.load(resp)
+                headers = resp.headers
+        except urllib.error.HTTPError as e:
+            if e.code != 304 or not cache:
+                raise
+            # 未变化：只刷新检查时间
+            metrics.incr("update.not_modified")
+            cache["checked_at"] = now
+            if cache_path:
+                _save_cache(cache_path, cache)
+            return _info(cache["release"], cached=True)
+
+    if cache_path:
+        _save_cache(cache_path, {
+            "url": url,
+            "checked_at": now,
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "release": {k: release.get(k) for k in ("tag_name", "html_url")},
+        })
+    return _info(release, cached=False)
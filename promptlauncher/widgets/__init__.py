@@ -1,2 +1,6 @@
 # This file makes the widgets directory a package.
-from .prompt_item_widget import PromptItemWidget
+from .prompt_list import PromptListModel, PromptListView, PromptItemDelegate, CountRole, RecordRole
+from .quick_pick import QuickPickPopup
+from .large_text_edit import LargeTextEdit
+from .group_nav import TabNavigator, SidebarNavigator
+from .preview_pane import PreviewPane
@@ -0,0 +1,266 @@
+from typing import Callable, NamedTuple
+from PyQt6.QtCore import Qt, QEvent, pyqtSignal
+from PyQt6.QtWidgets import QTabWidget, QSplitter, QWidget, QVBoxLayout, QLineEdit, QListView
+
+from .prompt_list import PromptListModel, CountRole, RecordRole
+
+
+class TabNavigator(QTabWidget):
+    """每个分组一个标签页和一个列表视图（默认，分组不多时使用）"""
+    current_changed = pyqtSignal(str)
+    rename_requested = pyqtSignal(str)
+    # 每个分组有自己的视图，切换时不需要保存/恢复状态
+    shared_view = False
+
+    def __init__(self, records: dict, make_view: Callable[[], QListView], parent=None):
+        super().__init__(parent)
+        self.records = records
+        self._make_view = make_view
+        self._views: dict[str, QListView] = {}
+        self.currentChanged.connect(lambda idx: idx >= 0 and self.current_changed.emit(self.tabText(idx)))
+        # 支持双击标签页重命名
+        self.tabBar().installEventFilter(self)
+
+    def add_group(self, name: str):
+        view = self._make_view()
+        # 列表模型直接引用数据模型中的记录，不为每条 Prompt 创建控件
+        view.setModel(PromptListModel(self.records[name], view))
+        self._views[name] = view
+        self.addTab(view, name)
+
+    def remove_group(self, name: str):
+        view = self._views.pop(name, None)
+        if view is not None:
+            self.removeTab(self.indexOf(view))
+            view.deleteLater()
+
+    def rename_group(self, old: str, new: str):
+        view = self._views.pop(old)
+        self._views[new] = view
+        self.setTabText(self.indexOf(view), new)
+
+    def reset(self):
+        """按数据模型重建全部标签页，尽量保留当前分组"""
+        current = self.current_group()
+        self.setUpdatesEnabled(False)
+        try:
+            while self.count():
+                widget = self.widget(0)
+                self.removeTab(0)
+                widget.deleteLater()
+            self._views.clear()
+            for name in list(self.records):
+                self.add_group(name)
+            if current in self._views:
+                self.setCurrentWidget(self._views[current])
+        finally:
+            self.setUpdatesEnabled(True)
+
+    def current_group(self) -> str | None:
+        idx = self.currentIndex()
+        return self.tabText(idx) if idx >= 0 else None
+
+    def set_current_group(self, name: str) -> bool:
+        view = self._views.get(name)
+        if view is None:
+            return False
+        self.setCurrentWidget(view)
+        return True
+
+    def group_count(self) -> int:
+        return self.count()
+
+    def step(self, delta: int):
+        idx = self.currentIndex() + delta
+        if 0 <= idx < self.count():
+            self.setCurrentIndex(idx)
+
+    def view_of(self, group: str | None) -> QListView | None:
+        return self._views.get(group)
+
+    def views(self):
+        return self._views.values()
+
+    def state_of(self, group: str):
+        return None
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Type.MouseButtonDblClick and obj is self.tabBar():
+            idx = obj.tabAt(event.pos())
+            if idx >= 0:
+                self.rename_requested.emit(self.tabText(idx))
+            return True
+        return super().eventFilter(obj, event)
+
+
+class GroupViewState(NamedTuple):
+    keyword: str
+    scroll: int
+    alias: str | None
+
+
+class GroupListModel(PromptListModel):
+    """分组名列表，行是 ``PromptModel.records`` 的键；增删改接口与 PromptListModel 相同"""
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if role in (CountRole, RecordRole):
+            return None
+        return super().data(index, role)
+
+
+class SidebarNavigator(QSplitter):
+    """分组很多时使用：左侧是可筛选的分组列表，右侧只有一个共享的 Prompt 列表。
+
+    分组列表是普通的列表模型，只绘制可见的行。切换分组时把共享视图的
+    模型改为指向该分组的记录，不为每个分组创建控件。离开一个分组时记下
+    它的搜索词、滚动位置和选中项（每个分组一个小元组），回来时恢复。
+    """
+    current_changed = pyqtSignal(str)
+    rename_requested = pyqtSignal(str)
+    shared_view = True
+
+    def __init__(self, records: dict, make_view: Callable[[], QListView],
+                 keyword: Callable[[], str], parent=None):
+        super().__init__(Qt.Orientation.Horizontal, parent)
+        self.records = records
+        self._keyword = keyword
+        self._current: str | None = None
+        self._states: dict[str, GroupViewState] = {}
+
+        side = QWidget()
+        side_layout = QVBoxLayout(side)
+        side_layout.setContentsMargins(0, 0, 0, 0)
+        side_layout.setSpacing(5)
+        self.filter = QLineEdit(placeholderText="筛选分组…")
+        self.group_list = QListView()
+        self.group_list.setUniformItemSizes(True)
+        self.group_list.setEditTriggers(QListView.EditTrigger.NoEditTriggers)
+        self.groups = GroupListModel(records, self.group_list)
+        self.group_list.setModel(self.groups)
+        side_layout.addWidget(self.filter)
+        side_layout.addWidget(self.group_list)
+
+        self.view = make_view()
+        self.view.setModel(PromptListModel({}, self.view))
+        self.addWidget(side)
+        self.addWidget(self.view)
+        self.setStretchFactor(1, 1)
+        self.setSizes([180, 420])
+
+        self.group_list.selectionModel().currentChanged.connect(
+            lambda cur, _: cur.isValid() and self.set_current_group(self.groups.alias_at(cur.row()))
+        )
+        # 双击分组名重命名
+        self.group_list.doubleClicked.connect(
+            lambda idx: self.rename_requested.emit(self.groups.alias_at(idx.row()))
+        )
+        self.filter.textChanged.connect(self._filter_groups)
+
+    def add_group(self, name: str):
+        self.groups.append(name)
+        if self._current is None:
+            self.set_current_group(name)
+
+    def remove_group(self, name: str):
+        row = self.groups.row_of(name)
+        self._states.pop(name, None)
+        # 先清空共享视图，再移除行：移除会改变分组列表的当前项
+        if name == self._current:
+            self._current = None
+            self.view.model().set_records({})
+        self.groups.remove(name)
+        if self._current is None:
+            # 选中原位置上的下一个分组
+            nxt = self.groups.alias_at(min(row, self.groups.rowCount() - 1))
+            if nxt is not None:
+                self.set_current_group(nxt)
+
+    def rename_group(self, old: str, new: str):
+        self.groups.rename(old, new)
+        if old in self._states:
+            self._states[new] = self._states.pop(old)
+        if self._current == old:
+            self._current = new
+
+    def reset(self):
+        """分组整体变化后（批量导入、回滚、重新加载）与数据模型重新对齐"""
+        self._save_state()
+        current, self._current = self._current, None
+        self.groups.set_records(self.records)
+        self._states = {k: v for k, v in self._states.items() if k in self.records}
+        self._filter_groups(self.filter.text())
+        # 分组的记录字典可能已被替换，共享视图必须重新指向
+        if current not in self.records:
+            current = self.groups.alias_at(0)
+        if current is not None:
+            self.set_current_group(current)
+        else:
+            self.view.model().set_records({})
+
+    def current_group(self) -> str | None:
+        return self._current
+
+    def set_current_group(self, name: str) -> bool:
+        if name not in self.records:
+            return False
+        if name == self._current:
+            return True
+        self._save_state()
+        self._current = name
+        self.view.model().set_records(self.records[name])
+        idx = self.groups.index(self.groups.row_of(name))
+        if self.group_list.currentIndex() != idx:
+            self.group_list.setCurrentIndex(idx)
+        # 界面在此按该分组的搜索词重新过滤
+        self.current_changed.emit(name)
+        self._restore_state(name)
+        return True
+
+    def _save_state(self):
+        if self._current is None:
+            return
+        idx = self.view.currentIndex()
+        alias = self.view.model().alias_at(idx.row()) if idx.isValid() else None
+        self._states[self._current] = GroupViewState(
+            self._keyword(), self.view.verticalScrollBar().value(), alias
+        )
+
+    def _restore_state(self, name: str):
+        state = self._states.get(name)
+        if state is None:
+            return
+        model = self.view.model()
+        row = model.row_of(state.alias) if state.alias is not None else -1
+        if row >= 0:
+            self.view.setCurrentIndex(model.index(row))
+        # 模型重置后布局是延迟的，先排好版滚动条才有正确的范围
+        self.view.doItemsLayout()
+        self.view.verticalScrollBar().setValue(state.scroll)
+
+    def state_of(self, group: str) -> GroupViewState | None:
+        return self._states.get(group)
+
+    def group_count(self) -> int:
+        return self.groups.rowCount()
+
+    def step(self, delta: int):
+        row = self.groups.row_of(self._current) if self._current is not None else -1
+        while True:
+            row += delta
+            name = self.groups.alias_at(row)
+            if name is None:
+                return
+            # 跳过被筛选掉的分组
+            if not self.group_list.isRowHidden(row):
+                self.set_current_group(name)
+                return
+
+    def view_of(self, group: str | None) -> QListView | None:
+        return self.view if group is not None and group == self._current else None
+
+    def views(self):
+        return (self.view,)
+
+    def _filter_groups(self, text: str):
+        key = text.lower()
+        for row in range(self.groups.rowCount()):
+            self.group_list.setRowHidden(row, key not in self.groups.alias_at(row).lower())
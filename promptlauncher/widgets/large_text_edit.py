@@ -0,0 +1,65 @@
+from PyQt6.QtCore import QTimer, pyqtSignal
+from PyQt6.QtGui import QTextCursor, QTextOption
+from PyQt6.QtWidgets import QPlainTextEdit
+
+
+class LargeTextEdit(QPlainTextEdit):
+    """几百 KB 长 Prompt 的纯文本编辑器。
+
+    QTextEdit 对整篇文档做富文本布局，``setPlainText``/``toPlainText``
+    都随长度线性变慢；QPlainTextEdit 按段落懒布局，只排版可见部分。
+    正文分块追加，块与块之间回到事件循环，打开对话框时界面不卡；
+    载入期间只读且不记录撤销，载入完成后才允许编辑。
+    未修改时 :meth:`text` 直接返回原字符串，不必把文档重新拼接一遍。
+    """
+    # 每次追加的字符数
+    CHUNK = 64 * 1024
+    loaded = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._source = ""
+        self._pos = 0
+        self.setWordWrapMode(QTextOption.WrapMode.WrapAtWordBoundaryOrAnywhere)
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._load_chunk)
+
+    def load_text(self, text: str):
+        self._timer.stop()
+        self._source = text
+        self._pos = 0
+        self.setReadOnly(True)
+        self.setUndoRedoEnabled(False)
+        self.clear()
+        self._load_chunk()
+
+    @property
+    def loading(self) -> bool:
+        return self._pos < len(self._source)
+
+    def _load_chunk(self):
+        end = self._pos + self.CHUNK
+        # 不把 \r\n 拆到两块里，否则会多出一个空段落
+        if self._source[end - 1:end] == "\r":
+            end += 1
+        cursor = QTextCursor(self.document())
+        cursor.movePosition(QTextCursor.MoveOperation.End)
+        cursor.insertText(self._source[self._pos:end])
+        self._pos = min(end, len(self._source))
+        if self.loading:
+            self._timer.start(0)
+            return
+        self.document().setModified(False)
+        self.setUndoRedoEnabled(True)
+        self.setReadOnly(False)
+        self.moveCursor(QTextCursor.MoveOperation.Start)
+        self.loaded.emit()
+
+    def is_modified(self) -> bool:
+        return not self.loading and self.document().isModified()
+
+    def text(self) -> str:
+        if not self.is_modified():
+            return self._source
+        return self.toPlainText()
@@ -0,0 +1,97 @@
+from concurrent.futures import ThreadPoolExecutor
+from PyQt6.QtCore import pyqtSignal
+from PyQt6.QtGui import QColor, QTextCharFormat, QTextCursor
+from PyQt6.QtWidgets import QTextBrowser, QTextEdit
+
+from ..preview import PreviewCache, preview_key, render_html
+from .. import metrics
+
+# 每个搜索词最多高亮的次数
+MAX_HIGHLIGHTS = 200
+
+
+class PreviewPane(QTextBrowser):
+    """选中 Prompt 的只读预览。
+
+    渲染在单个后台线程中进行，结果按正文哈希放入 LRU 缓存；方向键快速
+    移动时，已渲染过的条目直接从缓存显示，未渲染的只在结果回来时仍是
+    当前条目才显示。搜索词高亮用额外选区叠加在渲染结果上，不进入缓存。
+    """
+    _rendered = pyqtSignal(object, str)
+
+    def __init__(self, cache: PreviewCache | None = None, parent=None):
+        super().__init__(parent)
+        self.setOpenExternalLinks(True)
+        self.cache = cache if cache is not None else PreviewCache()
+        self._pool = ThreadPoolExecutor(1, thread_name_prefix="preview")
+        self._inflight: set = set()
+        self._wanted = None
+        self._terms: tuple[str, ...] = ()
+        self._rendered.connect(self._on_rendered)
+
+    def show_text(self, text: str | None, terms=()):
+        """显示 text 的预览；text 为 None 时清空"""
+        self._terms = tuple(t for t in terms if t)
+        if text is None:
+            self._wanted = None
+            self.clear()
+            return
+        key = self._wanted = preview_key(text)
+        html = self.cache.get(key)
+        if html is not None:
+            self._display(html)
+        else:
+            self._submit(key, text)
+
+    def prefetch(self, texts):
+        """在后台预先渲染相邻条目，方向键移动到时直接命中缓存"""
+        for text in texts:
+            key = preview_key(text)
+            if key not in self.cache:
+                self._submit(key, text)
+
+    def _submit(self, key, text: str):
+        if key in self._inflight:
+            return
+        self._inflight.add(key)
+        self._pool.submit(self._render, key, text)
+
+    def _render(self, key, text: str):
+        # 工作线程：只做字符串渲染，结果通过信号回到界面线程
+        with metrics.timer("ui.preview_render_ms"):
+            html = render_html(text)
+        self._rendered.emit(key, html)
+
+    def _on_rendered(self, key, html: str):
+        self._inflight.discard(key)
+        self.cache.put(key, html)
+        if key == self._wanted:
+            self._display(html)
+
+    def _display(self, html: str):
+        self.setHtml(html)
+        self._highlight()
+
+    def set_terms(self, terms):
+        self._terms = tuple(t for t in terms if t)
+        self._highlight()
+
+    def _highlight(self):
+        selections = []
+        fmt = QTextCharFormat()
+        fmt.setBackground(QColor("#ffe066"))
+        doc = self.document()
+        for term in self._terms:
+            cursor = QTextCursor(doc)
+            for _ in range(MAX_HIGHLIGHTS):
+                cursor = doc.find(term, cursor)
+                if cursor.isNull():
+                    break
+                sel = QTextEdit.ExtraSelection()
+                sel.cursor = cursor
+                sel.format = fmt
+                selections.append(sel)
+        self.setExtraSelections(selections)
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,155 @@
+from PyQt6.QtCore import Qt, QAbstractListModel, QModelIndex, QSize, pyqtSignal
+from PyQt6.QtWidgets import QStyledItemDelegate, QStyle, QApplication, QListView
+from PyQt6.QtGui import QPalette
+
+# 自定义数据角色：使用次数
+CountRole = Qt.ItemDataRole.UserRole + 1
+# 记录对象本身（PromptRecord），用于按记录查找统计
+RecordRole = Qt.ItemDataRole.UserRole + 2
+
+
+def format_count(n: int) -> str:
+    return str(n) if n < 1000 else f"{n / 1000:.1f}k"
+
+
+class PromptListModel(QAbstractListModel):
+    """一个分组的 Prompt 列表模型。
+
+    直接引用 ``PromptModel.records`` 中该分组的字典，行数据只保存别名字符串
+    本身的引用，界面不再为每条 Prompt 复制别名或创建控件。
+    """
+    def __init__(self, records: dict, parent=None):
+        super().__init__(parent)
+        self._records = records
+        self._aliases: list[str] = list(records)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._aliases)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        alias = self._aliases[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return alias
+        if role == CountRole:
+            rec = self._records.get(alias)
+            return rec.count if rec is not None else 0
+        if role == RecordRole:
+            return self._records.get(alias)
+        return None
+
+    # region ——— 供 PromptWindow 调用的增删改
+    def set_records(self, records: dict):
+        """改为显示另一个分组（共享视图切换分组时使用）"""
+        self.beginResetModel()
+        self._records = records
+        self._aliases = list(records)
+        self.endResetModel()
+
+    def alias_at(self, row: int) -> str | None:
+        if 0 <= row < len(self._aliases):
+            return self._aliases[row]
+        return None
+
+    def row_of(self, alias: str) -> int:
+        try:
+            return self._aliases.index(alias)
+        except ValueError:
+            return -1
+
+    def append(self, alias: str):
+        # 调用方传入的正是写入数据模型的同一个字符串对象，这里只保存引用
+        row = len(self._aliases)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._aliases.append(alias)
+        self.endInsertRows()
+
+    def remove(self, alias: str):
+        row = self.row_of(alias)
+        if row < 0:
+            return
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self._aliases[row]
+        self.endRemoveRows()
+
+    def rename(self, old: str, new: str):
+        row = self.row_of(old)
+        if row < 0:
+            return
+        self._aliases[row] = new
+        idx = self.index(row)
+        self.dataChanged.emit(idx, idx)
+
+    def refresh(self, alias: str):
+        """别名对应的计数等数据变化后通知视图重绘该行"""
+        row = self.row_of(alias)
+        if row >= 0:
+            idx = self.index(row)
+            self.dataChanged.emit(idx, idx, [CountRole])
+    # endregion
+
+
+class PromptItemDelegate(QStyledItemDelegate):
+    """绘制一行：左侧别名，右侧 token 估计（已统计时）和使用次数"""
+    MARGINS = (5, 2, 5, 2)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # stats.StatsIndex；只读取已算好的统计，绘制时从不计算
+        self.stats = None
+
+    def paint(self, painter, option, index):
+        self.initStyleOption(option, index)
+        alias = option.text
+        count = str(index.data(CountRole))
+        tokens = ""
+        if self.stats is not None:
+            st = self.stats.of_record(index.data(RecordRole))
+            if st is not None:
+                tokens = f"{format_count(st.tokens)} tok"
+        option.text = ""
+        widget = option.widget
+        style = widget.style() if widget else QApplication.style()
+        # 先画背景与选中态，再手动画文字
+        style.drawControl(QStyle.ControlElement.CE_ItemViewItem, option, painter, widget)
+
+        left, top, right, bottom = self.MARGINS
+        rect = option.rect.adjusted(left, top, -right, -bottom)
+        fm = option.fontMetrics
+        count_w = fm.horizontalAdvance(count)
+        tokens_w = fm.horizontalAdvance(tokens) + 10 if tokens else 0
+        selected = option.state & QStyle.StateFlag.State_Selected
+        role = QPalette.ColorRole.HighlightedText if selected else QPalette.ColorRole.Text
+
+        painter.save()
+        painter.setFont(option.font)
+        painter.setPen(option.palette.color(role))
+        alias_rect = rect.adjusted(0, 0, -(count_w + tokens_w + 10), 0)
+        painter.drawText(
+            alias_rect, Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter,
+            fm.elidedText(alias, Qt.TextElideMode.ElideRight, alias_rect.width())
+        )
+        painter.drawText(rect, Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter, count)
+        if tokens:
+            if not selected:
+                painter.setPen(option.palette.color(QPalette.ColorRole.PlaceholderText))
+            painter.drawText(
+                rect.adjusted(0, 0, -(count_w + 10), 0),
+                Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter, tokens
+            )
+        painter.restore()
+
+    def sizeHint(self, option, index):
+        left, top, right, bottom = self.MARGINS
+        fm = option.fontMetrics
+        return QSize(fm.averageCharWidth() * 20 + left + right, fm.height() + top + bottom + 4)
+
+
+class PromptListView(QListView):
+    """当前项变化时发出信号的列表视图（方向键和点击都会触发），供预览窗格使用"""
+    current_changed = pyqtSignal(QModelIndex)
+
+    def currentChanged(self, current, previous):
+        super().currentChanged(current, previous)
+        self.current_changed.emit(current)
@@ -0,0 +1,199 @@
+import time
+import logging
+from collections import deque
+from typing import Callable
+from PyQt6.QtCore import Qt, QAbstractListModel, QModelIndex, QEvent
+from PyQt6.QtGui import QCursor, QGuiApplication
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLineEdit, QListView, QFrame
+
+from .prompt_list import PromptItemDelegate, CountRole
+from .. import metrics
+
+logger = logging.getLogger(__name__)
+
+# 一帧的时间预算（60Hz）
+FRAME_BUDGET_MS = 1000 / 60
+
+
+class QuickPickModel(QAbstractListModel):
+    """快速选择的结果列表：只保存前 N 条 (分组, 别名, 计数)"""
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._hits: list[tuple[str, str, int]] = []
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._hits)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        grp, alias, count = self._hits[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return alias
+        if role == CountRole:
+            return count
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return grp
+        return None
+
+    def set_hits(self, hits: list[tuple[str, str, int]]):
+        self.beginResetModel()
+        self._hits = hits
+        self.endResetModel()
+
+    def hit_at(self, row: int) -> tuple[str, str, int] | None:
+        if 0 <= row < len(self._hits):
+            return self._hits[row]
+        return None
+
+
+class _ResultList(QListView):
+    """绘制完成后回调，用于测量热键到首帧的耗时"""
+    def __init__(self, on_painted: Callable[[], None], parent=None):
+        super().__init__(parent)
+        self._on_painted = on_painted
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        self._on_painted()
+
+
+class QuickPickPopup(QWidget):
+    """热键呼出的小型无边框选择框：搜索框 + 前 N 条结果。
+
+    启动时构建一次并保持隐藏，热键只需 show 和聚焦；结果列表在隐藏时
+    预先算好，显示路径上不做搜索。回车复制选中的 Prompt 并计数。
+
+    从热键回调到首帧绘制完成的耗时记录在 ``latencies`` 中（毫秒），
+    超过一帧时输出警告。
+    """
+    TOP_N = 10
+
+    def __init__(self, model, on_pick: Callable[[str, str], None], parent=None):
+        super().__init__(parent)
+        self.model = model
+        self._on_pick = on_pick
+        self._shown_at: int | None = None
+        self.latencies: deque[float] = deque(maxlen=200)
+
+        self.setWindowFlags(
+            Qt.WindowType.Tool |
+            Qt.WindowType.FramelessWindowHint |
+            Qt.WindowType.WindowStaysOnTopHint
+        )
+        self.setFixedWidth(420)
+
+        frame = QFrame(self)
+        frame.setFrameShape(QFrame.Shape.StyledPanel)
+        outer = QVBoxLayout(self)
+        outer.setContentsMargins(0, 0, 0, 0)
+        outer.addWidget(frame)
+        layout = QVBoxLayout(frame)
+        layout.setContentsMargins(6, 6, 6, 6)
+        layout.setSpacing(4)
+
+        self.search = QLineEdit(placeholderText="搜索 prompt，回车复制…")
+        self.search.installEventFilter(self)
+        layout.addWidget(self.search)
+
+        self.results = QuickPickModel(self)
+        self.list = _ResultList(self._painted)
+        self.list.setModel(self.results)
+        self.list.setItemDelegate(PromptItemDelegate(self.list))
+        self.list.setFocusPolicy(Qt.FocusPolicy.NoFocus)
+        self.list.setUniformItemSizes(True)
+        self.list.activated.connect(lambda idx: self._pick(idx.row()))
+        layout.addWidget(self.list)
+
+        self.search.textChanged.connect(self._update_results)
+
+    # region ——— 预热与显示
+    def prewarm(self):
+        """启动时调用：提前创建原生窗口、完成布局并算好默认结果"""
+        self._update_results("")
+        self.ensurePolished()
+        self.adjustSize()
+        self.winId()
+
+    def refresh(self):
+        """数据变化后（加载完成、删除或改名）按当前输入重新搜索"""
+        self._update_results(self.search.text())
+
+    def toggle(self, triggered_at: int | None = None):
+        """热键调用；triggered_at 为热键回调时的 perf_counter_ns()"""
+        if self.isVisible():
+            self.hide()
+            return
+        self._shown_at = triggered_at or time.perf_counter_ns()
+        self._move_to_cursor_screen()
+        self.show()
+        self.raise_()
+        self.activateWindow()
+        self.search.setFocus()
+
+    def _move_to_cursor_screen(self):
+        screen = QGuiApplication.screenAt(QCursor.pos()) or QGuiApplication.primaryScreen()
+        area = screen.availableGeometry()
+        self.move(area.center().x() - self.width() // 2, area.top() + area.height() // 4)
+
+    def _painted(self):
+        if self._shown_at is None:
+            return
+        ms = (time.perf_counter_ns() - self._shown_at) / 1e6
+        self._shown_at = None
+        self.latencies.append(ms)
+        metrics.observe("hotkey.quick_pick_ms", ms)
+        if ms > FRAME_BUDGET_MS:
+            logger.warning(f"quick pick first frame took {ms:.1f} ms (budget {FRAME_BUDGET_MS:.1f} ms)")
+        else:
+            logger.debug(f"quick pick first frame in {ms:.1f} ms")
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        # 隐藏后立即复位，下一次显示时无需再搜索
+        self.search.blockSignals(True)
+        self.search.clear()
+        self.search.blockSignals(False)
+        self._update_results("")
+    # endregion
+
+    # region ——— 搜索与选择
+    def _update_results(self, text: str):
+        with metrics.timer("quick_pick.search_ms"):
+            self.results.set_hits(self.model.search(text.strip(), limit=self.TOP_N))
+        if self.results.rowCount():
+            self.list.setCurrentIndex(self.results.index(0))
+        rows = max(1, min(self.results.rowCount(), self.TOP_N))
+        self.list.setFixedHeight(self.list.sizeHintForRow(0) * rows + 2 * self.list.frameWidth()
+                                 if self.results.rowCount() else 0)
+
+    def _pick(self, row: int):
+        hit = self.results.hit_at(row)
+        if hit is None:
+            return
+        self.hide()
+        self._on_pick(hit[0], hit[1])
+
+    def eventFilter(self, obj, event):
+        if obj is self.search and event.type() == QEvent.Type.KeyPress:
+            key = event.key()
+            if key in (Qt.Key.Key_Down, Qt.Key.Key_Up):
+                step = 1 if key == Qt.Key.Key_Down else -1
+                row = self.list.currentIndex().row() + step
+                if 0 <= row < self.results.rowCount():
+                    self.list.setCurrentIndex(self.results.index(row))
+                return True
+            if key in (Qt.Key.Key_Return, Qt.Key.Key_Enter):
+                self._pick(self.list.currentIndex().row())
+                return True
+            if key == Qt.Key.Key_Escape:
+                self.hide()
+                return True
+        return super().eventFilter(obj, event)
+
+    def changeEvent(self, event):
+        super().changeEvent(event)
+        # 失去焦点（点到别处）时收起
+        if event.type() == QEvent.Type.ActivationChange and not self.isActiveWindow():
+            self.hide()
+    # endregion
@@ -0,0 +1,130 @@
+import sys
+import types
+from pathlib import Path
+import importlib
+
+import pytest
+
+# Avoid importing the package which depends on PyQt6
+pkg = types.ModuleType("promptlauncher")
+pkg.__path__ = [str(Path(__file__).parents[1] / "promptlauncher")]
+sys.modules.setdefault("promptlauncher", pkg)
+
+chords = importlib.import_module("promptlauncher.chords")
+PromptModel = importlib.import_module("promptlauncher.model").PromptModel
+PromptController = importlib.import_module("promptlauncher.controller").PromptController
+
+
+class FakeTimer:
+    """Stands in for threading.Timer; tests call expire() explicitly."""
+    started = []
+
+    def __init__(self, interval, fn, args):
+        self.fn, self.args, self.cancelled = fn, args, False
+
+    def start(self):
+        FakeTimer.started.append(self)
+
+    def cancel(self):
+        self.cancelled = True
+
+    def expire(self):
+        if not self.cancelled:
+            self.fn(*self.args)
+
+
+def _dispatcher(bindings, clock=lambda: 0.0):
+    trie = chords.ChordTrie()
+    for seq, action in bindings.items():
+        trie.add(chords.parse_sequence(seq), action)
+    fired = []
+    FakeTimer.started = []
+    return chords.ChordDispatcher(trie, lambda action, stamp: fired.append(action), 0.5, clock, FakeTimer), fired
+
+
+def test_parse_normalizes_modifiers():
+    assert chords.parse_sequence("Alt+Ctrl+P, g ,3") == ("ctrl+alt+p", "g", "3")
+    assert chords.normalize_stroke("left ctrl+shift+k") == "ctrl+shift+k"
+    with pytest.raises(ValueError):
+        chords.parse_sequence("ctrl+alt")
+    with pytest.raises(ValueError):
+        chords.parse_sequence("ctrl+p,")
+
+
+def test_chords_and_prefix_timeout():
+    d, fired = _dispatcher({"ctrl+alt+p": "toggle", "ctrl+alt+p, g, 3": "g3", "ctrl+alt+1": "one"})
+    d.feed("ctrl+alt+1")
+    assert fired == ["one"]
+
+    for stroke in ("ctrl+alt+p", "g", "3"):
+        d.feed(stroke)
+    assert fired == ["one", "g3"]
+    assert all(t.cancelled for t in FakeTimer.started)
+
+    # 前缀本身也是绑定：超时后触发
+    d.feed("ctrl+alt+p")
+    assert d.pending
+    FakeTimer.started[-1].expire()
+    assert fired[-1] == "toggle" and not d.pending
+
+    # 被其他键打断：触发较短绑定，并从根重新匹配该键
+    d.feed("ctrl+alt+p")
+    d.feed("ctrl+alt+1")
+    assert fired[-2:] == ["toggle", "one"]
+
+
+def test_actions_carry_the_stamp_of_the_first_stroke():
+    trie = chords.ChordTrie()
+    for seq, action in {"ctrl+alt+p": "toggle", "ctrl+alt+p, g": "g", "ctrl+alt+1": "one"}.items():
+        trie.add(chords.parse_sequence(seq), action)
+    fired = []
+    FakeTimer.started = []
+    d = chords.ChordDispatcher(trie, lambda action, stamp: fired.append((action, stamp)), 0.5,
+                               lambda: 0.0, FakeTimer)
+    d.feed("ctrl+alt+p", 100)
+    d.feed("g", 200)
+    # 超时后触发的前缀绑定与被打断时触发的绑定，都带第一键的时刻
+    d.feed("ctrl+alt+p", 300)
+    FakeTimer.started[-1].expire()
+    d.feed("ctrl+alt+p", 400)
+    d.feed("ctrl+alt+1", 500)
+    assert fired == [("g", 100), ("toggle", 300), ("toggle", 400), ("one", 500)]
+
+
+def test_stale_partial_chord_resets():
+    now = [0.0]
+    d, fired = _dispatcher({"ctrl+k, a": "a", "a": "plain"}, clock=lambda: now[0])
+    d.feed("ctrl+k")
+    now[0] = 5.0
+    d.feed("a")
+    assert fired == ["plain"]
+
+
+def test_controller_prompt_hotkeys(tmp_path):
+    ctrl = PromptController(PromptModel(str(tmp_path / 'data.json')))
+    ctrl.add_prompt('default', 'greet', 'hello')
+    ctrl.add_prompt('default', 'bye', 'ciao')
+    ctrl.set_hotkey('default', 'greet', 'Alt+Ctrl+P, g')
+    assert list(ctrl.prompt_hotkeys()) == [('ctrl+alt+p, g', 'default', 'greet')]
+    with pytest.raises(ValueError):
+        ctrl.set_hotkey('default', 'bye', 'ctrl+alt+p,g')
+    # 快捷键保存在元数据里，改名后仍然保留
+    ctrl.update_prompt('default', 'greet', 'hi', 'hello')
+    reloaded = PromptController(PromptModel(str(tmp_path / 'data.json')))
+    assert reloaded.get_hotkey('default', 'hi') == 'ctrl+alt+p, g'
+    ctrl.set_hotkey('default', 'hi', None)
+    assert list(ctrl.prompt_hotkeys()) == []
+
+
+def test_prompt_hotkeys_may_not_start_with_the_main_hotkey(tmp_path):
+    ctrl = PromptController(PromptModel(str(tmp_path / 'data.json')))
+    ctrl.add_prompt('default', 'greet', 'hello')
+    # 以主热键开头的和弦会让主热键每次都等到超时
+    with pytest.raises(ValueError):
+        ctrl.set_hotkey('default', 'greet', 'ctrl+alt+p, g, 3', reserved='Alt+Ctrl+P')
+    with pytest.raises(ValueError):
+        ctrl.set_hotkey('default', 'greet', 'ctrl+alt+p', reserved='ctrl+alt+p')
+    ctrl.set_hotkey('default', 'greet', 'ctrl+alt+g, 3', reserved='ctrl+alt+p')
+    assert ctrl.get_hotkey('default', 'greet') == 'ctrl+alt+g, 3'
+    assert chords.starts_with(('ctrl+alt+p', 'g'), ('ctrl+alt+p',))
+    assert not chords.starts_with(('ctrl+alt+p',), ('ctrl+alt+p', 'g'))
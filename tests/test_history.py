@@ -0,0 +1,79 @@
+import sys
+import types
+from pathlib import Path
+import importlib
+
+pkg = types.ModuleType("promptlauncher")
+pkg.__path__ = [str(Path(__file__).parents[1] / "promptlauncher")]
+sys.modules.setdefault("promptlauncher", pkg)
+
+PromptModel = importlib.import_module("promptlauncher.model").PromptModel
+PromptController = importlib.import_module("promptlauncher.controller").PromptController
+History = importlib.import_module("promptlauncher.history").History
+
+
+def _controller(path, **kwargs):
+    return PromptController(PromptModel(str(path)), History(str(path) + ".undo", **kwargs))
+
+
+def _snapshot(model):
+    return {g: {a: model.get_text(g, a) for a in recs} for g, recs in model.records.items()}
+
+
+def test_undo_redo_group_delete_and_batch_survive_restart(tmp_path):
+    path = tmp_path / 'data.json'
+    ctrl = _controller(path)
+    ctrl.add_group('g1')
+    ctrl.add_prompt('g1', 'a', 'alpha')
+    ctrl.add_prompt('g1', 'b', 'beta')
+    ctrl.add_group('g2')
+    ctrl.model.increment_usage('g1', 'a')
+    before = _snapshot(ctrl.model)
+
+    ctrl.delete_group('g1')
+    with ctrl.batch():
+        ctrl.rename_group('g2', 'renamed')
+        ctrl.add_prompt('renamed', 'c', 'gamma')
+        ctrl.update_prompt('renamed', 'c', 'd', 'delta')
+    after = _snapshot(ctrl.model)
+
+    # 批处理整体撤销为一步
+    assert ctrl.undo()
+    assert list(ctrl.model.records) == ['default', 'g2']
+    assert ctrl.undo()
+    assert _snapshot(ctrl.model) == before
+    assert list(ctrl.model.records) == ['default', 'g1', 'g2']
+    assert ctrl.model.usage_counts['g1']['a'] == 1
+
+    # 重启后撤销记录仍在，且数据文件已写入
+    ctrl = _controller(path)
+    assert _snapshot(ctrl.model) == before
+    assert ctrl.can_redo
+    assert ctrl.redo() and ctrl.redo()
+    assert _snapshot(ctrl.model) == after
+    assert not ctrl.redo()
+
+    # 新的修改清空重做栈
+    ctrl.undo()
+    ctrl.add_prompt('default', 'x', 'new')
+    assert not ctrl.can_redo
+    ctrl = _controller(path)
+    assert not ctrl.can_redo and ctrl.can_undo
+
+
+def test_history_memory_cap_drops_oldest_steps(tmp_path):
+    path = tmp_path / 'data.json'
+    ctrl = _controller(path, max_bytes=5000)
+    with ctrl.batch():
+        for i in range(20):
+            ctrl.add_prompt('default', f'p{i}', 'x' * 1000)
+    # 删除记录的是被删正文，每步约 1 KB
+    for i in range(20):
+        ctrl.delete_prompt('default', f'p{i}')
+    steps = len(ctrl.history._undo)
+    assert 1 <= steps < 20 and ctrl.history._size <= 5000
+    while ctrl.undo():
+        pass
+    # 只能撤销到仍在记录中的最早一步
+    assert len(ctrl.model.records['default']) == steps
+    assert len(_controller(path, max_bytes=5000).history._redo) == steps
@@ -0,0 +1,186 @@
+import sys
+import types
+import socket
+import threading
+from pathlib import Path
+import importlib
+
+import pytest
+
+# Avoid importing the package which depends on PyQt6
+pkg = types.ModuleType("promptlauncher")
+pkg.__path__ = [str(Path(__file__).parents[1] / "promptlauncher")]
+sys.modules.setdefault("promptlauncher", pkg)
+
+ipc = importlib.import_module("promptlauncher.ipc")
+PromptService = importlib.import_module("promptlauncher.service").PromptService
+PromptController = importlib.import_module("promptlauncher.controller").PromptController
+PromptModel = importlib.import_module("promptlauncher.model").PromptModel
+
+
+def _service(tmp_path, **callbacks):
+    model = PromptModel(str(tmp_path / 'data.json'))
+    model.add_prompt('default', 'review code', 'please review', 2)
+    model.add_prompt('default', 'greet', 'hello', 5)
+    model.add_prompt('work', 'Code style', 'pep8', 1)
+    return PromptService(PromptController(model), **callbacks)
+
+
+def test_frame_decoder_partial_and_legacy():
+    dec = ipc.FrameDecoder()
+    data = ipc.encode_frame({"id": 1, "cmd": "ping"}) + ipc.encode_frame({"id": 2, "cmd": "get"})
+    assert dec.feed(data[:3]) == []
+    msgs = dec.feed(data[3:])
+    assert [m["id"] for m in msgs] == [1, 2]
+
+    legacy = ipc.FrameDecoder()
+    assert legacy.feed(b"activ") == []
+    assert legacy.feed(b"ate") == [{"cmd": "activate", "legacy": True}]
+
+
+def test_service_commands(tmp_path):
+    clip, used = [], []
+    svc = _service(tmp_path, set_clipboard=clip.append, on_usage=lambda g, a: used.append((g, a)))
+
+    hits = svc.handle({"id": 1, "cmd": "search", "args": {"query": "CODE"}})["result"]
+    assert [(h["group"], h["alias"]) for h in hits] == [('default', 'review code'), ('work', 'Code style')]
+
+    resp = svc.handle({"id": 2, "cmd": "copy", "args": {"group": "default", "alias": "greet"}})
+    assert resp == {"id": 2, "ok": True, "result": 6}
+    assert clip == ['hello'] and used == [('default', 'greet')]
+
+    missing = svc.handle({"id": 3, "cmd": "get", "args": {"group": "default", "alias": "nope"}})
+    assert missing["ok"] is False and "nope" in missing["error"]
+    assert svc.handle({"id": 4, "cmd": "bogus"})["ok"] is False
+    assert svc.handle({"id": 5, "cmd": "activate"})["ok"] is False
+
+
+@pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="needs unix sockets")
+def test_client_roundtrip(tmp_path, monkeypatch):
+    svc = _service(tmp_path)
+    monkeypatch.setenv("TMPDIR", str(tmp_path))
+    srv = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    srv.bind(ipc.server_address("TestInstance"))
+    srv.listen(1)
+
+    def serve():
+        conn, _ = srv.accept()
+        dec = ipc.FrameDecoder()
+        with conn:
+            while data := conn.recv(65536):
+                for msg in dec.feed(data):
+                    conn.sendall(ipc.encode_frame(svc.handle(msg)))
+
+    t = threading.Thread(target=serve, daemon=True)
+    t.start()
+    with ipc.IpcClient.connect("TestInstance") as cli:
+        assert cli.request("get", group="work", alias="Code style")["text"] == 'pep8'
+        with pytest.raises(ipc.IpcError):
+            cli.request("get", group="work", alias="missing")
+    t.join(2)
+    srv.close()
+
+
+def test_rwlock_readers_share_writers_exclude():
+    RWLock = importlib.import_module("promptlauncher.locks").RWLock
+    lock = RWLock()
+    lock.acquire_read()
+    got_read = threading.Event()
+    got_write = threading.Event()
+
+    def reader():
+        with lock.read_locked():
+            got_read.set()
+
+    def writer():
+        with lock.write_locked():
+            got_write.set()
+
+    threading.Thread(target=reader).start()
+    assert got_read.wait(1)
+    w = threading.Thread(target=writer)
+    w.start()
+    assert not got_write.wait(0.05)
+    lock.release_read()
+    assert got_write.wait(1)
+    w.join(1)
+
+
+def test_service_with_lock_and_deferred_save(tmp_path):
+    RWLock = importlib.import_module("promptlauncher.locks").RWLock
+    svc = _service(tmp_path)
+    svc.lock = RWLock()
+    model = svc.controller.model
+    model.autosave = False
+
+    def hammer():
+        for _ in range(50):
+            svc.handle({"cmd": "increment", "args": {"group": "work", "alias": "Code style"}})
+            svc.handle({"cmd": "search", "args": {"query": "code"}})
+
+    threads = [threading.Thread(target=hammer) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert model.dirty
+    assert PromptModel(model.path).usage_counts['work']['Code style'] == 1
+    model.flush()
+    assert not model.dirty
+    assert PromptModel(model.path).usage_counts['work']['Code style'] == 201
+
+
+@pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="needs unix sockets")
+def test_send_activate_reports_windowless_instance(tmp_path, monkeypatch):
+    monkeypatch.setenv("TMPDIR", str(tmp_path))
+    assert ipc.send_activate("TestInstance") is False
+
+    shown = []
+    srv = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    srv.bind(ipc.server_address("TestInstance"))
+    srv.listen(2)
+
+    def serve(svc):
+        conn, _ = srv.accept()
+        dec = ipc.FrameDecoder()
+        with conn:
+            while data := conn.recv(65536):
+                for msg in dec.feed(data):
+                    conn.sendall(ipc.encode_frame(svc.handle(msg)))
+
+    # 守护进程没有窗口：activate 失败，不能当作已唤醒
+    t = threading.Thread(target=serve, args=(_service(tmp_path),), daemon=True)
+    t.start()
+    with pytest.raises(ipc.IpcError):
+        ipc.send_activate("TestInstance")
+    t.join(2)
+
+    t = threading.Thread(target=serve, args=(_service(tmp_path, activate=lambda: shown.append(1)),), daemon=True)
+    t.start()
+    assert ipc.send_activate("TestInstance") is True
+    t.join(2)
+    assert shown == [1]
+    srv.close()
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="uses a POSIX pipe with FIONREAD")
+def test_pipe_stream_reads_time_out():
+    import os
+    import fcntl
+    import struct
+    import termios
+
+    def available(f):
+        return struct.unpack("i", fcntl.ioctl(f.fileno(), termios.FIONREAD, b"\0\0\0\0"))[0]
+
+    r, w = os.pipe()
+    stream = ipc._PipeStream(os.fdopen(r, 'rb', buffering=0), 0.05, available)
+    try:
+        # 服务端不回复时不会一直阻塞
+        with pytest.raises(socket.timeout):
+            stream.read()
+        os.write(w, b"reply")
+        assert stream.read() == b"reply"
+    finally:
+        stream.close()
+        os.close(w)
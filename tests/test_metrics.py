@@ -0,0 +1,60 @@
+import sys
+import types
+from pathlib import Path
+import importlib
+
+import pytest
+
+# Avoid importing the package which depends on PyQt6
+pkg = types.ModuleType("promptlauncher")
+pkg.__path__ = [str(Path(__file__).parents[1] / "promptlauncher")]
+sys.modules.setdefault("promptlauncher", pkg)
+
+metrics = importlib.import_module("promptlauncher.metrics")
+PromptModel = importlib.import_module("promptlauncher.model").PromptModel
+PromptController = importlib.import_module("promptlauncher.controller").PromptController
+PromptService = importlib.import_module("promptlauncher.service").PromptService
+
+
+@pytest.fixture
+def enabled():
+    metrics.reset()
+    metrics.enable()
+    yield
+    metrics.enable(False)
+    metrics.reset()
+
+
+def test_disabled_is_noop():
+    metrics.enable(False)
+    metrics.reset()
+    metrics.incr("x")
+    metrics.observe("y", 1.0)
+    with metrics.timer("z"):
+        pass
+    snap = metrics.snapshot()
+    assert snap["counters"] == {} and snap["histograms"] == {}
+    assert metrics.format_report(snap) == "metrics disabled"
+
+
+def test_histogram_percentiles(enabled):
+    for ms in range(1, 101):
+        metrics.observe("op_ms", float(ms))
+    h = metrics.snapshot()["histograms"]["op_ms"]
+    assert h["count"] == 100 and h["max"] == 100.0
+    # 桶宽 1.5 倍，分位数误差在一个桶以内
+    assert 50 <= h["p50"] <= 75
+    assert 95 <= h["p99"] <= 100
+
+
+def test_model_and_service_are_instrumented(tmp_path, enabled):
+    model = PromptModel(str(tmp_path / 'data.json'))
+    model.add_prompt('default', 'greet', 'hello')
+    model.increment_usage('default', 'greet')
+    svc = PromptService(PromptController(model))
+    snap = svc.handle({"id": 1, "cmd": "metrics"})["result"]
+    assert snap["counters"]["usage.increments"] == 1
+    assert snap["counters"]["model.saves"] == 3
+    assert snap["counters"]["model.bytes_written"] > 0
+    assert snap["histograms"]["model.save_ms"]["count"] == 3
+    assert "model.save_ms" in metrics.format_report(snap)
@@ -0,0 +1,99 @@
+import os
+import sys
+import types
+from pathlib import Path
+import importlib
+
+pkg = types.ModuleType("promptlauncher")
+pkg.__path__ = [str(Path(__file__).parents[1] / "promptlauncher")]
+sys.modules.setdefault("promptlauncher", pkg)
+
+PromptModel = importlib.import_module("promptlauncher.model").PromptModel
+MarkdownMirror = importlib.import_module("promptlauncher.mirror").MarkdownMirror
+
+
+def _mirrored(tmp_path):
+    model = PromptModel(str(tmp_path / 'data.json'))
+    mirror = MarkdownMirror(str(tmp_path / 'md'), str(tmp_path / 'data.json.mirror.json'))
+    mirror.attach(model)
+    mirror.start()
+    return model, mirror
+
+
+def _files(root):
+    return sorted(p.relative_to(root).as_posix() for p in root.rglob('*.md'))
+
+
+def test_saves_write_only_changed_files(tmp_path):
+    model, mirror = _mirrored(tmp_path)
+    model.add_group('g1')
+    for i in range(5):
+        model.add_prompt('g1', f'p{i}', f'text {i}')
+    assert mirror.writes == 5
+
+    # 计数变化不写文件，改一条只写一条
+    model.increment_usage('g1', 'p0')
+    model.update_prompt('g1', 'p1', 'p1', 'changed')
+    assert mirror.writes == 6
+
+    # 改分组名：文件整体移动，不重写
+    model.rename_group('g1', 'g2')
+    assert mirror.writes == 6
+    assert _files(tmp_path / 'md') == [f'g2/p{i}.md' for i in range(5)]
+
+    model.delete_prompt('g2', 'p4')
+    assert not (tmp_path / 'md' / 'g2' / 'p4.md').exists()
+    mirror.close()
+
+    # 重启后清单仍有效，不必重写任何文件
+    model, mirror = _mirrored(tmp_path)
+    assert mirror.writes == 0
+    assert model.get_text('g2', 'p1') == 'changed'
+
+
+def test_scan_imports_external_edits(tmp_path):
+    model, mirror = _mirrored(tmp_path)
+    model.add_group('g')
+    model.add_prompt('g', 'a', 'alpha')
+    model.add_prompt('g', 'b', 'beta')
+    root = tmp_path / 'md'
+
+    (root / 'g' / 'a.md').write_text('---\nalias: "a"\n---\nedited', encoding='utf-8')
+    os.remove(root / 'g' / 'b.md')
+    (root / 'new').mkdir()
+    (root / 'new' / 'c.md').write_text('gamma', encoding='utf-8')
+
+    assert tuple(mirror.scan()) == (1, 1, 1)
+    assert model.get_text('g', 'a') == 'edited'
+    assert model.get_record('g', 'b') is None
+    assert model.get_text('new', 'c') == 'gamma'
+    # 导入的内容已与文件一致，不再回写
+    writes = mirror.writes
+    model.flush()
+    assert mirror.writes == writes
+    assert tuple(mirror.scan()) == (0, 0, 0)
+
+
+def test_deleting_a_copied_file_keeps_the_original(tmp_path):
+    model, mirror = _mirrored(tmp_path)
+    model.add_prompt('default', 'a', 'alpha')
+    folder = tmp_path / 'md' / 'default'
+    copy = folder / 'a - Copy.md'
+    copy.write_bytes((folder / 'a.md').read_bytes())
+
+    # 副本作为新条目导入，文件头改为新别名
+    assert tuple(mirror.scan()) == (1, 0, 0)
+    assert model.get_text('default', 'a (2)') == 'alpha'
+    assert 'alias: "a (2)"' in copy.read_text(encoding='utf-8')
+
+    copy.unlink()
+    assert tuple(mirror.scan()) == (0, 0, 1)
+    assert model.get_text('default', 'a') == 'alpha'
+    assert model.get_record('default', 'a (2)') is None
+    mirror.start()
+    assert (folder / 'a.md').exists()
+
+    # 在镜像里改文件名（别名不变）仍是同一条 Prompt
+    (folder / 'a.md').rename(folder / 'renamed.md')
+    assert tuple(mirror.scan()) == (0, 0, 0)
+    assert list(model.records['default']) == ['a']
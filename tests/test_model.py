@@ -1,13 +1,19 @@
 import sys
+import types
 from pathlib import Path
-import importlib.util
-
-# Avoid importing the package which depends on PyQt6
-file_path = Path(__file__).parents[1] / "promptlauncher" / "model.py"
-spec = importlib.util.spec_from_file_location("promptlauncher.model", file_path)
-model_mod = importlib.util.module_from_spec(spec)
-sys.modules[spec.name] = model_mod
-spec.loader.exec_module(model_mod)
+import importlib
+
+import pytest
+
+# Avoid importing the package which depends on PyQt6: a bare package object
+# is enough for the relative imports inside the model modules
+pkg = types.ModuleType("promptlauncher")
+pkg.__path__ = [str(Path(__file__).parents[1] / "promptlauncher")]
+sys.modules.setdefault("promptlauncher", pkg)
+
+model_mod = importlib.import_module("promptlauncher.model")
+packfile = importlib.import_module("promptlauncher.packfile")
+records_mod = importlib.import_module("promptlauncher.records")
 PromptModel = model_mod.PromptModel
 
 
@@ -19,3 +25,289 @@ def test_promptmodel_add_and_increment(tmp_path):
     m.increment_usage('g1', 'a1')
     assert m.prompt_dict['g1']['a1'] == 'hello'
     assert m.usage_counts['g1']['a1'] == 1
+
+
+def test_increment_usage_ignores_unknown_prompt(tmp_path):
+    path = tmp_path / 'data.json'
+    m = PromptModel(str(path))
+    m.add_prompt('default', 'a', 'x')
+    before = path.read_bytes()
+    m.increment_usage('default', 'missing')
+    m.increment_usage('new group', 'missing')
+    assert m.get_record('default', 'missing') is None
+    assert 'new group' not in m.records
+    assert path.read_bytes() == before
+
+
+def test_batch_saves_once(tmp_path, monkeypatch):
+    path = tmp_path / 'data.json'
+    m = PromptModel(str(path))
+    writes = []
+    orig_write = m._write
+    monkeypatch.setattr(m, '_write', lambda: (writes.append(1), orig_write()))
+    with m.batch():
+        for i in range(5):
+            m.add_prompt('default', f'a{i}', f'text {i}')
+        m.increment_usage('default', 'a0')
+    assert len(writes) == 1
+    reloaded = PromptModel(str(path))
+    assert len(reloaded.prompt_dict['default']) == 5
+    assert reloaded.usage_counts['default']['a0'] == 1
+
+
+def test_batch_rolls_back_on_error(tmp_path):
+    path = tmp_path / 'data.json'
+    m = PromptModel(str(path))
+    m.add_group('g1')
+    m.add_prompt('g1', 'keep', 'x')
+    prompts = m.prompt_dict
+    with pytest.raises(RuntimeError):
+        with m.batch():
+            m.add_prompt('g1', 'new', 'y')
+            m.rename_group('g1', 'g2')
+            m.add_group('g3')
+            raise RuntimeError('boom')
+    assert m.prompt_dict is prompts
+    assert list(m.prompt_dict) == ['default', 'g1']
+    assert m.prompt_dict['g1'] == {'keep': 'x'}
+    assert PromptModel(str(path)).prompt_dict == m.prompt_dict
+
+
+def test_batch_validation_failure_rolls_back(tmp_path):
+    path = tmp_path / 'data.json'
+    m = PromptModel(str(path))
+    with pytest.raises(ValueError):
+        with m.batch():
+            m.add_prompt('default', 'ok', 'x')
+            m.add_prompt('default', '  ', 'bad alias')
+    assert m.prompt_dict['default'] == {}
+
+
+def test_move_prompt_keeps_count(tmp_path):
+    m = PromptModel(str(tmp_path / 'data.json'))
+    m.add_prompt('default', 'a', 'x')
+    m.increment_usage('default', 'a')
+    with m.batch():
+        m.add_group('other')
+        m.move_prompt('default', 'other', 'a')
+    assert m.prompt_dict['other'] == {'a': 'x'}
+    assert m.usage_counts['other']['a'] == 1
+    m.reset_usage()
+    assert m.usage_counts['other']['a'] == 0
+
+
+def test_pack_format_keeps_bodies_on_disk(tmp_path):
+    path = tmp_path / 'data.json'
+    m = PromptModel(str(path))
+    m.add_prompt('default', 'long', 'x' * 10000)
+    m.add_prompt('default', 'short', '短文本')
+    m.increment_usage('default', 'short')
+
+    packed = PromptModel(str(path), fmt='pack')
+    assert model_mod.detect_format(str(path)) == "pack"
+    recs = packed.records['default']
+    assert isinstance(recs['long'].body, int)
+    assert packed.prompt_dict['default']['long'] == 'x' * 10000
+    assert packed.prompt_dict['default']['short'] == '短文本'
+    assert packed.usage_counts['default']['short'] == 1
+
+    # edits are written back and re-pointed at the new file
+    packed.update_prompt('default', 'short', 'short2', 'edited')
+    assert isinstance(recs['short2'].body, int)
+    assert recs['short2'].count == 1
+    packed.close()
+    reloaded = PromptModel(str(path))
+    assert reloaded.format == 'pack'
+    assert reloaded.get_text('default', 'short2') == 'edited'
+    assert reloaded.get_text('default', 'long') == 'x' * 10000
+    reloaded.close()
+
+    # and migrate back to json
+    back = PromptModel(str(path), fmt='json')
+    assert model_mod.detect_format(str(path)) == "json"
+    assert back.prompt_dict['default']['long'] == 'x' * 10000
+
+
+def test_pack_batch_rollback(tmp_path):
+    path = tmp_path / 'data.json'
+    m = PromptModel(str(path), fmt='pack')
+    m.add_prompt('default', 'a', 'body a')
+    with pytest.raises(RuntimeError):
+        with m.batch():
+            m.delete_group('default')
+            raise RuntimeError('boom')
+    assert m.prompt_dict['default']['a'] == 'body a'
+    m.close()
+
+
+def test_records_and_compat_views(tmp_path):
+    path = tmp_path / 'data.json'
+    m = PromptModel(str(path))
+    m.add_prompt('default', 'a', 'text a')
+    m.set_meta('default', 'a', lang='en')
+    rec = m.records['default']['a']
+    assert (rec.body, rec.count, rec.meta) == ('text a', 0, {'lang': 'en'})
+    # views read and write through to the same record
+    m.usage_counts['default']['a'] = 4
+    assert rec.count == 4
+    m.prompt_dict['default']['a'] = 'changed'
+    assert rec.body == 'changed'
+    assert dict(m.prompt_dict['default']) == {'a': 'changed'}
+    assert m.prompt_dict.get('missing', {}) == {}
+    m.save()
+    reloaded = PromptModel(str(path))
+    assert reloaded.records['default']['a'].meta == {'lang': 'en'}
+    assert reloaded.usage_counts == m.usage_counts
+
+
+def test_view_writes_reach_the_indexes(tmp_path):
+    m = PromptModel(str(tmp_path / 'data.json'))
+    base = "please review this pull request and point out bugs, style issues and missing tests"
+    m.add_prompt('default', 'other', "translate the following paragraph into formal english")
+    m.similar_prompts(base)
+    view = m.prompt_dict['default']
+    m.rename_group('default', 'work')
+    # 视图在分组改名后仍然可写，写入同样更新近似索引并写盘
+    view['review'] = base
+    assert [(g, a) for g, a, _ in m.similar_prompts(base + " first")] == [('work', 'review')]
+    m.usage_counts['work']['review'] = 7
+    del view['other']
+    reloaded = PromptModel(str(tmp_path / 'data.json'))
+    assert dict(reloaded.usage_counts['work']) == {'review': 7}
+    assert m.similar_prompts("translate the following paragraph into formal english") == []
+
+
+def test_only_prompts_with_metadata_get_a_meta_slot(tmp_path):
+    m = PromptModel(str(tmp_path / 'data.json'))
+    m.add_prompt('default', 'a', 'text a')
+    m.usage_counts['default']['a'] = 700
+    plain = m.records['default']['a']
+    assert plain.meta is None and not hasattr(plain, '__dict__')
+    m.set_meta('default', 'a', hotkey='ctrl+1')
+    rec = m.records['default']['a']
+    assert type(rec) is records_mod.MetaRecord
+    assert (rec.body, rec.count, rec.meta) == ('text a', 700, {'hotkey': 'ctrl+1'})
+    m.set_meta('default', 'a', hotkey=None)
+    assert m.records['default']['a'].meta is None
+    # 加载时常见计数共用同一个 int 对象
+    m.usage_counts['default']['a'] = 300
+    m.add_prompt('default', 'b', 'text b', count=300)
+    m.save()
+    recs = PromptModel(str(tmp_path / 'data.json')).records['default']
+    assert recs['a'].count is recs['b'].count
+    assert type(recs['a']) is records_mod.PromptRecord
+
+
+def test_group_names_are_interned(tmp_path):
+    m = PromptModel(str(tmp_path / 'data.json'))
+    name = ''.join(['gr', 'oup'])
+    m.add_prompt(name, 'a', 'x')
+    assert next(k for k in m.records if k == 'group') is sys.intern('group')
+
+
+def test_storage_formats_roundtrip_and_detect(tmp_path):
+    storage = importlib.import_module("promptlauncher.storage")
+    path = tmp_path / 'data.json'
+    m = PromptModel(str(path))
+    m.add_prompt('default', 'a', '中文 text')
+    m.increment_usage('default', 'a')
+    for fmt, codec in storage.CODECS.items():
+        if not codec.available:
+            continue
+        migrated = PromptModel(str(path), fmt=fmt)
+        assert migrated.format == fmt
+        # 缩进与紧凑 json 的文件头无法区分，都识别为 json
+        detected = "json" if fmt == "json-compact" else fmt
+        assert model_mod.detect_format(str(path)) == detected
+        # 不指定格式时按文件头自动识别并保持原格式
+        reloaded = PromptModel(str(path))
+        assert reloaded.format == detected
+        assert reloaded.get_text('default', 'a') == '中文 text'
+        assert reloaded.usage_counts['default']['a'] == 1
+
+
+def test_compact_json_is_not_migrated_back_and_forth(tmp_path):
+    path = tmp_path / 'data.json'
+    path.write_text('{"default": {\n  "a": {"text": "x", "count": 2}}}', encoding='utf-8')
+    assert model_mod.detect_format(str(path)) == "json"
+    before = path.read_bytes()
+    # 配置要求紧凑 json 时，已有的 json 文件不在加载时重写，下次保存才换成紧凑格式
+    m = PromptModel(str(path), fmt='json-compact')
+    assert path.read_bytes() == before
+    m.increment_usage('default', 'a')
+    assert b'\n' not in path.read_bytes()
+    assert PromptModel(str(path), fmt='json').get_record('default', 'a').count == 3
+
+
+def test_incremental_load_streams_groups_and_defers_saves(tmp_path):
+    path = tmp_path / 'data.json'
+    m = PromptModel(str(path))
+    for g in ('g1', 'g2', 'g3'):
+        m.add_group(g)
+        m.add_prompt(g, 'a', f'text {g}')
+    for fmt in ('json', 'json-gz', 'pack'):
+        PromptModel(str(path), fmt=fmt)
+        loader = PromptModel(str(path), load=False)
+        assert loader.begin_load() and loader.loading
+        groups = loader.read_groups()
+        name, recs = next(groups)
+        loader.records[name] = recs
+        # 加载期间的修改只标记，不能用残缺数据覆盖文件
+        loader.add_prompt(name, 'b', 'added while loading')
+        assert loader.dirty
+        for name, recs in groups:
+            loader.records[name] = recs
+        loader.finish_load()
+        assert not loader.dirty and not loader.loading
+        reloaded = PromptModel(str(path))
+        assert list(reloaded.records) == ['default', 'g1', 'g2', 'g3']
+        assert reloaded.get_text('g3', 'a') == 'text g3'
+        assert reloaded.get_text('default', 'b') == 'added while loading'
+        reloaded.delete_prompt('default', 'b')
+
+
+def test_compressed_format_is_smaller(tmp_path):
+    path = tmp_path / 'data.json'
+    m = PromptModel(str(path))
+    with m.batch():
+        for i in range(200):
+            m.add_prompt('default', f'alias {i}', 'please review the following code ' * 5)
+    size_json = path.stat().st_size
+    PromptModel(str(path), fmt='json-gz')
+    assert path.stat().st_size < size_json / 4
+
+
+def test_unknown_format_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        PromptModel(str(tmp_path / 'data.json'), fmt='yaml')
+
+
+def test_search_returns_top_n_by_count(tmp_path):
+    m = PromptModel(str(tmp_path / 'data.json'))
+    with m.batch():
+        for i in range(30):
+            m.add_prompt('default' if i % 2 else 'work', f'Review {i}', 'x', i)
+        m.add_prompt('default', 'other', 'x', 100)
+    hits = m.search('review', limit=3)
+    assert hits == [('default', 'Review 29', 29), ('work', 'Review 28', 28), ('default', 'Review 27', 27)]
+    assert [a for _, a, _ in m.search('REVIEW', group='work', limit=2)] == ['Review 28', 'Review 26']
+    assert m.search('', limit=1) == [('default', 'other', 100)]
+
+
+def test_similar_prompts_follow_mutations(tmp_path):
+    m = PromptModel(str(tmp_path / 'data.json'))
+    base = "please review this pull request and point out bugs, style issues and missing tests"
+    m.add_prompt('default', 'review', base)
+    m.add_prompt('default', 'other', "translate the following paragraph into formal english")
+    assert not m.build_similarity_step(1)
+    assert m.build_similarity_step(1)
+
+    hits = m.similar_prompts(base + " first")
+    assert [(g, a) for g, a, _ in hits] == [('default', 'review')]
+    assert m.similar_prompts(base, exclude=('default', 'review')) == []
+
+    m.add_prompt('default', 'review copy', base + " please")
+    m.rename_group('default', 'work')
+    assert m.duplicate_clusters() == [[('work', 'review'), ('work', 'review copy')]]
+    m.delete_prompt('work', 'review copy')
+    assert m.duplicate_clusters() == []
@@ -0,0 +1,61 @@
+import sys
+import types
+from pathlib import Path
+import importlib
+
+import pytest
+
+# Avoid importing the package which depends on PyQt6
+pkg = types.ModuleType("promptlauncher")
+pkg.__path__ = [str(Path(__file__).parents[1] / "promptlauncher")]
+sys.modules.setdefault("promptlauncher", pkg)
+
+PromptModel = importlib.import_module("promptlauncher.model").PromptModel
+packio = importlib.import_module("promptlauncher.packio")
+
+
+def _model(tmp_path):
+    m = PromptModel(str(tmp_path / 'data.json'))
+    m.add_prompt('default', 'greet', 'hello,\n"world"')
+    m.add_prompt('code', 'review/diff', 'review this: {file}', 3)
+    return m
+
+
+def test_roundtrip_all_formats(tmp_path):
+    src = _model(tmp_path)
+    for fmt, name in [('jsonl', 'p.jsonl'), ('csv', 'p.csv'), ('md', 'pack_md')]:
+        pack = str(tmp_path / name)
+        assert packio.export_pack(src, pack, fmt) == 2
+        dst = PromptModel(str(tmp_path / f'{fmt}.json'))
+        res = packio.import_pack(dst, pack)
+        assert res.added == 2
+        assert dst.prompt_dict['default']['greet'] == 'hello,\n"world"'
+        assert dst.prompt_dict['code']['review/diff'] == 'review this: {file}'
+        assert dst.usage_counts['code']['review/diff'] == 3
+
+
+def test_import_collision_policies(tmp_path):
+    src = _model(tmp_path)
+    pack = str(tmp_path / 'p.jsonl')
+    packio.export_pack(src, pack)
+
+    dst = PromptModel(str(tmp_path / 'dst.json'))
+    dst.add_prompt('default', 'greet', 'mine')
+    assert packio.import_pack(dst, pack, policy='skip').skipped == 1
+    assert dst.prompt_dict['default']['greet'] == 'mine'
+
+    assert packio.import_pack(dst, pack, policy='rename').renamed == 2
+    assert dst.prompt_dict['default']['greet (2)'] == 'hello,\n"world"'
+
+    assert packio.import_pack(dst, pack, policy='overwrite').overwritten == 2
+    assert dst.prompt_dict['default']['greet'] == 'hello,\n"world"'
+
+
+def test_import_is_atomic(tmp_path):
+    pack = tmp_path / 'bad.jsonl'
+    pack.write_text('{"group": "g", "alias": "a", "text": "x"}\n{"group": " ", "alias": "b"}\n',
+                    encoding='utf-8')
+    dst = PromptModel(str(tmp_path / 'dst.json'))
+    with pytest.raises(ValueError):
+        packio.import_pack(dst, str(pack))
+    assert 'g' not in dst.prompt_dict
@@ -0,0 +1,34 @@
+import sys
+import types
+from pathlib import Path
+import importlib
+
+pkg = types.ModuleType("promptlauncher")
+pkg.__path__ = [str(Path(__file__).parents[1] / "promptlauncher")]
+sys.modules.setdefault("promptlauncher", pkg)
+
+preview = importlib.import_module("promptlauncher.preview")
+
+
+def test_render_escapes_tags_and_marks_up_markdown():
+    html = preview.render_html("# Title\n<task>**do** `a<b`</task>\n- item\n```\nx < y\n```")
+    assert "<h1>Title</h1>" in html
+    assert "&lt;task&gt;<b>do</b>" in html
+    assert "a&lt;b</code>" in html
+    assert "• item" in html
+    assert "x &lt; y" in html and "<pre" in html
+
+    long_html = preview.render_html("word " * 10_000, limit=100)
+    assert "共 50000 字" in long_html
+    assert len(long_html) < 400
+
+
+def test_cache_is_keyed_by_content_and_bounded_by_size():
+    cache = preview.PreviewCache(max_chars=25)
+    a, b, c = (preview.preview_key(t) for t in ("a", "b", "c"))
+    cache.put(a, "x" * 10)
+    cache.put(b, "x" * 10)
+    assert cache.get(a) is not None  # a 变为最近使用
+    cache.put(c, "x" * 10)
+    assert a in cache and c in cache and b not in cache
+    assert preview.preview_key("a") == a != preview.preview_key("a ")
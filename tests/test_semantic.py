@@ -0,0 +1,81 @@
+import sys
+import types
+from pathlib import Path
+import importlib
+
+import pytest
+
+# Avoid importing the package which depends on PyQt6
+pkg = types.ModuleType("promptlauncher")
+pkg.__path__ = [str(Path(__file__).parents[1] / "promptlauncher")]
+sys.modules.setdefault("promptlauncher", pkg)
+
+semantic = importlib.import_module("promptlauncher.semantic")
+PromptModel = importlib.import_module("promptlauncher.model").PromptModel
+
+PROMPTS = {
+    "email": "rewrite this email so the wording is polite and professional",
+    "review": "review the code changes and list bugs and missing tests",
+    "翻译": "把下面的段落翻译成地道的英文",
+}
+
+
+@pytest.fixture(params=["numpy", "python"])
+def backend(request, monkeypatch):
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(semantic, "np", None)
+    return request.param
+
+
+def test_query_ranks_by_body_and_follows_updates(tmp_path, backend):
+    m = PromptModel(str(tmp_path / 'data.json'))
+    for alias, text in PROMPTS.items():
+        m.add_prompt('default', alias, text)
+
+    assert m.semantic_search("make my email more polite")[0][:2] == ('default', 'email')
+    assert m.semantic_search("翻译成英文")[0][:2] == ('default', '翻译')
+    assert m.semantic_search("zebra") == []
+
+    m.update_prompt('default', 'review', 'code review', "summarize the meeting notes")
+    m.rename_group('default', 'work')
+    assert m.semantic_search("meeting summary")[0][:2] == ('work', 'code review')
+    assert m.semantic_search("missing tests bugs") == []
+    assert m.semantic_search("polite email", group='other') == []
+
+
+def test_index_persists_and_only_reindexes_changes(tmp_path, monkeypatch):
+    path = str(tmp_path / 'data.json')
+    m = PromptModel(path)
+    for alias, text in PROMPTS.items():
+        m.add_prompt('default', alias, text)
+    m.semantic_index()
+    m.save_semantic_index()
+
+    m.add_prompt('default', 'email', "draft a polite reply declining the invitation")
+    reloaded = PromptModel(path)
+    added = []
+    orig_add = semantic.SemanticIndex.add
+    monkeypatch.setattr(semantic.SemanticIndex, "add",
+                        lambda self, key, text: (added.append(key), orig_add(self, key, text)))
+    assert reloaded.semantic_search("decline an invitation")[0][:2] == ('default', 'email')
+    assert added == [('default', 'email')]
+
+
+def test_build_in_steps_restarts_after_an_edit(tmp_path):
+    m = PromptModel(str(tmp_path / 'data.json'))
+    for i in range(5):
+        for alias, text in PROMPTS.items():
+            m.add_prompt(f'g{i}', alias, text)
+
+    assert not m.build_semantic_step(4)  # 第一步只加载已保存的索引
+    assert not m.build_semantic_step(4)
+    m.update_prompt('g0', 'email', 'email', "plan a birthday party for the team")
+    # 从头开始：加载一步，15 条每步 4 条
+    steps = 1
+    while not m.build_semantic_step(4):
+        steps += 1
+    assert steps == 5 and m.semantic_ready
+    assert len(m.semantic_index()) == 15
+    assert m.semantic_search("birthday party")[0][:2] == ('g0', 'email')
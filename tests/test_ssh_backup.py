@@ -1,11 +1,20 @@
 import types
 import sys
+import json
+import shlex
+import hashlib
+import threading
+
+import pytest
 
 from pathlib import Path
 import importlib.util
 
 # Provide stub for paramiko so ssh_backup.py can be loaded without the package
-sys.modules.setdefault("paramiko", types.ModuleType("paramiko"))
+paramiko = sys.modules.setdefault("paramiko", types.ModuleType("paramiko"))
+if not hasattr(paramiko, "SSHException"):
+    paramiko.SSHException = type("SSHException", (Exception,), {})
+    paramiko.ChannelException = type("ChannelException", (paramiko.SSHException,), {})
 
 # Create a minimal package to satisfy relative imports without loading PyQt6
 pkg = types.ModuleType("promptlauncher")
@@ -64,3 +73,191 @@ def test_ensure_no_action_when_exists():
     sftp = DummySFTP(existing={'/existing/sub/dir'})
     call_ensure(SshBackupManager, sftp, '/existing/sub/dir')
     assert sftp.mkdir_calls == []
+
+
+class MemorySFTP:
+    """Remote files kept in memory.
+
+    ``corrupt`` damages the first byte of that many uploads; ``fail_after``
+    drops the connection after that many written blocks.
+    """
+    def __init__(self, corrupt=0, fail_after=None):
+        self.files = {}
+        self.corrupt = corrupt
+        self.fail_after = fail_after
+        self.written = 0
+
+    def stat(self, path):
+        if path not in self.files:
+            raise IOError('not found')
+        return types.SimpleNamespace(st_size=len(self.files[path]))
+
+    def remove(self, path):
+        if self.files.pop(path, None) is None:
+            raise IOError('not found')
+
+    def posix_rename(self, src, dst):
+        self.files[dst] = self.files.pop(src)
+
+    def open(self, path, mode='r'):
+        sftp = self
+        if 'w' in mode:
+            sftp.files[path] = bytearray()
+        elif path not in sftp.files:
+            raise IOError('not found')
+        data = sftp.files[path]
+
+        class File:
+            pos = 0
+            def __enter__(self):
+                return self
+            def __exit__(self, *exc):
+                return False
+            def set_pipelined(self, on):
+                pass
+            def prefetch(self, size):
+                pass
+            def seek(self, pos):
+                self.pos = pos
+            def truncate(self, size):
+                del data[size:]
+            def read(self, n=-1):
+                end = len(data) if n < 0 else self.pos + n
+                out = bytes(data[self.pos:end])
+                self.pos += len(out)
+                return out
+            def write(self, block):
+                if isinstance(block, str):
+                    block = block.encode()
+                if sftp.fail_after is not None and sftp.written >= sftp.fail_after:
+                    raise EOFError('connection lost')
+                if sftp.corrupt and self.pos == 0 and path.endswith('.part'):
+                    sftp.corrupt -= 1
+                    block = b'x' + block[1:]
+                data[self.pos:self.pos + len(block)] = block
+                self.pos += len(block)
+                sftp.written += 1
+        return File()
+
+
+class HashTransport:
+    """Exec channel that runs sha256sum over MemorySFTP, or no shell at all.
+
+    ``stall`` makes the next ``stall`` hash commands time out.
+    """
+    def __init__(self, sftp, shell=True, stall=0):
+        self.sftp = sftp
+        self.shell = shell
+        self.stall = stall
+
+    def is_active(self):
+        return True
+
+    def open_session(self):
+        if not self.shell:
+            raise paramiko.ChannelException(1, 'exec not permitted')
+        sftp = self.sftp
+        transport = self
+
+        class Channel:
+            out = b''
+            def settimeout(self, t):
+                pass
+            def exec_command(self, cmd):
+                path = shlex.split(cmd)[2]
+                self.out = hashlib.sha256(sftp.files[path]).hexdigest().encode() + b'  ' + path.encode()
+            def recv(self, n):
+                if transport.stall:
+                    transport.stall -= 1
+                    raise TimeoutError('timed out')
+                out, self.out = self.out[:n], self.out[n:]
+                return out
+            def recv_exit_status(self):
+                return 0
+            def close(self):
+                pass
+        return Channel()
+
+
+def _manager(tmp_path, data=b'{"default": {}}'):
+    local = tmp_path / 'prompt.json'
+    local.write_bytes(data)
+    manager = SshBackupManager.__new__(SshBackupManager)
+    manager.cfg = {'verify_retries': 2}
+    manager.local_file = str(local)
+    manager._exec_ok = None
+    return manager
+
+
+def test_upload_verifies_remote_hash_and_retries(tmp_path):
+    manager = _manager(tmp_path)
+    sftp = MemorySFTP(corrupt=1)
+    assert manager._upload(HashTransport(sftp), sftp, '/r/prompt.json') is None
+    assert sftp.written == 2 * 2 + 1  # 每次上传：续传记录与正文；最后写旁路哈希
+    assert '/r/prompt.json.part' not in sftp.files
+    # 内容未变时只比较旁路哈希，不再上传
+    written = sftp.written
+    assert manager._upload(HashTransport(sftp), sftp, '/r/prompt.json') is None
+    assert sftp.written == written
+
+    sftp = MemorySFTP(corrupt=5)
+    assert manager._upload(HashTransport(sftp), sftp, '/r/prompt.json') == "哈希不一致"
+    assert '/r/prompt.json' not in sftp.files
+
+
+def test_verify_without_shell_uses_size_and_sidecar(tmp_path):
+    manager = _manager(tmp_path)
+    sftp = MemorySFTP()
+    transport = HashTransport(sftp, shell=False)
+    assert manager._upload(transport, sftp, '/r/prompt.json') is None
+    assert manager._exec_ok is False
+    sidecar = json.loads(sftp.files['/r/prompt.json' + ssh_backup.SIDECAR_SUFFIX])
+    assert sidecar == {'size': 15, 'sha256': ssh_backup.file_sha256(manager.local_file)[1]}
+    sftp.files['/r/prompt.json'] += b' '
+    assert manager._verify(transport, sftp, '/r/prompt.json', 15, sidecar['sha256']).startswith("大小不一致")
+
+
+def test_hash_timeout_fails_the_run_but_keeps_remote_hashing(tmp_path):
+    manager = _manager(tmp_path)
+    sftp = MemorySFTP()
+    with pytest.raises(TimeoutError):
+        manager._upload(HashTransport(sftp, stall=1), sftp, '/r/prompt.json')
+    # 超时不代表服务器不支持：未改名为正式文件，下次仍用远程哈希校验
+    assert manager._exec_ok is None
+    assert '/r/prompt.json' not in sftp.files
+    assert manager._upload(HashTransport(sftp), sftp, '/r/prompt.json') is None
+    assert manager._exec_ok is True
+
+
+def test_interrupted_upload_resumes_and_restore_verifies(tmp_path, monkeypatch):
+    monkeypatch.setattr(ssh_backup, 'CHUNK', 4)
+    data = bytes(range(40))
+    manager = _manager(tmp_path, data)
+    # 续传记录写入 1 块，正文写入 3 块后断线
+    sftp = MemorySFTP(fail_after=4)
+    transport = HashTransport(sftp)
+    with pytest.raises(EOFError):
+        manager._upload(transport, sftp, '/r/prompt.json')
+    assert bytes(sftp.files['/r/prompt.json.part']) == data[:12]
+    sftp.fail_after = None
+    sftp.written = 0
+    assert manager._upload(transport, sftp, '/r/prompt.json') is None
+    assert sftp.written == 7 + 1  # 只传剩下的 7 块，加旁路哈希
+    assert bytes(sftp.files['/r/prompt.json']) == data
+
+    class Conn:
+        def __enter__(self):
+            return transport, sftp, '/r/prompt.json'
+        def __exit__(self, *exc):
+            return False
+    manager._lock = threading.Lock()
+    manager._connect = Conn
+    restored = manager.fetch()
+    assert Path(restored).read_bytes() == data
+    assert not Path(restored + ssh_backup.RESUME_SUFFIX).exists()
+
+    # 远程内容与记录的哈希不符时不交出文件
+    sftp.files['/r/prompt.json'][0] ^= 1
+    with pytest.raises(IOError):
+        manager.fetch()
+    assert not Path(restored).exists()
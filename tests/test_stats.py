@@ -0,0 +1,52 @@
+import sys
+import types
+from pathlib import Path
+import importlib
+
+pkg = types.ModuleType("promptlauncher")
+pkg.__path__ = [str(Path(__file__).parents[1] / "promptlauncher")]
+sys.modules.setdefault("promptlauncher", pkg)
+
+PromptModel = importlib.import_module("promptlauncher.model").PromptModel
+stats = importlib.import_module("promptlauncher.stats")
+
+
+def _indexed(path, tokenizer=stats.DEFAULT_TOKENIZER):
+    model = PromptModel(str(path))
+    index = stats.StatsIndex(str(path) + ".stats", tokenizer)
+    index.attach(model)
+    index.step(None)
+    return model, index
+
+
+def test_counts_and_estimate():
+    assert stats.count_stats("hello world, 你好") == (15, 4, 1 + 2 + 3)
+    assert stats.estimate_tokens("") == 0
+
+
+def test_only_changed_prompts_are_recounted(tmp_path):
+    path = tmp_path / 'data.json'
+    model, index = _indexed(path)
+    for i in range(10):
+        model.add_prompt('default', f'p{i}', f'prompt number {i}')
+    index.step(None)
+    assert index.counted == 10
+    assert index.totals() == (150, 30, 40)
+    index.save()
+
+    model, index = _indexed(path)
+    assert index.counted == 0 and index.pending == 0
+    # 改名不重算，改正文只重算一条
+    model.rename_group('default', 'g')
+    model.update_prompt('g', 'p0', 'first', 'prompt number 0')
+    model.update_prompt('g', 'p1', 'p1', 'changed')
+    index.step(None)
+    assert index.counted == 1
+    assert index.get('g', 'first') == (15, 3, 4)
+    assert index.of_record(model.get_record('g', 'p1')).chars == 7
+
+    # 换分词器后缓存不再适用
+    stats.register_tokenizer('words', lambda text: len(text.split()))
+    model, index = _indexed(path, 'words')
+    assert index.counted == 10
+    assert index.totals().tokens == 28
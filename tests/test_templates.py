@@ -0,0 +1,61 @@
+import sys
+import types
+from pathlib import Path
+import importlib
+from concurrent.futures import ThreadPoolExecutor
+
+# Avoid importing the package which depends on PyQt6
+pkg = types.ModuleType("promptlauncher")
+pkg.__path__ = [str(Path(__file__).parents[1] / "promptlauncher")]
+sys.modules.setdefault("promptlauncher", pkg)
+
+templates = importlib.import_module("promptlauncher.templates")
+PromptModel = importlib.import_module("promptlauncher.model").PromptModel
+
+
+def test_compile_and_render():
+    tpl = templates.compile_template(
+        'Review this {language=Python} file {file}. Output {{"ok": true}} and {"raw": 1}, then {file} again.'
+    )
+    assert [f.name for f in tpl.fields] == ["language", "file"]
+    assert tpl.render({"file": "a.py"}) == \
+        'Review this Python file a.py. Output {"ok": true} and {"raw": 1}, then a.py again.'
+    assert "{file}" in tpl.render({})
+    assert not templates.compile_template("plain {\"json\": 1} text")
+
+
+def test_model_cache_is_invalidated_on_update_and_delete(tmp_path):
+    m = PromptModel(str(tmp_path / 'data.json'))
+    m.add_prompt('default', 't', 'hello {name=world}')
+    # 未标记为模板：原样复制
+    assert not m.template('default', 't')
+    assert m.template('default', 't').render({"name": "bob"}) == 'hello {name=world}'
+    m.set_meta('default', 't', template=True)
+    assert m.template('default', 't').render() == 'hello world'
+    m.template('default', 't')
+    assert (m.templates.hits, m.templates.misses) == (1, 1)
+
+    m.update_prompt('default', 't', 't', 'bye {name}')
+    assert m.template('default', 't').render({"name": "bob"}) == 'bye bob'
+    m.delete_prompt('default', 't')
+    assert ('default', 't') not in m.templates
+
+
+def test_remember_keeps_recent_values_first():
+    recent = {"lang": ["go", "rust"]}
+    templates.remember(recent, {"lang": "rust", "file": "", "x": "1"}, limit=2)
+    assert recent == {"lang": ["rust", "go"], "x": ["1"]}
+
+
+def test_cache_is_safe_under_concurrent_reads():
+    cache = templates.TemplateCache(maxsize=8)
+
+    def hammer(n):
+        for i in range(2000):
+            key = ('g', str((i * n) % 20))
+            cache.get(key, lambda: f'{key[1]} {{x}}')
+
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(hammer, range(1, 9)))
+    assert len(cache) <= 8
+    assert cache.hits + cache.misses == 8 * 2000
@@ -0,0 +1,52 @@
+import sys
+import types
+from pathlib import Path
+import importlib
+
+import pytest
+
+# Avoid importing the package which depends on PyQt6
+pkg = types.ModuleType("promptlauncher")
+pkg.__path__ = [str(Path(__file__).parents[1] / "promptlauncher")]
+sys.modules.setdefault("promptlauncher", pkg)
+
+trace = importlib.import_module("promptlauncher.trace")
+TraceEvent = trace.TraceEvent
+
+
+def test_record_and_load_round_trip(tmp_path):
+    path = tmp_path / "t.jsonl"
+    rec = trace.TraceRecorder(str(path))
+    rec.record("search", text="rev")
+    rec.record("copy", group="g", alias="a")
+    rec.close()
+    events = trace.load_trace(str(path))
+    assert [e.op for e in events] == ["search", "copy"]
+    assert events[1].args == {"group": "g", "alias": "a"}
+
+    path.write_text('{"t": 0, "op": "explode", "args": {}}\n')
+    with pytest.raises(ValueError):
+        trace.load_trace(str(path))
+
+
+def test_replay_drives_window_and_checks_budgets():
+    calls = []
+
+    class Window:
+        def toggle_window(self):
+            calls.append("toggle")
+
+    class App:
+        def processEvents(self):
+            pass
+
+    events = [TraceEvent(0, "toggle", {}), TraceEvent(0.1, "toggle", {})]
+    samples = trace.replay(Window(), events, App())
+    assert calls == ["toggle", "toggle"]
+    assert len(samples["toggle"]) == 2
+
+    report = {"ops": {"toggle": trace.summarize([1.0, 2.0, 30.0])}, "peak_rss_mb": 120, "qobjects": 10}
+    assert report["ops"]["toggle"]["max"] == 30.0
+    assert trace.check_budgets(report, {"ops": {"toggle": {"p50": 5}}, "qobjects": 50}) == []
+    failures = trace.check_budgets(report, {"ops": {"toggle": {"max": 10}}, "peak_rss_mb": 100})
+    assert len(failures) == 2
@@ -0,0 +1,65 @@
+import sys
+import json
+import types
+import threading
+from pathlib import Path
+from http.server import BaseHTTPRequestHandler, HTTPServer
+import importlib
+
+import pytest
+
+# Avoid importing the package which depends on PyQt6
+pkg = types.ModuleType("promptlauncher")
+pkg.__path__ = [str(Path(__file__).parents[1] / "promptlauncher")]
+sys.modules.setdefault("promptlauncher", pkg)
+
+updates = importlib.import_module("promptlauncher.updates")
+
+
+@pytest.fixture
+def server():
+    """Local stand-in for the GitHub releases endpoint that honours If-None-Match."""
+    hits = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            hits.append(self.headers.get("If-None-Match"))
+            if self.headers.get("If-None-Match") == '"v1"':
+                self.send_response(304)
+                self.end_headers()
+                return
+            body = json.dumps({"tag_name": "v999.0.0", "html_url": "http://example/r"}).encode()
+            self.send_response(200)
+            self.send_header("ETag", '"v1"')
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    httpd = HTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_port}/latest", hits
+    httpd.shutdown()
+
+
+def test_check_latest_uses_ttl_and_etag(server, tmp_path):
+    url, hits = server
+    cache = str(tmp_path / "cache.json")
+
+    info = updates.check_latest(url, cache, ttl=3600)
+    assert info.latest == "v999.0.0" and info.newer and not info.cached
+    # Fresh cache: no request at all
+    assert updates.check_latest(url, cache, ttl=3600).cached
+    assert hits == [None]
+    # Forced check revalidates and gets a 304
+    info = updates.check_latest(url, cache, ttl=3600, force=True)
+    assert info.cached and info.page == "http://example/r"
+    assert hits == [None, '"v1"']
+
+
+def test_is_newer():
+    assert updates.is_newer("v1.10.0", "1.9.3")
+    assert not updates.is_newer("v1.0", "1.0")
+    assert not updates.is_newer("", "1.0")